@@ -1,13 +1,22 @@
 # app.py - Main Flask application
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+import io
 import os
+import click
+import json
+import time
 import logging
 from datetime import datetime, timedelta
 from storage.file_storage import FileStorage
+from storage.sqlite_storage import SQLiteStorage
+from storage.status_history import StatusHistory
+from storage.report_retention import start_report_compaction
 from services.jboss_cli import JBossCLIService
 from services.monitoring import MonitoringService
+from services.status_poller import StatusPoller, instance_events
+from services.report_diff import diff_results
 
 # Set up logging
 logging.basicConfig(
@@ -21,6 +30,8 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'dev-jwt-secret')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=12)
+    # Only the status stream also takes ?jwt= (EventSource cannot send headers)
+    JWT_TOKEN_LOCATION = ['headers']
     
     # Environment credentials
     PROD_USERNAME = os.environ.get('PROD_USERNAME', 'prod_admin')
@@ -34,17 +45,61 @@ class Config:
     
     # Storage configuration
     STORAGE_DIR = os.environ.get('STORAGE_DIR', 'data')
+    # "file" keeps the JSON files, "sqlite" uses an indexed database (migrated from the JSON files once)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'file').lower()
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join(STORAGE_DIR, 'monitoring.db'))
+    # Entries committed per write by the streaming host import
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', '1000'))
+    
+    # Background status polling
+    STATUS_POLLER_ENABLED = os.environ.get('STATUS_POLLER_ENABLED', 'true').lower() == 'true'
+    STATUS_POLL_INTERVAL = float(os.environ.get('STATUS_POLL_INTERVAL', '60'))
+    # Shared by the workers: one of them is elected to poll and publishes its snapshots here
+    STATUS_STATE_DIR = os.environ.get('STATUS_STATE_DIR', os.path.join(STORAGE_DIR, 'status'))
+    # Seconds of change history kept for ?since= deltas; older clients get the full results
+    STATUS_DELTA_HISTORY = float(os.environ.get('STATUS_DELTA_HISTORY', '3600'))
+    
+    # Per-instance status history, recorded by the elected poller
+    STATUS_HISTORY_ENABLED = os.environ.get('STATUS_HISTORY_ENABLED', 'true').lower() == 'true'
+    STATUS_HISTORY_DIR = os.environ.get('STATUS_HISTORY_DIR', os.path.join(STORAGE_DIR, 'history'))
+    
+    # Seconds between report retention runs (0 disables them); policies come from REPORT_RETENTION*
+    REPORT_COMPACTION_INTERVAL = float(os.environ.get('REPORT_COMPACTION_INTERVAL', '3600'))
+    
+    # Hosts per page of a report when paging or filtering without an explicit limit
+    REPORT_PAGE_SIZE = int(os.environ.get('REPORT_PAGE_SIZE', '100'))
+    
+    # Bytes of serialized hosts collected before each write of a streamed response
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '65536'))
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config.from_object(Config)
-CORS(app, resources={r"/api/*": {"origins": "*"}})
+CORS(app, resources={r"/api/*": {"origins": "*", "expose_headers": ["ETag"]}})
 jwt = JWTManager(app)
 
 # Initialize services
-file_storage = FileStorage(app.config['STORAGE_DIR'])
+if app.config['STORAGE_BACKEND'] == 'sqlite':
+    file_storage = SQLiteStorage(app.config['SQLITE_PATH'], app.config['STORAGE_DIR'])
+else:
+    file_storage = FileStorage(app.config['STORAGE_DIR'])
 jboss_cli_service = JBossCLIService()
 monitoring_service = MonitoringService(jboss_cli_service)
+status_history = StatusHistory(app.config['STATUS_HISTORY_DIR']) if app.config['STATUS_HISTORY_ENABLED'] else None
+status_poller = StatusPoller(
+    monitoring_service,
+    file_storage,
+    interval=app.config['STATUS_POLL_INTERVAL'],
+    username=app.config['JBOSS_USERNAME'],
+    password=app.config['JBOSS_PASSWORD'],
+    history=status_history,
+    state_dir=app.config['STATUS_STATE_DIR'],
+    delta_history=app.config['STATUS_DELTA_HISTORY']
+)
+if app.config['STATUS_POLLER_ENABLED']:
+    status_poller.start()
+if app.config['REPORT_COMPACTION_INTERVAL'] > 0:
+    start_report_compaction(file_storage, app.config['REPORT_COMPACTION_INTERVAL'])
 
 def log_request():
     """Log detailed request information for debugging"""
@@ -55,6 +110,20 @@ def log_request():
     else:
         logger.info(f"Form data: {request.form}")
         logger.info(f"Query params: {request.args}")
+def version_from_etag(header):
+    """Extract a snapshot version from an If-None-Match header, if it holds one"""
+    if not header:
+        return None
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        try:
+            return int(tag.strip('"'))
+        except ValueError:
+            continue
+    return None
+
 # Root route
 @app.route('/')
 def index():
@@ -106,7 +175,7 @@ def get_hosts():
     environment = current_user.get('environment', 'non-production')
     
     hosts = file_storage.get_all_hosts(environment)
-    return jsonify(hosts=hosts), 200
+    return stream_results('hosts', hosts)
 
 @app.route('/api/hosts', methods=['POST'])
 @jwt_required()
@@ -129,7 +198,11 @@ def add_host():
         hostname = host_data.get('hostname', {}).get('hostname', '')
         host_data['hostname'] = hostname
     
-    host = file_storage.add_host(host_data)
+    try:
+        host = file_storage.add_host(host_data)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error adding host: {str(e)}")
+        return jsonify({"error": "Could not save the host"}), 500
     return jsonify(host=host), 201
 
 @app.route('/api/hosts/bulk', methods=['POST'])
@@ -148,9 +221,45 @@ def add_hosts_bulk():
     logger.info(f"Received bulk hosts data: {bulk_data}")
     
     # Process bulk data
-    hosts = file_storage.bulk_add_hosts(bulk_data, environment)
+    try:
+        hosts = file_storage.bulk_add_hosts(bulk_data, environment)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error adding hosts: {str(e)}")
+        return jsonify({"error": "Could not save the hosts"}), 500
     return jsonify(hosts=hosts), 201
 
+@app.route('/api/hosts/import', methods=['POST'])
+@jwt_required()
+def import_hosts():
+    """
+    Import an uploaded text or CSV file of "hostname port instance_name" lines
+    
+    The file is read line by line and committed in chunks. The response is
+    streamed as NDJSON: one {"line", "entry", "result"} object per line
+    ("added", "duplicate" or "invalid"), then a {"summary": ...} object.
+    """
+    current_user = get_jwt_identity()
+    environment = current_user.get('environment', 'non-production')
+    
+    # Multipart upload as "file", or the raw request body
+    if 'file' in request.files:
+        stream = request.files['file'].stream
+    else:
+        stream = request.stream
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    chunk_size = request.args.get('chunk_size', app.config['IMPORT_CHUNK_SIZE'], type=int)
+    
+    def generate():
+        counts = {"added": 0, "duplicate": 0, "invalid": 0}
+        for outcome in file_storage.import_hosts(lines, environment, max(1, chunk_size)):
+            counts[outcome["result"]] += 1
+            yield json.dumps(outcome) + "\n"
+        
+        logger.info(f"Imported hosts into {environment}: {counts}")
+        yield json.dumps({"summary": counts}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/api/hosts/<int:host_id>', methods=['DELETE'])
 @jwt_required()
 def delete_host(host_id):
@@ -159,7 +268,11 @@ def delete_host(host_id):
     current_user = get_jwt_identity()
     environment = current_user.get('environment', 'non-production')
     
-    success = file_storage.delete_host(host_id, environment)
+    try:
+        success = file_storage.delete_host(host_id, environment)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error deleting host {host_id}: {str(e)}")
+        return jsonify({"error": "Could not delete the host"}), 500
     if success:
         return jsonify({"message": "Host deleted successfully"}), 200
     else:
@@ -177,7 +290,11 @@ def add_instance(host_id):
         return jsonify({"error": "Missing JSON in request"}), 400
     
     instance_data = request.json
-    instance = file_storage.add_instance(host_id, instance_data, environment)
+    try:
+        instance = file_storage.add_instance(host_id, instance_data, environment)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error adding instance to host {host_id}: {str(e)}")
+        return jsonify({"error": "Could not save the instance"}), 500
     
     if instance:
         return jsonify(instance=instance), 201
@@ -192,7 +309,11 @@ def delete_instance(instance_id):
     current_user = get_jwt_identity()
     environment = current_user.get('environment', 'non-production')
     
-    success = file_storage.delete_instance(instance_id, environment)
+    try:
+        success = file_storage.delete_instance(instance_id, environment)
+    except (OSError, ValueError) as e:
+        logger.error(f"Error deleting instance {instance_id}: {str(e)}")
+        return jsonify({"error": "Could not delete the instance"}), 500
     if success:
         return jsonify({"message": "Instance deleted successfully"}), 200
     else:
@@ -202,7 +323,13 @@ def delete_instance(instance_id):
 @app.route('/api/monitoring/status', methods=['GET'])
 @jwt_required()
 def get_monitoring_status():
-    """Get status of all hosts and instances"""
+    """
+    Get status of all hosts and instances from the poller cache
+    
+    Full results are streamed (NDJSON with ?format=ndjson): one host per
+    line, then a line with the snapshot and report fields. A live sweep
+    without a deadline writes each host as soon as its probes finish.
+    """
     current_user = get_jwt_identity()
     environment = current_user.get('environment', 'non-production')
     username = current_user.get('username')
@@ -211,67 +338,55 @@ def get_monitoring_status():
     jboss_username = request.args.get('username', app.config['JBOSS_USERNAME'])
     jboss_password = request.args.get('password', app.config['JBOSS_PASSWORD'])
     
-    # Get all hosts for the environment
-    hosts = file_storage.get_all_hosts(environment)
+    # Serve the latest background sweep unless a live refresh is requested
+    force = request.args.get('force', 'false').lower() == 'true'
+    # Optional budget for a live sweep; unfinished instances come back as "pending"
+    deadline_ms = request.args.get('deadline_ms', type=int)
+    deadline = deadline_ms / 1000.0 if deadline_ms is not None and deadline_ms >= 0 else None
     
-    # Initialize results structure
-    results = []
+    save_report = request.args.get('save_report', 'false').lower() == 'true'
     
-    # Check each host and its instances
-    for host in hosts:
-        host_result = {
-            "id": host.get("id"),
-            "hostname": host.get("hostname"),
-            "instances": []
-        }
+    snapshot = None if force else status_poller.get_snapshot(environment)
+    if snapshot is None and deadline is None:
+        stored = {}
         
-        for instance in host.get("instances", []):
-            instance_id = instance.get("id")
-            instance_name = instance.get("name")
-            port = instance.get("port")
-            
-            # Check instance status
-            status = jboss_cli_service.check_instance_status(
-                host.get("hostname"), 
-                port, 
-                jboss_username, 
-                jboss_password
-            )
-            
-            # If instance is online, check datasources and deployments
-            if status.get("status") == "online":
-                datasources = jboss_cli_service.check_datasources(
-                    host.get("hostname"), 
-                    port, 
-                    jboss_username, 
-                    jboss_password
-                )
-                
-                deployments = jboss_cli_service.check_deployments(
-                    host.get("hostname"), 
-                    port, 
-                    jboss_username, 
-                    jboss_password
-                )
-            else:
-                datasources = []
-                deployments = []
-            
-            instance_result = {
-                "id": instance_id,
-                "name": instance_name,
-                "port": port,
-                "status": status.get("status"),
-                "datasources": datasources,
-                "warFiles": deployments
-            }
-            
-            host_result["instances"].append(instance_result)
+        def trailer():
+            fields = {"snapshot": {
+                "version": stored["version"],
+                "timestamp": stored["timestamp"],
+                "age_seconds": stored["age_seconds"]
+            }}
+            if save_report:
+                fields["report"] = file_storage.save_report({
+                    "results": stored["results"],
+                    "created_by": username,
+                    "timestamp": datetime.now().isoformat()
+                }, environment)
+            return fields
         
-        results.append(host_result)
+        events = status_poller.iter_refresh(environment, jboss_username, jboss_password, on_complete=stored.update)
+        hosts = (host for host, _, host_complete in events if host_complete)
+        return stream_results('results', hosts, trailer, flush_each=True)
+    
+    if snapshot is None:
+        snapshot = status_poller.refresh(environment, jboss_username, jboss_password, deadline=deadline)
+    
+    results = snapshot["results"]
+    snapshot_info = {
+        "version": snapshot["version"],
+        "timestamp": snapshot["timestamp"],
+        "age_seconds": snapshot["age_seconds"]
+    }
+    
+    if snapshot.get("partial"):
+        # Not cached and not versioned: the next poll gets the completed sweep
+        snapshot_info["partial"] = True
+        snapshot_info["pending"] = snapshot["pending"]
+        return stream_results('results', results, lambda: {"snapshot": snapshot_info})
+    
+    etag = f'"{snapshot["version"]}"'
     
     # Save this as a report if requested
-    save_report = request.args.get('save_report', 'false').lower() == 'true'
     if save_report:
         report_data = {
             "results": results,
@@ -279,9 +394,166 @@ def get_monitoring_status():
             "timestamp": datetime.now().isoformat()
         }
         report_metadata = file_storage.save_report(report_data, environment)
-        return jsonify(results=results, report=report_metadata), 200
+        return stream_results('results', results, lambda: {"snapshot": snapshot_info, "report": report_metadata})
+    
+    # Delta polling: the client sends the version it already has
+    since = request.args.get('since', type=int)
+    if since is None:
+        since = version_from_etag(request.headers.get('If-None-Match'))
+    
+    if since is not None:
+        # A version this deployment never issued (e.g. from before its state was reset) gets the full results
+        if since == snapshot["version"]:
+            response = app.response_class(status=304)
+            response.headers['ETag'] = etag
+            return response
+        
+        delta = status_poller.get_changes(environment, since)
+        if delta is not None:
+            snapshot_info["version"] = delta["version"]
+            response = jsonify(delta=delta, snapshot=snapshot_info)
+            response.headers['ETag'] = f'"{delta["version"]}"'
+            return response, 200
+    
+    response = stream_results('results', results, lambda: {"snapshot": snapshot_info})
+    response.headers['ETag'] = etag
+    return response
+
+def wants_ndjson():
+    """True if the client asked for NDJSON with ?format=ndjson or an Accept header"""
+    if request.args.get('format'):
+        return request.args.get('format').lower() == 'ndjson'
+    return request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson'
+
+def stream_results(name, items, trailer=None, flush_each=False):
+    """
+    Stream a list as a JSON document, or as NDJSON if the client asked for it
+    
+    The JSON document is {name: [items...], **trailer()}; NDJSON is one item
+    per line, then a line with trailer() if it has any fields. Items are
+    serialized one at a time and written in STREAM_CHUNK_SIZE pieces, so the
+    response never exists in memory as a whole.
+    
+    Args:
+        name: Key of the list in the JSON document
+        items: Iterable of items, which may still be being produced
+        trailer: Called after the last item; returns the other top-level fields
+        flush_each: Write every item as soon as it is serialized (for slow producers)
+    
+    Returns:
+        Streaming response
+    """
+    ndjson = wants_ndjson()
+    chunk_size = 0 if flush_each else app.config['STREAM_CHUNK_SIZE']
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    
+    def pieces():
+        if ndjson:
+            for item in items:
+                yield encode(item) + "\n"
+            fields = trailer() if trailer else {}
+            if fields:
+                yield encode(fields) + "\n"
+            return
+        
+        yield "{" + encode(name) + ":["
+        for index, item in enumerate(items):
+            yield ("," if index else "") + encode(item)
+        yield "]"
+        for key, value in (trailer() if trailer else {}).items():
+            yield f",{encode(key)}:{encode(value)}"
+        yield "}"
+    
+    def generate():
+        buffer = []
+        size = 0
+        for piece in pieces():
+            buffer.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson' if ndjson else 'application/json',
+        # Stop nginx from buffering the stream
+        headers={'X-Accel-Buffering': 'no'} if flush_each else None
+    )
+
+def sse_event(event, data):
+    """Format a Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/monitoring/status/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_monitoring_status():
+    """
+    Stream each instance's status as Server-Sent Events
+    
+    Served from the poller's latest snapshot. With force=true, or before the
+    first sweep, the poller sweeps live (coalesced with other refreshes) and
+    each instance is sent as soon as its probe finishes.
+    """
+    current_user = get_jwt_identity()
+    environment = current_user.get('environment', 'non-production')
     
-    return jsonify(results=results), 200
+    # Get JBoss credentials
+    jboss_username = request.args.get('username', app.config['JBOSS_USERNAME'])
+    jboss_password = request.args.get('password', app.config['JBOSS_PASSWORD'])
+    
+    force = request.args.get('force', 'false').lower() == 'true'
+    snapshot = None if force else status_poller.get_snapshot(environment)
+    
+    def generate():
+        started_at = time.time()
+        stored = {}
+        if snapshot is not None:
+            events = instance_events(snapshot["results"])
+        else:
+            events = status_poller.iter_refresh(environment, jboss_username, jboss_password, on_complete=stored.update)
+        
+        host_count = 0
+        status_counts = {}
+        for host, instance_result, host_complete in events:
+            if host_complete:
+                host_count += 1
+            if instance_result is None:
+                continue
+            
+            status = instance_result.get("status")
+            status_counts[status] = status_counts.get(status, 0) + 1
+            
+            yield sse_event("instance", {
+                "host": {
+                    "id": host.get("id"),
+                    "hostname": host.get("hostname")
+                },
+                "instance": instance_result
+            })
+        
+        source = snapshot or stored
+        yield sse_event("summary", {
+            "hosts": host_count,
+            "instances": sum(status_counts.values()),
+            "status_counts": status_counts,
+            "elapsed_seconds": round(time.time() - started_at, 1),
+            "version": source.get("version"),
+            "age_seconds": source.get("age_seconds")
+        })
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            # Stop nginx from buffering the stream
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 @app.route('/api/monitoring/instance/<int:instance_id>', methods=['GET'])
 @jwt_required()
@@ -301,33 +573,15 @@ def get_instance_status(instance_id):
     
     host, instance = host_instance
     
-    # Check instance status
-    status = jboss_cli_service.check_instance_status(
+    # Check status, datasources and deployments in one probe
+    probe = jboss_cli_service.probe_instance(
         host.get("hostname"), 
         instance.get("port"), 
         jboss_username, 
-        jboss_password
+        jboss_password,
+        environment
     )
     
-    # If instance is online, check datasources and deployments
-    if status.get("status") == "online":
-        datasources = jboss_cli_service.check_datasources(
-            host.get("hostname"), 
-            instance.get("port"), 
-            jboss_username, 
-            jboss_password
-        )
-        
-        deployments = jboss_cli_service.check_deployments(
-            host.get("hostname"), 
-            instance.get("port"), 
-            jboss_username, 
-            jboss_password
-        )
-    else:
-        datasources = []
-        deployments = []
-    
     result = {
         "host": {
             "id": host.get("id"),
@@ -338,13 +592,85 @@ def get_instance_status(instance_id):
             "name": instance.get("name"),
             "port": instance.get("port")
         },
-        "status": status.get("status"),
-        "datasources": datasources,
-        "warFiles": deployments
+        "status": probe.get("status"),
+        "datasources": probe.get("datasources", []),
+        "warFiles": probe.get("warFiles", [])
     }
     
     return jsonify(status=result), 200
 
+def history_query(instance_id):
+    """
+    Resolve the instance and time range of a history request
+    
+    The range comes from the since/until query parameters (epoch seconds or
+    ISO 8601), defaulting to the last 7 days.
+    
+    Returns:
+        (error response or None, (environment, host, instance, since, until))
+    """
+    if status_history is None:
+        return (jsonify({"error": "Status history is disabled"}), 404), None
+    
+    current_user = get_jwt_identity()
+    environment = current_user.get('environment', 'non-production')
+    host, instance = file_storage.get_instance_by_id(instance_id, environment)
+    if not host or not instance:
+        return (jsonify({"error": "Instance not found"}), 404), None
+    
+    def parse_time(name, default):
+        value = request.args.get(name)
+        if value is None:
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            return datetime.fromisoformat(value).timestamp()
+    
+    try:
+        until = parse_time('until', time.time())
+        since = parse_time('since', until - 7 * 24 * 3600)
+    except ValueError:
+        return (jsonify({"error": "since and until must be epoch seconds or ISO 8601 times"}), 400), None
+    
+    return None, (environment, host, instance, since, until)
+
+def history_subject(host, instance, since, until):
+    return {
+        "host": {"id": host.get("id"), "hostname": host.get("hostname")},
+        "instance": {"id": instance.get("id"), "name": instance.get("name"), "port": instance.get("port")},
+        "since": since,
+        "until": until
+    }
+
+@app.route('/api/monitoring/instance/<int:instance_id>/availability', methods=['GET'])
+@jwt_required()
+def get_instance_availability(instance_id):
+    """Get an instance's availability and health over a time range"""
+    error, query = history_query(instance_id)
+    if error:
+        return error
+    environment, host, instance, since, until = query
+    
+    summary = status_history.availability(environment, host.get("hostname"), instance.get("port"), since, until)
+    if summary is None:
+        summary = {"samples": 0, "availability": None, "statusCounts": {}}
+    
+    return jsonify(**history_subject(host, instance, since, until), **summary), 200
+
+@app.route('/api/monitoring/instance/<int:instance_id>/timeline', methods=['GET'])
+@jwt_required()
+def get_instance_timeline(instance_id):
+    """Get an instance's status changes over a time range"""
+    error, query = history_query(instance_id)
+    if error:
+        return error
+    environment, host, instance, since, until = query
+    
+    timeline = status_history.timeline(environment, host.get("hostname"), instance.get("port"), since, until)
+    
+    return jsonify(**history_subject(host, instance, since, until), timeline=timeline or []), 200
+
 # Report routes
 @app.route('/api/reports', methods=['GET'])
 @jwt_required()
@@ -362,13 +688,88 @@ def get_reports():
 @app.route('/api/reports/<report_id>', methods=['GET'])
 @jwt_required()
 def get_report(report_id):
-    """Get a specific report"""
-    report = file_storage.get_report(report_id)
+    """
+    Get a specific report
+    
+    With any of the offset, limit, status (comma-separated instance
+    statuses), hostname (prefix) or failed_only query parameters, only that
+    page of matching hosts is read from storage and returned.
+    """
+    page_params = ('offset', 'limit', 'status', 'hostname', 'failed_only')
+    if not any(name in request.args for name in page_params):
+        report = file_storage.get_report(report_id)
+        
+        if not report:
+            return jsonify({"error": "Report not found"}), 404
+        
+        return jsonify(report=report), 200
+    
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', app.config['REPORT_PAGE_SIZE'], type=int)
+    if offset < 0 or limit < 0:
+        return jsonify({"error": "offset and limit must be non-negative integers"}), 400
+    
+    status = request.args.get('status')
+    try:
+        page = file_storage.get_report_page(
+            report_id, offset, limit,
+            statuses=[s.strip() for s in status.split(',') if s.strip()] if status else None,
+            hostname_prefix=request.args.get('hostname') or None,
+            failed_only=request.args.get('failed_only', 'false').lower() == 'true'
+        )
+    except (ValueError, OSError) as e:
+        logger.error(f"Error reading report {report_id}: {str(e)}")
+        return jsonify({"error": "Could not read report"}), 500
     
-    if not report:
+    if page is None:
         return jsonify({"error": "Report not found"}), 404
     
-    return jsonify(report=report), 200
+    metadata = page.pop("metadata")
+    return jsonify(report={"metadata": metadata, "results": page.pop("results")}, page=page), 200
+
+@app.route('/api/reports/<report_a>/diff/<report_b>', methods=['GET'])
+@jwt_required()
+def diff_reports(report_a, report_b):
+    """Get the instances whose status, datasources or WAR files changed from one report to another"""
+    results_a = file_storage.iter_report_results(report_a)
+    results_b = file_storage.iter_report_results(report_b)
+    if results_a is None or results_b is None:
+        return jsonify({"error": "Report not found"}), 404
+    
+    # Index the smaller report and stream the other (archived reports have no size and are read whole anyway)
+    try:
+        if (file_storage.report_size(report_a) or 0) <= (file_storage.report_size(report_b) or 0):
+            diff = diff_results(results_a, results_b, indexed_is_old=True)
+        else:
+            diff = diff_results(results_b, results_a, indexed_is_old=False)
+    except (ValueError, OSError) as e:
+        logger.error(f"Error comparing reports {report_a} and {report_b}: {str(e)}")
+        return jsonify({"error": "Could not read reports"}), 500
+    
+    return jsonify(**{"from": report_a, "to": report_b}, **diff), 200
+
+@app.cli.command('rebuild-report-index')
+def rebuild_report_index():
+    """Rebuild the report metadata index from the saved reports"""
+    count = file_storage.rebuild_report_index()
+    click.echo(f"Indexed {count} reports")
+
+@app.cli.command('migrate-reports')
+def migrate_reports():
+    """Convert reports saved by older versions to the compressed format"""
+    summary = file_storage.migrate_reports()
+    click.echo(f"Migrated {summary['migrated']} reports ({summary['failed']} failed): "
+               f"{summary['bytes_before']} -> {summary['bytes_after']} bytes")
+
+@app.cli.command('compact-reports')
+def compact_reports():
+    """Apply the report retention policies now"""
+    summary = file_storage.compact_reports()
+    if summary is None:
+        click.echo("Another report compaction is running", err=True)
+    else:
+        click.echo(f"Archived {summary['archived']} and dropped {summary['dropped']} reports, "
+                   f"wrote {summary['archives_written']} and removed {summary['archives_removed']} archives")
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
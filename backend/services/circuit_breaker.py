@@ -0,0 +1,147 @@
+# services/circuit_breaker.py
+import logging
+import threading
+import time
+from typing import Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Probe statuses that count as a failed probe
+FAILURE_STATUSES = ("offline", "error", "unreachable", "timeout")
+
+class CircuitBreaker:
+    """
+    Per-instance health state with exponential backoff.
+
+    Instances start "closed" and are probed every sweep. After
+    failure_threshold consecutive failures the circuit "opens": sweeps reuse
+    the last result instead of probing, until the backoff expires. Then the
+    circuit is "half-open" and one cheap trial probe decides whether it
+    closes again or reopens with a longer backoff.
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 30.0,
+                 max_backoff: float = 900.0):
+        """
+        Initialize the breaker
+
+        Args:
+            failure_threshold: Consecutive failures before the circuit opens
+            base_backoff: Seconds to wait before the first trial probe
+            max_backoff: Upper bound for the backoff
+        """
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.states: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def before_probe(self, host: str, port: int) -> str:
+        """
+        Decide how to probe an instance
+
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+
+        Returns:
+            "probe" for a full probe, "trial" for a cheap trial probe,
+            or "skip" to reuse the last result
+        """
+        with self.lock:
+            state = self.states.get((host, port))
+            if state is None or state["state"] == "closed":
+                return "probe"
+
+            now = time.monotonic()
+            if now < state["next_attempt_at"]:
+                return "skip"
+
+            # Hold off other sweeps while this trial runs
+            state["state"] = "half-open"
+            state["next_attempt_at"] = now + self._backoff(state["failures"])
+            return "trial"
+
+    def _backoff(self, failures: int) -> float:
+        exponent = max(0, failures - self.failure_threshold)
+        return min(self.max_backoff, self.base_backoff * (2 ** exponent))
+
+    def record(self, host: str, port: int, probe: Dict[str, Any]) -> None:
+        """
+        Record the outcome of a probe
+
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            probe: Probe result with at least a "status"
+        """
+        key = (host, port)
+        failed = probe.get("status") in FAILURE_STATUSES
+
+        with self.lock:
+            state = self.states.setdefault(key, {
+                "state": "closed",
+                "failures": 0,
+                "next_attempt_at": 0.0,
+                "last_probe": None
+            })
+            state["last_probe"] = probe
+
+            if not failed:
+                if state["state"] != "closed":
+                    logger.info(f"Circuit closed for {host}:{port}")
+                state["state"] = "closed"
+                state["failures"] = 0
+                return
+
+            state["failures"] += 1
+            if state["failures"] >= self.failure_threshold:
+                backoff = self._backoff(state["failures"])
+                if state["state"] == "closed":
+                    logger.warning(f"Circuit opened for {host}:{port} after {state['failures']} failures")
+                state["state"] = "open"
+                state["next_attempt_at"] = time.monotonic() + backoff
+
+    def cached_probe(self, host: str, port: int) -> Dict[str, Any]:
+        """
+        Get the last probe result for an instance whose probe is skipped
+
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+
+        Returns:
+            Probe result dictionary
+        """
+        with self.lock:
+            state = self.states.get((host, port), {})
+            last_probe = dict(state.get("last_probe") or {"status": "offline", "message": ""})
+
+        last_probe["message"] = f"Probe skipped while circuit is open (last: {last_probe.get('message', '')})"
+        return last_probe
+
+    def describe(self, host: str, port: int) -> Dict[str, Any]:
+        """
+        Describe an instance's breaker state for the status output
+
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+
+        Returns:
+            Dictionary with state, failures and nextProbeInSeconds
+        """
+        with self.lock:
+            state = self.states.get((host, port))
+            if state is None:
+                return {"state": "closed", "failures": 0, "nextProbeInSeconds": 0}
+
+            next_probe = 0.0
+            if state["state"] != "closed":
+                next_probe = max(0.0, state["next_attempt_at"] - time.monotonic())
+
+            return {
+                "state": state["state"],
+                "failures": state["failures"],
+                "nextProbeInSeconds": round(next_probe, 1)
+            }
@@ -0,0 +1,607 @@
+# services/cli_session_pool.py
+import subprocess
+import json
+import re
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Output fragments that mean the CLI process lost (or never had) its controller
+# connection. A session printing one of these is restarted and the command retried.
+DISCONNECTED_MARKERS = (
+    "Failed to connect to the controller",
+    "The controller is not available",
+    "not connected to the controller",
+)
+
+# Prefix of the message returned when a command hits its hard timeout
+TIMEOUT_MESSAGE_PREFIX = "No response from "
+
+
+def timeout_message(host: str, port: int, timeout: float) -> str:
+    """Build the message returned when a command hits its hard timeout"""
+    return f"{TIMEOUT_MESSAGE_PREFIX}{host}:{port} after {timeout}s"
+
+
+# Scalars in CLI (DMR) output: strings, numbers (longs end in "L"), and bare words
+DMR_TOKEN = re.compile(r'\s*(?:"((?:[^"\\]|\\.)*)"|(-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)L?|([A-Za-z_][\w-]*))')
+DMR_LITERALS = {"true": True, "false": False, "undefined": None}
+
+
+def parse_dmr(text: str) -> Any:
+    """
+    Parse a value printed by jboss-cli.sh in DMR syntax
+    
+    Objects ({"key" => value}) become dicts, properties (("key" => value))
+    single-entry dicts and lists lists, as in the management API's JSON.
+    
+    Args:
+        text: CLI output, e.g. {"outcome" => "success", "result" => "running"}
+    
+    Returns:
+        The parsed value
+    
+    Raises:
+        ValueError: If the text is not a DMR value
+    """
+    position = 0
+    
+    def skip():
+        nonlocal position
+        while position < len(text) and text[position] in " \t\r\n":
+            position += 1
+    
+    def expect(token):
+        nonlocal position
+        skip()
+        if not text.startswith(token, position):
+            raise ValueError(f"Expected '{token}' at position {position} of CLI output")
+        position += len(token)
+    
+    def entries(close):
+        # "key" => value pairs up to the closing bracket
+        nonlocal position
+        result = {}
+        skip()
+        while not text.startswith(close, position):
+            key = value()
+            expect("=>")
+            result[key] = value()
+            skip()
+            if text.startswith(",", position):
+                position += 1
+                skip()
+        position += 1
+        return result
+    
+    def value():
+        nonlocal position
+        skip()
+        if position >= len(text):
+            raise ValueError("Unexpected end of CLI output")
+        char = text[position]
+        if char == "{":
+            position += 1
+            return entries("}")
+        if char == "(":
+            position += 1
+            return entries(")")
+        if char == "[":
+            position += 1
+            items = []
+            skip()
+            while not text.startswith("]", position):
+                items.append(value())
+                skip()
+                if text.startswith(",", position):
+                    position += 1
+                    skip()
+            position += 1
+            return items
+        
+        match = DMR_TOKEN.match(text, position)
+        if not match:
+            raise ValueError(f"Unexpected character at position {position} of CLI output")
+        position = match.end()
+        string, number, word = match.groups()
+        if string is not None:
+            return re.sub(r"\\(.)", r"\1", string)
+        if number is not None:
+            return float(number) if any(c in number for c in ".eE") else int(number)
+        if word in DMR_LITERALS:
+            return DMR_LITERALS[word]
+        if word in ("big", "expression", "bytes"):
+            # "big decimal 1.5", "big integer 2", 'expression "${x}"', "bytes {0x01, ...}"
+            if word == "big":
+                match = DMR_TOKEN.match(text, position)
+                position = match.end() if match else position
+            if word == "bytes":
+                expect("{")
+                end = text.index("}", position)
+                data = [int(byte, 16) for byte in text[position:end].replace(",", " ").split()]
+                position = end + 1
+                return data
+            return value()
+        # Type names (STRING, LONG, ...) in resource descriptions
+        return word
+    
+    result = value()
+    skip()
+    if position != len(text):
+        raise ValueError(f"Unexpected text at position {position} of CLI output")
+    return result
+
+
+def parse_cli_output(output: str) -> Any:
+    """Parse CLI output as JSON (--output-json) or DMR, or return it as a string if it is neither"""
+    try:
+        return json.loads(output)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return parse_dmr(output)
+    except ValueError:
+        return output.strip()
+
+
+class CLISession:
+    """
+    A long-lived jboss-cli.sh process connected to a single controller.
+    Commands are written to stdin and the output is read back up to an
+    echoed end marker, so the JVM boot, connection and authentication
+    are only paid once per session.
+    """
+
+    def __init__(self, cli_path: str, host: str, port: int,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 command_timeout: float = 30.0):
+        """
+        Initialize the session (the process is started by start())
+
+        Args:
+            cli_path: Path to jboss-cli.sh
+            host: The hostname or IP address
+            port: The management port number
+            username: Optional username for authentication
+            password: Optional password for authentication
+            command_timeout: Seconds to wait for a command's output
+        """
+        self.cli_path = cli_path
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.command_timeout = command_timeout
+
+        self.process = None
+        self.output = None
+        self.busy = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.last_checked = self.created_at
+
+    def start(self) -> Tuple[bool, Any]:
+        """
+        Start the CLI process and wait until it is connected
+
+        Returns:
+            Tuple containing success status and an error message on failure
+        """
+        cli_command = [
+            self.cli_path,
+            "-c",  # Connect mode
+            f"--controller={self.host}:{self.port}"
+        ]
+
+        if self.username and self.password:
+            cli_command.extend([
+                f"--user={self.username}",
+                f"--password={self.password}"
+            ])
+
+        logger.info(f"Starting CLI session for {self.host}:{self.port}")
+
+        try:
+            self.process = subprocess.Popen(
+                cli_command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+                bufsize=1
+            )
+        except Exception as e:
+            logger.exception(f"Exception starting CLI session: {str(e)}")
+            self.process = None
+            return False, str(e)
+
+        # Drain stdout on a background thread so reads can time out
+        self.output = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_output,
+            args=(self.process.stdout, self.output),
+            name=f"cli-session-{self.host}:{self.port}",
+            daemon=True
+        )
+        reader.start()
+
+        # Round trip an echo to find out whether the connection came up
+        try:
+            output = self._round_trip(None)
+        except Exception as e:
+            self.close()
+            return False, str(e)
+
+        if any(marker in output for marker in DISCONNECTED_MARKERS):
+            self.close()
+            return False, output
+
+        self.last_used = self.last_checked = time.monotonic()
+        return True, None
+
+    @staticmethod
+    def _read_output(stream, output: "queue.Queue") -> None:
+        """Push each line of CLI output onto the queue, then None at EOF"""
+        try:
+            for line in iter(stream.readline, ""):
+                output.put(line.rstrip("\n"))
+        except Exception:
+            pass
+        finally:
+            output.put(None)
+
+    def _round_trip(self, command: Optional[str], timeout: Optional[float] = None) -> str:
+        """
+        Send a command followed by an end marker and collect its output
+        
+        Args:
+            command: The CLI command to send, or None to only echo the marker
+            timeout: Seconds to wait for the marker instead of command_timeout
+
+        Returns:
+            The command output
+
+        Raises:
+            ConnectionError: If the process exits before the marker is seen
+            TimeoutError: If the marker is not seen in time
+        """
+        timeout = timeout or self.command_timeout
+        marker = f"__cli_session_end_{uuid.uuid4().hex}__"
+        payload = f"echo {marker}\n"
+        if command is not None:
+            payload = f"{command}\n{payload}"
+
+        self.process.stdin.write(payload)
+        self.process.stdin.flush()
+
+        lines = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(timeout_message(self.host, self.port, timeout))
+            try:
+                line = self.output.get(timeout=remaining)
+            except queue.Empty:
+                continue
+
+            if line is None:
+                raise ConnectionError(f"CLI session for {self.host}:{self.port} exited")
+            if line.strip() == marker:
+                return "\n".join(lines).strip()
+            lines.append(line)
+
+    def execute(self, command: str, timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a command on this session
+        
+        Args:
+            command: The CLI command to execute
+            timeout: Seconds to wait for the output instead of command_timeout
+
+        Returns:
+            Tuple containing success status and command result
+
+        Raises:
+            ConnectionError: If the session is no longer connected
+        """
+        try:
+            output = self._round_trip(command, timeout)
+        except TimeoutError as e:
+            # The process state is unknown now, so it cannot be reused
+            logger.error(str(e))
+            self.close()
+            return False, str(e)
+        except (BrokenPipeError, OSError) as e:
+            raise ConnectionError(str(e))
+        finally:
+            self.last_used = time.monotonic()
+
+        if any(marker in output for marker in DISCONNECTED_MARKERS):
+            raise ConnectionError(output)
+
+        # JSON or DMR becomes a dict; anything else stays a string
+        result = parse_cli_output(output)
+        if isinstance(result, dict) and result.get("outcome") == "failed":
+            return False, result
+        if isinstance(result, str) and '"outcome" => "failed"' in result:
+            return False, result
+        return True, result
+
+    def is_alive(self) -> bool:
+        """Check whether the CLI process is still running"""
+        return self.process is not None and self.process.poll() is None
+
+    def health_check(self) -> bool:
+        """
+        Verify the session still talks to its controller
+
+        Returns:
+            True if the session answered a lightweight command
+        """
+        if not self.is_alive():
+            return False
+
+        try:
+            success, _ = self.execute(":read-attribute(name=server-state)")
+        except ConnectionError:
+            return False
+
+        self.last_checked = time.monotonic()
+        return success and self.is_alive()
+
+    def close(self) -> None:
+        """Stop the CLI process"""
+        if self.process is None:
+            return
+
+        process, self.process = self.process, None
+        try:
+            if process.poll() is None:
+                process.stdin.write("quit\n")
+                process.stdin.flush()
+                process.wait(timeout=2)
+        except Exception:
+            pass
+
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+        logger.info(f"Closed CLI session for {self.host}:{self.port}")
+
+
+class CLISessionPool:
+    """
+    Pool of long-lived CLI sessions keyed by controller (host, port, user).
+    Idle sessions are evicted, the total number of processes is capped and
+    broken sessions are reconnected transparently.
+    """
+
+    def __init__(self, cli_path: str, max_size: int = 50,
+                 idle_timeout: float = 300.0,
+                 health_check_interval: float = 60.0,
+                 command_timeout: float = 30.0,
+                 max_per_controller: int = 1):
+        """
+        Initialize the pool
+
+        Args:
+            cli_path: Path to jboss-cli.sh
+            max_size: Maximum number of CLI processes across all controllers
+            idle_timeout: Seconds a session may stay unused before it is closed
+            health_check_interval: Seconds of inactivity after which a session
+                is checked before being reused
+            command_timeout: Seconds to wait for a command's output
+            max_per_controller: Maximum number of sessions per controller
+        """
+        self.cli_path = cli_path
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.command_timeout = command_timeout
+        self.max_per_controller = max_per_controller
+
+        self.sessions: Dict[Tuple[str, int, Optional[str]], List[CLISession]] = {}
+        self.condition = threading.Condition()
+        self.reaper = None
+        self.closed = False
+
+    def _total_sessions(self) -> int:
+        return sum(len(sessions) for sessions in self.sessions.values())
+
+    def _remove(self, key: Tuple[str, int, Optional[str]], session: CLISession) -> None:
+        """Drop a session from the pool (caller holds the condition)"""
+        sessions = self.sessions.get(key, [])
+        if session in sessions:
+            sessions.remove(session)
+        if not sessions:
+            self.sessions.pop(key, None)
+
+    def _pop_lru_idle(self) -> Optional[CLISession]:
+        """
+        Remove the least recently used idle session from the pool (caller holds
+        the condition); the caller closes it once the condition is released
+        """
+        idle = [
+            (session.last_used, key, session)
+            for key, sessions in self.sessions.items()
+            for session in sessions
+            if not session.busy
+        ]
+        if not idle:
+            return None
+
+        _, key, session = min(idle, key=lambda item: item[0])
+        self._remove(key, session)
+        return session
+
+    def _start_reaper(self) -> None:
+        """Start the idle eviction thread on first use"""
+        if self.reaper is not None:
+            return
+
+        self.reaper = threading.Thread(target=self._reap, name="cli-session-reaper", daemon=True)
+        self.reaper.start()
+
+    def _reap(self) -> None:
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self.closed:
+            time.sleep(interval)
+            self.evict_idle()
+
+    def evict_idle(self) -> int:
+        """
+        Close sessions that have been idle longer than idle_timeout
+
+        Returns:
+            Number of sessions closed
+        """
+        now = time.monotonic()
+        expired = []
+
+        with self.condition:
+            for key, sessions in list(self.sessions.items()):
+                for session in list(sessions):
+                    if not session.busy and now - session.last_used > self.idle_timeout:
+                        self._remove(key, session)
+                        expired.append(session)
+
+        for session in expired:
+            session.close()
+
+        if expired:
+            logger.info(f"Evicted {len(expired)} idle CLI sessions")
+        return len(expired)
+
+    def _acquire(self, host: str, port: int, username: Optional[str],
+                 password: Optional[str]) -> Optional[CLISession]:
+        """
+        Check out a session for a controller, creating one if allowed
+
+        Returns:
+            A session marked busy, or None if the pool is exhausted
+        """
+        key = (host, port, username)
+        evicted = None
+
+        try:
+            with self.condition:
+                while True:
+                    sessions = self.sessions.get(key, [])
+
+                    for session in sessions:
+                        if not session.busy:
+                            session.busy = True
+                            return session
+
+                    if len(sessions) < self.max_per_controller:
+                        if self._total_sessions() >= self.max_size:
+                            evicted = self._pop_lru_idle()
+                        if self._total_sessions() < self.max_size:
+                            session = CLISession(
+                                self.cli_path, host, port, username, password,
+                                command_timeout=self.command_timeout
+                            )
+                            session.busy = True
+                            self.sessions.setdefault(key, []).append(session)
+                            self._start_reaper()
+                            return session
+
+                        if not sessions:
+                            # Every slot is held by another controller's running command
+                            return None
+
+                    # Wait for this controller's session to be released
+                    self.condition.wait()
+        finally:
+            # Closing waits for the JVM to exit, so it happens outside the condition
+            if evicted is not None:
+                evicted.close()
+
+    def _release(self, session: CLISession) -> None:
+        """Return a session to the pool, dropping it if it is dead"""
+        with self.condition:
+            session.busy = False
+            if not session.is_alive():
+                self._remove((session.host, session.port, session.username), session)
+            self.condition.notify_all()
+
+    def _ensure_ready(self, session: CLISession) -> Tuple[bool, Any]:
+        """Start a new session or health check a session that sat idle"""
+        if not session.is_alive():
+            return session.start()
+
+        if time.monotonic() - session.last_checked > self.health_check_interval:
+            if not session.health_check():
+                logger.warning(f"CLI session for {session.host}:{session.port} failed health check, reconnecting")
+                session.close()
+                return session.start()
+
+        return True, None
+
+    def execute(self, host: str, port: int, command: str,
+                username: Optional[str] = None,
+                password: Optional[str] = None,
+                timeout: Optional[float] = None) -> Optional[Tuple[bool, Any]]:
+        """
+        Execute a command on the controller's pooled session
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI command to execute
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Seconds to wait for the output once the command is sent,
+                instead of command_timeout
+
+        Returns:
+            Tuple containing success status and command result, or None if
+            no session could be made available
+        """
+        if self.closed:
+            return None
+
+        session = self._acquire(host, port, username, password)
+        if session is None:
+            return None
+
+        try:
+            success, error = self._ensure_ready(session)
+            if not success:
+                return False, error
+
+            try:
+                return session.execute(command, timeout)
+            except ConnectionError as e:
+                # Transparent reconnect, then one retry
+                logger.warning(f"CLI session for {host}:{port} disconnected ({str(e)}), reconnecting")
+                session.close()
+                success, error = session.start()
+                if not success:
+                    return False, error
+                try:
+                    return session.execute(command, timeout)
+                except ConnectionError as e:
+                    session.close()
+                    return False, str(e)
+        finally:
+            self._release(session)
+
+    def close_all(self) -> None:
+        """Close every session in the pool"""
+        with self.condition:
+            self.closed = True
+            sessions = [session for group in self.sessions.values() for session in group]
+            self.sessions = {}
+            self.condition.notify_all()
+
+        for session in sessions:
+            session.close()
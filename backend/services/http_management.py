@@ -0,0 +1,489 @@
+# services/http_management.py
+import asyncio
+import http.client
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import threading
+from typing import Dict, List, Any, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Matches key=value pairs in a WWW-Authenticate: Digest header
+_CHALLENGE_PARAM = re.compile(r'(\w+)=(?:"([^"]*)"|([^,\s]*))')
+
+
+def parse_cli_operation(command: str) -> Dict[str, Any]:
+    """
+    Convert a CLI operation string into a DMR operation for the HTTP API
+
+    Handles the forms used by the monitoring checks, e.g.
+    ":read-attribute(name=server-state)" or
+    "/subsystem=datasources/data-source=MainDS:test-connection-in-pool".
+
+    Args:
+        command: The CLI command
+
+    Returns:
+        DMR operation dictionary
+
+    Raises:
+        ValueError: If the command is not a CLI operation
+    """
+    command = command.strip()
+    if ":" not in command:
+        raise ValueError(f"Not a CLI operation: {command}")
+
+    path, _, operation = command.partition(":")
+
+    address = []
+    for segment in path.strip("/").split("/"):
+        if not segment:
+            continue
+        key, _, value = segment.partition("=")
+        address.append({key: value})
+
+    params = {}
+    if "(" in operation:
+        operation, _, arguments = operation.partition("(")
+        arguments = arguments.rstrip(")")
+        for argument in arguments.split(","):
+            if not argument.strip():
+                continue
+            name, _, value = argument.partition("=")
+            value = value.strip()
+            if value.lower() in ("true", "false"):
+                value = value.lower() == "true"
+            params[name.strip()] = value
+
+    dmr_operation = {"operation": operation.strip(), "address": address}
+    dmr_operation.update(params)
+    return dmr_operation
+
+
+class _ControllerState:
+    """Keep-alive connections and cached digest challenge for one controller"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.idle_connections: List[http.client.HTTPConnection] = []
+        # (event loop, reader, writer) for the async engine; streams only work on their own loop
+        self.idle_streams: List[Tuple[Any, asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.challenge: Optional[Dict[str, str]] = None
+        self.nonce_count = 0
+        self.lock = threading.Lock()
+
+
+class HTTPManagementClient:
+    """
+    Client for the JBoss/WildFly HTTP management API (/management).
+    Sends the same DMR operations as the CLI as JSON, reuses keep-alive
+    connections per controller and caches the digest challenge so most
+    requests authenticate without an extra 401 round trip.
+    """
+
+    def __init__(self, timeout: float = 10.0, max_idle_per_controller: int = 4):
+        """
+        Initialize the client
+
+        Args:
+            timeout: Socket timeout in seconds for connect and read
+            max_idle_per_controller: Keep-alive connections kept per controller
+        """
+        self.timeout = timeout
+        self.max_idle_per_controller = max_idle_per_controller
+        self.controllers: Dict[Tuple[str, int], _ControllerState] = {}
+        self.lock = threading.Lock()
+
+    def _controller(self, host: str, port: int) -> _ControllerState:
+        with self.lock:
+            key = (host, port)
+            if key not in self.controllers:
+                self.controllers[key] = _ControllerState(host, port)
+            return self.controllers[key]
+
+    def _checkout(self, state: _ControllerState) -> http.client.HTTPConnection:
+        with state.lock:
+            if state.idle_connections:
+                return state.idle_connections.pop()
+        return http.client.HTTPConnection(state.host, state.port, timeout=self.timeout)
+
+    def _checkin(self, state: _ControllerState, connection: http.client.HTTPConnection) -> None:
+        with state.lock:
+            if len(state.idle_connections) < self.max_idle_per_controller:
+                state.idle_connections.append(connection)
+                return
+        connection.close()
+
+    def _authorization(self, state: _ControllerState, username: str, password: str, uri: str) -> Optional[str]:
+        """Build a Digest Authorization header from the cached challenge"""
+        with state.lock:
+            challenge = state.challenge
+            if not challenge:
+                return None
+            state.nonce_count += 1
+            nonce_count = f"{state.nonce_count:08x}"
+
+        algorithm = challenge.get("algorithm", "MD5")
+        hash_name = "sha256" if algorithm.upper().startswith("SHA-256") else "md5"
+
+        def digest(value: str) -> str:
+            return hashlib.new(hash_name, value.encode("utf-8")).hexdigest()
+
+        realm = challenge.get("realm", "")
+        nonce = challenge.get("nonce", "")
+        cnonce = os.urandom(8).hex()
+
+        ha1 = digest(f"{username}:{realm}:{password}")
+        ha2 = digest(f"POST:{uri}")
+
+        parts = [
+            f'username="{username}"',
+            f'realm="{realm}"',
+            f'nonce="{nonce}"',
+            f'uri="{uri}"',
+            f'algorithm={algorithm}'
+        ]
+
+        if "auth" in challenge.get("qop", "").split(","):
+            response = digest(f"{ha1}:{nonce}:{nonce_count}:{cnonce}:auth:{ha2}")
+            parts.extend(["qop=auth", f"nc={nonce_count}", f'cnonce="{cnonce}"'])
+        else:
+            response = digest(f"{ha1}:{nonce}:{ha2}")
+
+        parts.append(f'response="{response}"')
+        if "opaque" in challenge:
+            parts.append(f'opaque="{challenge["opaque"]}"')
+
+        return "Digest " + ", ".join(parts)
+
+    @staticmethod
+    def _parse_challenge(header: str) -> Optional[Dict[str, str]]:
+        if not header or not header.lower().startswith("digest"):
+            return None
+        return {
+            match.group(1).lower(): match.group(2) if match.group(2) is not None else match.group(3)
+            for match in _CHALLENGE_PARAM.finditer(header[len("digest"):])
+        }
+
+    def _post(self, state: _ControllerState, body: bytes, authorization: Optional[str],
+              timeout: Optional[float] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """POST to /management on a pooled connection, retrying once on a stale keep-alive"""
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if authorization:
+            headers["Authorization"] = authorization
+
+        for attempt in range(2):
+            connection = self._checkout(state)
+            # Pooled connections keep the timeout they were last used with
+            connection.timeout = timeout or self.timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(connection.timeout)
+            try:
+                connection.request("POST", "/management", body=body, headers=headers)
+                response = connection.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                connection.close()
+                if attempt == 0:
+                    # Server closed an idle keep-alive connection; try a fresh one
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(state, connection)
+            return response.status, {k.lower(): v for k, v in response.getheaders()}, payload
+
+    async def _checkout_async(self, state: _ControllerState,
+                              timeout: float) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        loop = asyncio.get_running_loop()
+        with state.lock:
+            while state.idle_streams:
+                idle_loop, reader, writer = state.idle_streams.pop()
+                # Streams left from an earlier sweep's loop cannot be used (or closed) here
+                if idle_loop is loop and not writer.is_closing() and not reader.at_eof():
+                    return reader, writer, True
+
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(state.host, state.port), timeout)
+        return reader, writer, False
+
+    def _checkin_async(self, state: _ControllerState, reader: asyncio.StreamReader,
+                       writer: asyncio.StreamWriter) -> None:
+        with state.lock:
+            if len(state.idle_streams) < self.max_idle_per_controller:
+                state.idle_streams.append((asyncio.get_running_loop(), reader, writer))
+                return
+        writer.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str], bytes, bool]:
+        """Read one HTTP/1.x response; returns status, headers, body and whether the server closes"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Remote end closed connection without response")
+        version, status = status_line.decode("latin-1").split(None, 2)[:2]
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        framed = True
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip(), 16)
+                if size == 0:
+                    # Skip any trailers up to the blank line
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            payload = b"".join(chunks)
+        elif "content-length" in headers:
+            payload = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # No framing: the body runs to the end of the connection
+            payload = await reader.read()
+            framed = False
+
+        connection = headers.get("connection", "").lower()
+        will_close = not framed or connection == "close" or (version == "HTTP/1.0" and connection != "keep-alive")
+        return int(status), headers, payload, will_close
+
+    async def _post_async(self, state: _ControllerState, body: bytes, authorization: Optional[str],
+                          timeout: Optional[float] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Non-blocking _post for the async engine, on keep-alive streams pooled per event loop"""
+        timeout = timeout or self.timeout
+        lines = [
+            "POST /management HTTP/1.1",
+            f"Host: {state.host}:{state.port}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Connection: keep-alive"
+        ]
+        if authorization:
+            lines.append(f"Authorization: {authorization}")
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+        async def exchange(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+            writer.write(request)
+            await writer.drain()
+            return await self._read_response(reader)
+
+        for attempt in range(2):
+            try:
+                reader, writer, reused = await self._checkout_async(state, timeout)
+            except asyncio.TimeoutError:
+                raise socket.timeout("timed out") from None
+
+            try:
+                status, headers, payload, will_close = await asyncio.wait_for(exchange(reader, writer), timeout)
+            except asyncio.TimeoutError:
+                writer.close()
+                raise socket.timeout("timed out") from None
+            except (BrokenPipeError, ConnectionResetError, asyncio.IncompleteReadError) as e:
+                writer.close()
+                if attempt == 0 and reused:
+                    # Server closed an idle keep-alive connection; try a fresh one
+                    continue
+                if isinstance(e, asyncio.IncompleteReadError):
+                    raise ConnectionResetError("Connection closed mid-response") from e
+                raise
+            except Exception:
+                writer.close()
+                raise
+
+            if will_close:
+                writer.close()
+            else:
+                self._checkin_async(state, reader, writer)
+            return status, headers, payload
+
+    def _accept_challenge(self, state: _ControllerState, authorization: Optional[str],
+                          headers: Dict[str, str]) -> bool:
+        """Cache the challenge from a 401 and say whether the request is worth sending again"""
+        challenge = self._parse_challenge(headers.get("www-authenticate", ""))
+        if challenge is None:
+            return False
+
+        with state.lock:
+            retry = authorization is None or challenge.get("stale", "").lower() == "true" \
+                or challenge.get("nonce") != (state.challenge or {}).get("nonce")
+            state.challenge = challenge
+            state.nonce_count = 0
+        return retry
+
+    @staticmethod
+    def _decode_result(host: str, port: int, status: int, payload: bytes) -> Tuple[bool, Any]:
+        if status == 401:
+            return False, f"Authentication failed for {host}:{port}"
+
+        try:
+            result = json.loads(payload.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            result = payload.decode("utf-8", "replace").strip()
+
+        if status == 200 and (not isinstance(result, dict) or result.get("outcome") != "failed"):
+            return True, result
+
+        return False, result
+
+    def execute_operation(self, host: str, port: int, operation: Dict[str, Any],
+                          username: Optional[str] = None,
+                          password: Optional[str] = None,
+                          timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a DMR operation over HTTP
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            operation: DMR operation dictionary
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional socket timeout instead of the client's
+
+        Returns:
+            Tuple containing success status and parsed DMR response
+
+        Raises:
+            OSError: If the management endpoint cannot be reached
+        """
+        state = self._controller(host, port)
+        body = json.dumps(operation).encode("utf-8")
+
+        status, headers, payload = 401, {}, b""
+        # At most: cached challenge, fresh challenge, stale nonce
+        for _ in range(3):
+            authorization = None
+            if username and password:
+                authorization = self._authorization(state, username, password, "/management")
+
+            status, headers, payload = self._post(state, body, authorization, timeout)
+            if status != 401 or not (username and password):
+                break
+            if not self._accept_challenge(state, authorization, headers):
+                break
+
+        return self._decode_result(host, port, status, payload)
+
+    async def execute_operation_async(self, host: str, port: int, operation: Dict[str, Any],
+                                      username: Optional[str] = None,
+                                      password: Optional[str] = None,
+                                      timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a DMR operation over HTTP without blocking the event loop
+
+        Same as execute_operation, but on asyncio streams so the async
+        engine's probes wait on sockets rather than on worker threads.
+
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            operation: DMR operation dictionary
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional timeout for connect and for each request
+
+        Returns:
+            Tuple containing success status and parsed DMR response
+
+        Raises:
+            OSError: If the management endpoint cannot be reached
+        """
+        state = self._controller(host, port)
+        body = json.dumps(operation).encode("utf-8")
+
+        status, headers, payload = 401, {}, b""
+        for _ in range(3):
+            authorization = None
+            if username and password:
+                authorization = self._authorization(state, username, password, "/management")
+
+            status, headers, payload = await self._post_async(state, body, authorization, timeout)
+            if status != 401 or not (username and password):
+                break
+            if not self._accept_challenge(state, authorization, headers):
+                break
+
+        return self._decode_result(host, port, status, payload)
+
+    def execute_command(self, host: str, port: int, command: str,
+                        username: Optional[str] = None,
+                        password: Optional[str] = None,
+                        timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a CLI-style operation string over HTTP
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI operation, e.g. ":read-attribute(name=server-state)"
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional socket timeout instead of the client's
+
+        Returns:
+            Tuple containing success status and parsed DMR response
+
+        Raises:
+            ValueError: If the command cannot be expressed as a DMR operation
+            OSError: If the management endpoint cannot be reached
+        """
+        return self.execute_operation(host, port, parse_cli_operation(command), username, password, timeout)
+
+    async def execute_command_async(self, host: str, port: int, command: str,
+                                    username: Optional[str] = None,
+                                    password: Optional[str] = None,
+                                    timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Async version of execute_command
+
+        Raises:
+            ValueError: If the command cannot be expressed as a DMR operation
+            OSError: If the management endpoint cannot be reached
+        """
+        return await self.execute_operation_async(
+            host, port, parse_cli_operation(command), username, password, timeout
+        )
+
+    def close_all(self) -> None:
+        """Close every pooled connection"""
+        with self.lock:
+            controllers = list(self.controllers.values())
+
+        for state in controllers:
+            with state.lock:
+                connections, state.idle_connections = state.idle_connections, []
+            for connection in connections:
+                connection.close()
+
+    async def close_idle_async(self) -> None:
+        """Close the idle streams opened on the running event loop before it goes away"""
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            controllers = list(self.controllers.values())
+
+        writers = []
+        for state in controllers:
+            with state.lock:
+                writers.extend(writer for idle_loop, _, writer in state.idle_streams if idle_loop is loop)
+                state.idle_streams = [idle for idle in state.idle_streams if idle[0] is not loop]
+
+        for writer in writers:
+            writer.close()
+        await asyncio.gather(*[writer.wait_closed() for writer in writers], return_exceptions=True)
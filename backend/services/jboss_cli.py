@@ -4,11 +4,34 @@ import json
 import logging
 import os
 import random
+import atexit
+import asyncio
+import socket
+import signal
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Any, Tuple, Optional
 from datetime import datetime
+from services.cli_session_pool import CLISessionPool, TIMEOUT_MESSAGE_PREFIX, timeout_message, parse_cli_output
+from services.http_management import HTTPManagementClient, parse_cli_operation
 
 logger = logging.getLogger(__name__)
 
+# Operations used by the instance probes
+SERVER_STATE_COMMAND = ":read-attribute(name=server-state)"
+DATASOURCES_COMMAND = "/subsystem=datasources:read-resource(recursive=true)"
+DEPLOYMENTS_COMMAND = "/deployment=*:read-resource(include-runtime=true)"
+
+# Stands in for the result of a datasource test that exceeded its timeout
+TEST_TIMED_OUT = object()
+
+
+def kill_process_group(process) -> None:
+    """Kill a CLI process started in its own session along with the JVM it launched"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        process.kill()
+
 class JBossCLIService:
     """Service to execute JBoss CLI commands and parse results"""
     
@@ -16,20 +39,87 @@ class JBossCLIService:
         # Default CLI path - update this with the actual path for your environment
         self.cli_path = os.environ.get("JBOSS_CLI_PATH", "/app/jboss/bin/jboss-cli.sh")
         
-        # Check if CLI exists
-        self.mock_mode = not os.path.isfile(self.cli_path)
+        # Transport per environment: "cli" (jboss-cli.sh) or "http" (management API)
+        default_transport = os.environ.get("JBOSS_TRANSPORT", "cli").lower()
+        self.transports = {
+            "production": os.environ.get("JBOSS_TRANSPORT_PRODUCTION", default_transport).lower(),
+            "non-production": os.environ.get("JBOSS_TRANSPORT_NONPRODUCTION", default_transport).lower()
+        }
+        self.default_transport = default_transport
+        
+        # Check if CLI exists; mock mode only when no environment can be probed over HTTP
+        self.cli_available = os.path.isfile(self.cli_path)
+        self.mock_mode = not self.cli_available and "http" not in self.transports.values()
         if self.mock_mode:
             logger.warning(f"JBoss CLI not found at {self.cli_path}, running in mock mode!")
-        else:
+        elif self.cli_available:
             logger.info(f"Using JBoss CLI at: {self.cli_path}")
+        else:
+            logger.warning(f"JBoss CLI not found at {self.cli_path}, only the HTTP transport is available")
             
         # Default credentials (can be overridden during API calls)
         self.default_username = os.environ.get("JBOSS_USERNAME")
         self.default_password = os.environ.get("JBOSS_PASSWORD")
+        
+        # Seconds to wait for a single CLI command; the process is killed after that
+        self.command_timeout = float(os.environ.get("JBOSS_CLI_COMMAND_TIMEOUT", "30"))
+        
+        # Cheap TCP connect to the management port before any probe is started
+        self.reachability_check = os.environ.get("JBOSS_REACHABILITY_CHECK", "true").lower() == "true"
+        self.connect_timeout = float(os.environ.get("JBOSS_CONNECT_TIMEOUT", "2"))
+        
+        # Datasource connection tests run in parallel, bounded per instance
+        self.datasource_test_concurrency = int(os.environ.get("JBOSS_DATASOURCE_TEST_CONCURRENCY", "4"))
+        self.datasource_test_timeout = float(os.environ.get("JBOSS_DATASOURCE_TEST_TIMEOUT", "10"))
+        self.datasource_executor = ThreadPoolExecutor(
+            max_workers=int(os.environ.get("JBOSS_DATASOURCE_TEST_WORKERS", "32")),
+            thread_name_prefix="datasource-test"
+        )
+        
+        # Pool of long-lived CLI sessions per controller, by default as many as
+        # an instance's datasource tests run at once so they do not queue
+        self.session_pool = None
+        if self.cli_available and os.environ.get("JBOSS_CLI_SESSION_POOL", "true").lower() == "true":
+            self.session_pool = CLISessionPool(
+                self.cli_path,
+                max_size=int(os.environ.get("JBOSS_CLI_POOL_MAX_SIZE", "50")),
+                idle_timeout=float(os.environ.get("JBOSS_CLI_POOL_IDLE_TIMEOUT", "300")),
+                health_check_interval=float(os.environ.get("JBOSS_CLI_POOL_HEALTH_CHECK_INTERVAL", "60")),
+                command_timeout=self.command_timeout,
+                max_per_controller=int(os.environ.get("JBOSS_CLI_POOL_SESSIONS_PER_CONTROLLER",
+                                                      str(self.datasource_test_concurrency)))
+            )
+            atexit.register(self.session_pool.close_all)
+        
+        # Keep-alive HTTP management client with per-controller digest state
+        self.http_client = HTTPManagementClient(
+            timeout=float(os.environ.get("JBOSS_HTTP_TIMEOUT", "10"))
+        )
+        atexit.register(self.http_client.close_all)
+
+        # Batch each instance probe's reads into one composite operation
+        self.composite_probes = os.environ.get("JBOSS_COMPOSITE_PROBES", "true").lower() == "true"
+    
+    def get_transport(self, environment: Optional[str] = None) -> str:
+        """
+        Get the transport configured for an environment
+        
+        Args:
+            environment: "production" or "non-production", or None for the default
+            
+        Returns:
+            "cli" or "http"
+        """
+        if environment is None:
+            return self.default_transport
+        key = "production" if environment.lower() == "production" else "non-production"
+        return self.transports[key]
     
     def execute_command(self, host: str, port: int, command: str, 
                         username: Optional[str] = None, 
-                        password: Optional[str] = None) -> Tuple[bool, Any]:
+                        password: Optional[str] = None,
+                        environment: Optional[str] = None,
+                        timeout: Optional[float] = None) -> Tuple[bool, Any]:
         """
         Execute a JBoss CLI command against a specific host and port
         
@@ -39,7 +129,10 @@ class JBossCLIService:
             command: The CLI command to execute
             username: Optional username for authentication
             password: Optional password for authentication
-            
+            environment: Optional environment used to select the transport
+            timeout: Optional seconds to wait for the response instead of the
+                transport's default, counted from when the command is sent
+        
         Returns:
             Tuple containing success status and command result
         """
@@ -51,47 +144,226 @@ class JBossCLIService:
         username = username or self.default_username
         password = password or self.default_password
         
+        if self.get_transport(environment) == "http":
+            try:
+                return self.http_client.execute_command(host, port, command, username, password, timeout)
+            except socket.timeout:
+                # Falling back to the CLI would only wait on the same unresponsive controller
+                return False, timeout_message(host, port, timeout or self.http_client.timeout)
+            except Exception as e:
+                if not self.cli_available:
+                    logger.error(f"HTTP management request to {host}:{port} failed: {str(e)}")
+                    return False, str(e)
+                logger.warning(f"HTTP management request to {host}:{port} failed ({str(e)}), falling back to CLI")
+        
+        return self._execute_cli(host, port, command, username, password, timeout)
+    
+    def _execute_cli(self, host: str, port: int, command: str,
+                     username: Optional[str] = None,
+                     password: Optional[str] = None,
+                     timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a command through jboss-cli.sh
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI command to execute
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional seconds to wait instead of command_timeout
+        
+        Returns:
+            Tuple containing success status and command result
+        """
+        # Prefer a pooled session; fall back to a one-off process if the pool is exhausted
+        if self.session_pool:
+            pooled_result = self.session_pool.execute(host, port, command, username, password, timeout)
+            if pooled_result is not None:
+                return pooled_result
+        
+        return self._execute_one_shot(host, port, command, username, password, timeout)
+    
+    def _execute_one_shot(self, host: str, port: int, command: str,
+                          username: Optional[str] = None,
+                          password: Optional[str] = None,
+                          timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a command in a dedicated jboss-cli.sh process
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI command to execute
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional seconds to wait instead of command_timeout
+        
+        Returns:
+            Tuple containing success status and command result
+        """
+        timeout = timeout or self.command_timeout
         try:
-            # Build the CLI command
-            cli_command = [
-                self.cli_path,
-                "-c",  # Connect mode
-                f"--controller={host}:{port}",
-                f"--command={command}"
-            ]
-            
-            # Add credentials if provided
-            if username and password:
-                cli_command.extend([
-                    f"--user={username}",
-                    f"--password={password}"
-                ])
+            cli_command = self._cli_arguments(host, port, command, username, password)
             
             logger.info(f"Executing command on {host}:{port}")
-            logger.debug(f"Command: {' '.join(cli_command)}")
             
-            # Execute the command
+            # Execute the command; its own session lets a timeout kill the JVM jboss-cli.sh starts
             process = subprocess.Popen(
                 cli_command,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                universal_newlines=True
+                universal_newlines=True,
+                start_new_session=True
             )
             
-            stdout, stderr = process.communicate()
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                kill_process_group(process)
+                process.communicate()
+                logger.error(timeout_message(host, port, timeout))
+                return False, timeout_message(host, port, timeout)
             
-            if process.returncode != 0:
-                logger.error(f"Error executing JBoss CLI command: {stderr}")
-                return False, stderr
+            return self._parse_cli_output(process.returncode, stdout, stderr)
+                
+        except Exception as e:
+            logger.exception(f"Exception executing JBoss CLI command: {str(e)}")
+            return False, str(e)
+    
+    def _cli_arguments(self, host: str, port: int, command: str,
+                       username: Optional[str] = None,
+                       password: Optional[str] = None) -> List[str]:
+        """Build the argument list for a one-shot jboss-cli.sh invocation"""
+        cli_command = [
+            self.cli_path,
+            "-c",  # Connect mode
+            f"--controller={host}:{port}",
+            f"--command={command}"
+        ]
+        
+        # Add credentials if provided
+        if username and password:
+            cli_command.extend([
+                f"--user={username}",
+                f"--password={password}"
+            ])
+        
+        logger.debug(f"Command: {command} on {host}:{port}")
+        return cli_command
+    
+    @staticmethod
+    def _parse_cli_output(returncode: int, stdout: str, stderr: str) -> Tuple[bool, Any]:
+        """Turn the exit code and output of a one-shot CLI process into a result"""
+        if returncode != 0:
+            logger.error(f"Error executing JBoss CLI command: {stderr}")
+            return False, stderr
+        
+        # Parse the output: JSON or DMR becomes a dict, anything else stays a string
+        result = parse_cli_output(stdout)
+        if isinstance(result, dict) and result.get("outcome") == "failed":
+            return False, result
+        return True, result
+    
+    async def execute_command_async(self, host: str, port: int, command: str,
+                                    username: Optional[str] = None,
+                                    password: Optional[str] = None,
+                                    environment: Optional[str] = None,
+                                    timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a JBoss CLI command without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI command to execute
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            timeout: Optional seconds to wait for the response instead of the
+                transport's default, counted from when the command is sent
+        
+        Returns:
+            Tuple containing success status and command result
+        """
+        # If in mock mode, return simulated data
+        if self.mock_mode:
+            return self._mock_execute_command(host, port, command)
+        
+        # Use provided credentials or fall back to defaults
+        username = username or self.default_username
+        password = password or self.default_password
+        
+        if self.get_transport(environment) == "http":
+            try:
+                return await self.http_client.execute_command_async(
+                    host, port, command, username, password, timeout
+                )
+            except socket.timeout:
+                # Falling back to the CLI would only wait on the same unresponsive controller
+                return False, timeout_message(host, port, timeout or self.http_client.timeout)
+            except Exception as e:
+                if not self.cli_available:
+                    logger.error(f"HTTP management request to {host}:{port} failed: {str(e)}")
+                    return False, str(e)
+                logger.warning(f"HTTP management request to {host}:{port} failed ({str(e)}), falling back to CLI")
+        
+        return await self._execute_cli_async(host, port, command, username, password, timeout)
+    
+    async def _execute_cli_async(self, host: str, port: int, command: str,
+                                 username: Optional[str] = None,
+                                 password: Optional[str] = None,
+                                 timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Execute a command through jboss-cli.sh without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            command: The CLI command to execute
+            username: Optional username for authentication
+            password: Optional password for authentication
+            timeout: Optional seconds to wait for the response instead of command_timeout
+        
+        Returns:
+            Tuple containing success status and command result
+        """
+        timeout = timeout or self.command_timeout
+        
+        # Prefer a pooled session (on a worker thread) over starting a JVM for the command
+        if self.session_pool:
+            pooled_result = await asyncio.to_thread(
+                self.session_pool.execute, host, port, command, username, password, timeout
+            )
+            if pooled_result is not None:
+                return pooled_result
+        
+        try:
+            cli_command = self._cli_arguments(host, port, command, username, password)
+            
+            logger.info(f"Executing command on {host}:{port}")
+            
+            process = await asyncio.create_subprocess_exec(
+                *cli_command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
+            )
             
-            # Parse the output
             try:
-                # Try to parse as JSON if possible
-                return True, json.loads(stdout)
-            except json.JSONDecodeError:
-                # Otherwise return as string
-                return True, stdout.strip()
-                
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+            except asyncio.TimeoutError:
+                kill_process_group(process)
+                await process.wait()
+                logger.error(timeout_message(host, port, timeout))
+                return False, timeout_message(host, port, timeout)
+            
+            return self._parse_cli_output(
+                process.returncode,
+                stdout.decode("utf-8", "replace"),
+                stderr.decode("utf-8", "replace")
+            )
+            
         except Exception as e:
             logger.exception(f"Exception executing JBoss CLI command: {str(e)}")
             return False, str(e)
@@ -185,24 +457,13 @@ class JBossCLIService:
             # Default response for unknown commands
             return True, {"outcome": "success", "result": "Command executed in mock mode"}
     
-    def check_instance_status(self, host: str, port: int, 
-                             username: Optional[str] = None, 
-                             password: Optional[str] = None) -> Dict[str, Any]:
-        """
-        Check if a JBoss instance is running
-        
-        Args:
-            host: The hostname or IP address
-            port: The management port number
-            username: Optional username for authentication
-            password: Optional password for authentication
-            
-        Returns:
-            Dictionary with status information
-        """
-        # Simple read-attribute command to check server status
-        command = ":read-attribute(name=server-state)"
-        success, result = self.execute_command(host, port, command, username, password)
+    def _parse_instance_status(self, success: bool, result: Any) -> Dict[str, Any]:
+        """Turn a server-state read into a status dictionary"""
+        if not success and str(result).startswith(TIMEOUT_MESSAGE_PREFIX):
+            return {
+                "status": "timeout",
+                "message": str(result)
+            }
         
         if not success:
             return {
@@ -227,9 +488,211 @@ class JBossCLIService:
                 "message": f"Unexpected response: {result}"
             }
     
+    def _parse_datasource_listing(self, result: Any) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Extract datasources from a datasources subsystem read
+        
+        Returns:
+            List of (type, name, attributes) tuples, non-XA datasources first
+        """
+        listing = []
+        try:
+            if isinstance(result, dict) and "result" in result:
+                # Extract XA and non-XA datasources
+                xa_datasources = result["result"].get("xa-data-source") or {}
+                non_xa_datasources = result["result"].get("data-source") or {}
+                
+                listing.extend(("non-xa", ds_name, ds_info) for ds_name, ds_info in non_xa_datasources.items())
+                listing.extend(("xa", ds_name, ds_info) for ds_name, ds_info in xa_datasources.items())
+        except Exception as e:
+            logger.exception(f"Error parsing datasource results: {str(e)}")
+        
+        return listing
+    
+    @staticmethod
+    def _datasource_test_command(ds_type: str, ds_name: str) -> str:
+        """Build the test-connection-in-pool command for a datasource"""
+        resource = "xa-data-source" if ds_type == "xa" else "data-source"
+        return f"/subsystem=datasources/{resource}={ds_name}:test-connection-in-pool"
+    
+    def _datasource_status(self, ds_type: str, ds_name: str, ds_info: Dict[str, Any],
+                           test_success: bool, test_result: Any) -> Dict[str, Any]:
+        """Build the status dictionary for a tested datasource"""
+        ds_status = {
+            "name": ds_name,
+            "type": ds_type,
+            "jndi_name": ds_info.get("jndi-name", ""),
+            "driver": ds_info.get("driver-name", ""),
+            "enabled": ds_info.get("enabled", False),
+        }
+        
+        if test_result is TEST_TIMED_OUT:
+            ds_status["status"] = "timeout"
+        elif test_success and isinstance(test_result, dict) and test_result.get("outcome") == "success":
+            ds_status["status"] = "connected"
+        else:
+            ds_status["status"] = "failed"
+        
+        return ds_status
+    
+    def _parse_deployments(self, success: bool, result: Any) -> List[Dict[str, Any]]:
+        """Turn a deployment read into a list of WAR/EAR status dictionaries"""
+        if not success:
+            logger.error(f"Failed to list deployments: {result}")
+            return []
+        
+        deployments = []
+        
+        # Parse the result to extract deployment information
+        try:
+            if isinstance(result, dict) and "result" in result:
+                deployment_results = result["result"]
+                
+                # A wildcard read over the management API returns a list of
+                # {"address": [{"deployment": name}], "result": {...}} entries
+                if isinstance(deployment_results, list):
+                    deployment_results = {
+                        entry["address"][-1]["deployment"]: entry.get("result", {})
+                        for entry in deployment_results
+                        if entry.get("outcome", "success") == "success"
+                    }
+                
+                for deployment_name, deployment_info in deployment_results.items():
+                    # Only process WAR files
+                    if deployment_name.endswith(".war") or deployment_name.endswith(".ear"):
+                        deployment_status = {
+                            "name": deployment_name,
+                            "runtime_name": deployment_info.get("runtime-name", ""),
+                            "enabled": deployment_info.get("enabled", False),
+                        }
+                        
+                        # Check deployment status
+                        if deployment_info.get("enabled", False) and deployment_info.get("status") == "OK":
+                            deployment_status["status"] = "deployed"
+                        else:
+                            deployment_status["status"] = "failed"
+                        
+                        deployments.append(deployment_status)
+            
+        except Exception as e:
+            logger.exception(f"Error parsing deployment results: {str(e)}")
+        
+        return deployments
+    
+    def check_reachable(self, host: str, port: int) -> Optional[Dict[str, Any]]:
+        """
+        Try a plain TCP connect to the management port
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            
+        Returns:
+            None if the port accepted the connection (or the check is off),
+            otherwise an "unreachable" status dictionary
+        """
+        if self.mock_mode or not self.reachability_check:
+            return None
+        
+        try:
+            with socket.create_connection((host, port), timeout=self.connect_timeout):
+                return None
+        except socket.timeout:
+            message = f"Management port not reachable: no answer within {self.connect_timeout}s"
+        except OSError as e:
+            message = f"Management port not reachable: {str(e)}"
+        
+        logger.info(f"{host}:{port} unreachable")
+        return {
+            "status": "unreachable",
+            "message": message
+        }
+    
+    async def check_reachable_async(self, host: str, port: int) -> Optional[Dict[str, Any]]:
+        """
+        Try a plain TCP connect to the management port without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            
+        Returns:
+            None if the port accepted the connection (or the check is off),
+            otherwise an "unreachable" status dictionary
+        """
+        if self.mock_mode or not self.reachability_check:
+            return None
+        
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=self.connect_timeout)
+            writer.close()
+            return None
+        except asyncio.TimeoutError:
+            message = f"Management port not reachable: no answer within {self.connect_timeout}s"
+        except OSError as e:
+            message = f"Management port not reachable: {str(e)}"
+        
+        logger.info(f"{host}:{port} unreachable")
+        return {
+            "status": "unreachable",
+            "message": message
+        }
+    
+    def check_instance_status(self, host: str, port: int, 
+                             username: Optional[str] = None, 
+                             password: Optional[str] = None,
+                             environment: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Check if a JBoss instance is running
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            
+        Returns:
+            Dictionary with status information
+        """
+        unreachable = self.check_reachable(host, port)
+        if unreachable:
+            return unreachable
+        
+        # Simple read-attribute command to check server status
+        success, result = self.execute_command(host, port, SERVER_STATE_COMMAND, username, password, environment)
+        return self._parse_instance_status(success, result)
+    
+    async def check_instance_status_async(self, host: str, port: int,
+                                          username: Optional[str] = None,
+                                          password: Optional[str] = None,
+                                          environment: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Check if a JBoss instance is running without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            
+        Returns:
+            Dictionary with status information
+        """
+        unreachable = await self.check_reachable_async(host, port)
+        if unreachable:
+            return unreachable
+        
+        success, result = await self.execute_command_async(
+            host, port, SERVER_STATE_COMMAND, username, password, environment
+        )
+        return self._parse_instance_status(success, result)
+    
     def check_datasources(self, host: str, port: int, 
                          username: Optional[str] = None, 
-                         password: Optional[str] = None) -> List[Dict[str, Any]]:
+                         password: Optional[str] = None,
+                         environment: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Check all datasources status
         
@@ -238,81 +701,103 @@ class JBossCLIService:
             port: The management port number
             username: Optional username for authentication
             password: Optional password for authentication
+            environment: Optional environment used to select the transport
             
         Returns:
             List of dictionaries with datasource status information
         """
         # First, list all datasources
-        command = "/subsystem=datasources:read-resource(recursive=true)"
-        success, result = self.execute_command(host, port, command, username, password)
+        success, result = self.execute_command(host, port, DATASOURCES_COMMAND, username, password, environment)
         
         if not success:
             logger.error(f"Failed to list datasources: {result}")
             return []
         
-        datasources = []
+        listing = self._parse_datasource_listing(result)
+        return self._tested_datasources(host, port, listing, username, password, environment)
+    
+    def _tested_datasources(self, host: str, port: int,
+                            listing: List[Tuple[str, str, Dict[str, Any]]],
+                            username: Optional[str] = None,
+                            password: Optional[str] = None,
+                            environment: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Test listed datasources through _test_datasources
         
-        # Parse the result to extract datasource information
-        try:
-            if isinstance(result, dict) and "result" in result:
-                # Extract XA and non-XA datasources
-                xa_datasources = result["result"].get("xa-data-source", {})
-                non_xa_datasources = result["result"].get("data-source", {})
-                
-                # Process non-XA datasources
-                for ds_name, ds_info in non_xa_datasources.items():
-                    # Test datasource connection
-                    test_command = f"/subsystem=datasources/data-source={ds_name}:test-connection-in-pool"
-                    test_success, test_result = self.execute_command(
-                        host, port, test_command, username, password
-                    )
-                    
-                    ds_status = {
-                        "name": ds_name,
-                        "type": "non-xa",
-                        "jndi_name": ds_info.get("jndi-name", ""),
-                        "driver": ds_info.get("driver-name", ""),
-                        "enabled": ds_info.get("enabled", False),
-                    }
-                    
-                    if test_success and isinstance(test_result, dict) and test_result.get("outcome") == "success":
-                        ds_status["status"] = "connected"
-                    else:
-                        ds_status["status"] = "failed"
-                    
-                    datasources.append(ds_status)
-                
-                # Process XA datasources
-                for ds_name, ds_info in xa_datasources.items():
-                    # Test datasource connection
-                    test_command = f"/subsystem=datasources/xa-data-source={ds_name}:test-connection-in-pool"
-                    test_success, test_result = self.execute_command(
-                        host, port, test_command, username, password
-                    )
-                    
-                    ds_status = {
-                        "name": ds_name,
-                        "type": "xa",
-                        "jndi_name": ds_info.get("jndi-name", ""),
-                        "driver": ds_info.get("driver-name", ""),
-                        "enabled": ds_info.get("enabled", False),
-                    }
-                    
-                    if test_success and isinstance(test_result, dict) and test_result.get("outcome") == "success":
-                        ds_status["status"] = "connected"
-                    else:
-                        ds_status["status"] = "failed"
-                    
-                    datasources.append(ds_status)
+        Returns:
+            Datasource status dictionaries, in listing order
+        """
+        tests = self._test_datasources(
+            host, port,
+            [self._datasource_test_command(ds_type, ds_name) for ds_type, ds_name, _ in listing],
+            username, password, environment
+        )
+        return [
+            self._datasource_status(ds_type, ds_name, ds_info, *test)
+            for (ds_type, ds_name, ds_info), test in zip(listing, tests)
+        ]
+    
+    def _test_datasources(self, host: str, port: int, commands: List[str],
+                          username: Optional[str] = None,
+                          password: Optional[str] = None,
+                          environment: Optional[str] = None) -> List[Tuple[bool, Any]]:
+        """
+        Run datasource connection tests in parallel
+        
+        At most datasource_test_concurrency tests run at once for the instance.
+        Each test is given datasource_test_timeout seconds from when its command
+        is sent (time spent waiting for a CLI session does not count); a test
+        that runs out is abandoned by the transport itself, reported as timed
+        out, and its slot is given to the next test.
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            commands: test-connection-in-pool commands
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
             
-        except Exception as e:
-            logger.exception(f"Error parsing datasource results: {str(e)}")
+        Returns:
+            List of (success, result) tuples in command order; timed out tests
+            have TEST_TIMED_OUT as result
+        """
+        results: List[Tuple[bool, Any]] = [(False, TEST_TIMED_OUT)] * len(commands)
+        pending = list(range(len(commands)))
+        running = {}
+        
+        # Every test returns by itself once its timeout is up, so none is left behind on the executor
+        while pending or running:
+            while pending and len(running) < self.datasource_test_concurrency:
+                index = pending.pop(0)
+                future = self.datasource_executor.submit(
+                    self.execute_command, host, port, commands[index], username, password, environment,
+                    self.datasource_test_timeout
+                )
+                running[future] = index
+            
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                index = running.pop(future)
+                try:
+                    success, result = future.result()
+                except Exception as e:
+                    logger.exception(f"Error testing datasource on {host}:{port}: {str(e)}")
+                    results[index] = (False, str(e))
+                    continue
+                
+                if not success and str(result).startswith(TIMEOUT_MESSAGE_PREFIX):
+                    logger.warning(f"Datasource test timed out on {host}:{port}: {commands[index]}")
+                    result = TEST_TIMED_OUT
+                results[index] = (success, result)
         
-        return datasources
+        return results
     
     def check_deployments(self, host: str, port: int, 
                          username: Optional[str] = None, 
-                         password: Optional[str] = None) -> List[Dict[str, Any]]:
+                         password: Optional[str] = None,
+                         environment: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Check all deployments (WAR files) status
         
@@ -321,41 +806,321 @@ class JBossCLIService:
             port: The management port number
             username: Optional username for authentication
             password: Optional password for authentication
+            environment: Optional environment used to select the transport
             
         Returns:
             List of dictionaries with deployment status information
         """
         # Get all deployments
-        command = "/deployment=*:read-resource(include-runtime=true)"
-        success, result = self.execute_command(host, port, command, username, password)
+        success, result = self.execute_command(host, port, DEPLOYMENTS_COMMAND, username, password, environment)
+        return self._parse_deployments(success, result)
+    
+    def execute_composite(self, host: str, port: int, commands: List[str],
+                          username: Optional[str] = None,
+                          password: Optional[str] = None,
+                          environment: Optional[str] = None) -> List[Tuple[bool, Any]]:
+        """
+        Execute several operations as one composite operation (one round trip)
         
-        if not success:
-            logger.error(f"Failed to list deployments: {result}")
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            commands: The CLI operations to batch
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            
+        Returns:
+            List with a (success, result) tuple per command, in order
+        """
+        if not commands:
             return []
         
-        deployments = []
+        # If in mock mode, return simulated data
+        if self.mock_mode:
+            return [self._mock_execute_command(host, port, command) for command in commands]
         
-        # Parse the result to extract deployment information
-        try:
-            if isinstance(result, dict) and "result" in result:
-                for deployment_name, deployment_info in result["result"].items():
-                    # Only process WAR files
-                    if deployment_name.endswith(".war") or deployment_name.endswith(".ear"):
-                        deployment_status = {
-                            "name": deployment_name,
-                            "runtime_name": deployment_info.get("runtime-name", ""),
-                            "enabled": deployment_info.get("enabled", False),
-                        }
-                        
-                        # Check deployment status
-                        if deployment_info.get("enabled", False) and deployment_info.get("status") == "OK":
-                            deployment_status["status"] = "deployed"
-                        else:
-                            deployment_status["status"] = "failed"
-                        
-                        deployments.append(deployment_status)
+        username = username or self.default_username
+        password = password or self.default_password
+        
+        operation = self._composite_operation(commands)
+        
+        if self.get_transport(environment) == "http":
+            try:
+                success, result = self.http_client.execute_operation(host, port, operation, username, password)
+                return self._split_composite_result(success, result, len(commands))
+            except socket.timeout:
+                return [(False, timeout_message(host, port, self.http_client.timeout))] * len(commands)
+            except Exception as e:
+                if not self.cli_available:
+                    logger.error(f"HTTP management request to {host}:{port} failed: {str(e)}")
+                    return [(False, str(e))] * len(commands)
+                logger.warning(f"HTTP management request to {host}:{port} failed ({str(e)}), falling back to CLI")
+        
+        success, result = self._execute_cli(host, port, self._composite_cli_command(operation), username, password)
+        return self._split_composite_result(success, result, len(commands))
+    
+    async def execute_composite_async(self, host: str, port: int, commands: List[str],
+                                      username: Optional[str] = None,
+                                      password: Optional[str] = None,
+                                      environment: Optional[str] = None) -> List[Tuple[bool, Any]]:
+        """
+        Execute several operations as one composite operation without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            commands: The CLI operations to batch
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
             
-        except Exception as e:
-            logger.exception(f"Error parsing deployment results: {str(e)}")
+        Returns:
+            List with a (success, result) tuple per command, in order
+        """
+        if not commands:
+            return []
         
-        return deployments
+        # If in mock mode, return simulated data
+        if self.mock_mode:
+            return [self._mock_execute_command(host, port, command) for command in commands]
+        
+        username = username or self.default_username
+        password = password or self.default_password
+        
+        operation = self._composite_operation(commands)
+        
+        if self.get_transport(environment) == "http":
+            try:
+                success, result = await self.http_client.execute_operation_async(
+                    host, port, operation, username, password
+                )
+                return self._split_composite_result(success, result, len(commands))
+            except socket.timeout:
+                return [(False, timeout_message(host, port, self.http_client.timeout))] * len(commands)
+            except Exception as e:
+                if not self.cli_available:
+                    logger.error(f"HTTP management request to {host}:{port} failed: {str(e)}")
+                    return [(False, str(e))] * len(commands)
+                logger.warning(f"HTTP management request to {host}:{port} failed ({str(e)}), falling back to CLI")
+        
+        success, result = await self._execute_cli_async(
+            host, port, self._composite_cli_command(operation), username, password
+        )
+        return self._split_composite_result(success, result, len(commands))
+    
+    @staticmethod
+    def _composite_operation(commands: List[str]) -> Dict[str, Any]:
+        """Build a composite DMR operation from CLI operation strings"""
+        return {
+            "operation": "composite",
+            "address": [],
+            "steps": [parse_cli_operation(command) for command in commands],
+            # Runtime failures in one step (e.g. a broken datasource) must not hide the others
+            "operation-headers": {"rollback-on-runtime-failure": False}
+        }
+    
+    @staticmethod
+    def _composite_cli_command(operation: Dict[str, Any]) -> str:
+        """Express a composite operation in CLI syntax"""
+        return f":composite(steps={_to_dmr_string(operation['steps'])}){{rollback-on-runtime-failure=false}}"
+    
+    @staticmethod
+    def _split_composite_result(success: bool, result: Any, count: int) -> List[Tuple[bool, Any]]:
+        """Split a composite response into per-step (success, result) tuples"""
+        steps = result.get("result") if isinstance(result, dict) else None
+        
+        if not isinstance(steps, dict) or "step-1" not in steps:
+            # The composite itself failed (e.g. controller unreachable)
+            return [(False, result)] * count
+        
+        split = []
+        for index in range(1, count + 1):
+            step = steps.get(f"step-{index}")
+            if isinstance(step, dict):
+                split.append((step.get("outcome") == "success", step))
+            else:
+                split.append((False, result))
+        return split
+    
+    def probe_instance(self, host: str, port: int,
+                       username: Optional[str] = None,
+                       password: Optional[str] = None,
+                       environment: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Check an instance's status, datasources and deployments
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            
+        Returns:
+            Dictionary with status, message, datasources and warFiles
+        """
+        if self.composite_probes:
+            unreachable = self.check_reachable(host, port)
+            if unreachable:
+                return self._probe_result(unreachable)
+            return self._probe_instance_composite(host, port, username, password, environment)
+        
+        status = self.check_instance_status(host, port, username, password, environment)
+        
+        # If instance is online, check datasources and deployments
+        if status.get("status") == "online":
+            datasources = self.check_datasources(host, port, username, password, environment)
+            deployments = self.check_deployments(host, port, username, password, environment)
+        else:
+            datasources = []
+            deployments = []
+        
+        return self._probe_result(status, datasources, deployments)
+    
+    async def probe_instance_async(self, host: str, port: int,
+                                   username: Optional[str] = None,
+                                   password: Optional[str] = None,
+                                   environment: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Check an instance's status, datasources and deployments without blocking the event loop
+        
+        Args:
+            host: The hostname or IP address
+            port: The management port number
+            username: Optional username for authentication
+            password: Optional password for authentication
+            environment: Optional environment used to select the transport
+            
+        Returns:
+            Dictionary with status, message, datasources and warFiles
+        """
+        if self.composite_probes:
+            unreachable = await self.check_reachable_async(host, port)
+            if unreachable:
+                return self._probe_result(unreachable)
+            return await self._probe_instance_composite_async(host, port, username, password, environment)
+        
+        status = await self.check_instance_status_async(host, port, username, password, environment)
+        if status["status"] != "online":
+            return self._probe_result(status)
+        
+        ds_listing, deployment_listing = await asyncio.gather(
+            self.execute_command_async(host, port, DATASOURCES_COMMAND, username, password, environment),
+            self.execute_command_async(host, port, DEPLOYMENTS_COMMAND, username, password, environment)
+        )
+        
+        listing = []
+        if ds_listing[0]:
+            listing = self._parse_datasource_listing(ds_listing[1])
+        else:
+            logger.error(f"Failed to list datasources: {ds_listing[1]}")
+        
+        datasources = await self._tested_datasources_async(host, port, listing, username, password, environment)
+        return self._probe_result(status, datasources, self._parse_deployments(*deployment_listing))
+    
+    async def _tested_datasources_async(self, host: str, port: int,
+                                        listing: List[Tuple[str, str, Dict[str, Any]]],
+                                        username: Optional[str] = None,
+                                        password: Optional[str] = None,
+                                        environment: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Test listed datasources concurrently on the event loop, like _test_datasources
+        
+        Returns:
+            Datasource status dictionaries, in listing order
+        """
+        limit = asyncio.Semaphore(self.datasource_test_concurrency)
+        
+        async def test(ds_type: str, ds_name: str) -> Tuple[bool, Any]:
+            # The transport enforces the timeout, so no worker thread outlives the test
+            async with limit:
+                success, result = await self.execute_command_async(
+                    host, port, self._datasource_test_command(ds_type, ds_name),
+                    username, password, environment, self.datasource_test_timeout
+                )
+            if not success and str(result).startswith(TIMEOUT_MESSAGE_PREFIX):
+                logger.warning(f"Datasource test timed out on {host}:{port}: {ds_name}")
+                return False, TEST_TIMED_OUT
+            return success, result
+        
+        tests = await asyncio.gather(*[test(ds_type, ds_name) for ds_type, ds_name, _ in listing])
+        return [
+            self._datasource_status(ds_type, ds_name, ds_info, *test)
+            for (ds_type, ds_name, ds_info), test in zip(listing, tests)
+        ]
+    
+    @staticmethod
+    def _probe_result(status: Dict[str, Any],
+                      datasources: Optional[List[Dict[str, Any]]] = None,
+                      deployments: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Build the probe_instance result dictionary"""
+        return {
+            "status": status.get("status"),
+            "message": status.get("message", ""),
+            "datasources": datasources or [],
+            "warFiles": deployments or []
+        }
+    
+    def _composite_probe_listing(self, results: List[Tuple[bool, Any]]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Get the datasource listing out of a composite probe response"""
+        ds_success, ds_result = results[1]
+        if ds_success:
+            return self._parse_datasource_listing(ds_result)
+        logger.error(f"Failed to list datasources: {ds_result}")
+        return []
+    
+    def _probe_instance_composite(self, host: str, port: int,
+                                  username: Optional[str] = None,
+                                  password: Optional[str] = None,
+                                  environment: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Probe an instance with one composite operation for its reads
+        
+        Server state, datasources and deployments are read in one round trip.
+        The datasources are then tested through _test_datasources, in parallel
+        and each with its own timeout, so a hung datasource is reported as
+        timed out without holding up the rest of the probe.
+        """
+        results = self.execute_composite(
+            host, port, [SERVER_STATE_COMMAND, DATASOURCES_COMMAND, DEPLOYMENTS_COMMAND],
+            username, password, environment
+        )
+        
+        status = self._parse_instance_status(*results[0])
+        if status["status"] != "online":
+            return self._probe_result(status)
+        
+        listing = self._composite_probe_listing(results)
+        datasources = self._tested_datasources(host, port, listing, username, password, environment)
+        return self._probe_result(status, datasources, self._parse_deployments(*results[2]))
+    
+    async def _probe_instance_composite_async(self, host: str, port: int,
+                                              username: Optional[str] = None,
+                                              password: Optional[str] = None,
+                                              environment: Optional[str] = None) -> Dict[str, Any]:
+        """Async counterpart of _probe_instance_composite"""
+        results = await self.execute_composite_async(
+            host, port, [SERVER_STATE_COMMAND, DATASOURCES_COMMAND, DEPLOYMENTS_COMMAND],
+            username, password, environment
+        )
+        
+        status = self._parse_instance_status(*results[0])
+        if status["status"] != "online":
+            return self._probe_result(status)
+        
+        listing = self._composite_probe_listing(results)
+        datasources = await self._tested_datasources_async(host, port, listing, username, password, environment)
+        return self._probe_result(status, datasources, self._parse_deployments(*results[2]))
+
+def _to_dmr_string(value: Any) -> str:
+    """Serialize a value in the DMR syntax accepted by the CLI"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{json.dumps(k)}=>{_to_dmr_string(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_to_dmr_string(item) for item in value) + "]"
+    return json.dumps(str(value))
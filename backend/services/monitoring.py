@@ -1,7 +1,13 @@
 # services/monitoring.py
+import asyncio
 import logging
-from typing import Dict, List, Any
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Callable
 from services.jboss_cli import JBossCLIService
+from services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
@@ -10,16 +16,132 @@ class MonitoringService:
     Service to coordinate JBoss monitoring activities
     """
     
-    def __init__(self, cli_service: JBossCLIService):
+    def __init__(self, cli_service: JBossCLIService,
+                 max_workers: Optional[int] = None,
+                 max_probes_per_host: Optional[int] = None):
         """
         Initialize with a JBossCLIService
         
         Args:
             cli_service: JBossCLIService instance for executing commands
+            max_workers: Number of instances probed concurrently during a sweep
+            max_probes_per_host: Maximum concurrent probes against one host
         """
         self.cli_service = cli_service
+        self.max_workers = max_workers or int(os.environ.get("MONITORING_MAX_WORKERS", "16"))
+        self.max_probes_per_host = max_probes_per_host or int(os.environ.get("MONITORING_MAX_PROBES_PER_HOST", "4"))
+        
+        # "threads" probes on the worker pool, "asyncio" drives every probe from one event loop
+        self.engine = os.environ.get("MONITORING_ENGINE", "threads").lower()
+        # Probes in flight on the event loop; over the CLI transport each may start a jboss-cli JVM,
+        # so by default no more than the thread engine would run
+        self.max_async_probes = int(os.environ.get("MONITORING_MAX_ASYNC_PROBES", str(self.max_workers)))
+        
+        # Back off from instances that keep failing
+        self.circuit_breaker = None
+        if os.environ.get("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true":
+            self.circuit_breaker = CircuitBreaker(
+                failure_threshold=int(os.environ.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3")),
+                base_backoff=float(os.environ.get("CIRCUIT_BREAKER_BASE_BACKOFF", "30")),
+                max_backoff=float(os.environ.get("CIRCUIT_BREAKER_MAX_BACKOFF", "900"))
+            )
+        
+        # Shared by all sweeps so concurrent requests cannot multiply the probe load
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sweep")
+        self.host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.lock = threading.Lock()
+    
+    def _host_semaphore(self, hostname: str) -> threading.BoundedSemaphore:
+        """Get the semaphore limiting concurrent probes against a host"""
+        with self.lock:
+            if hostname not in self.host_semaphores:
+                self.host_semaphores[hostname] = threading.BoundedSemaphore(self.max_probes_per_host)
+            return self.host_semaphores[hostname]
+    
+    def _probe_instance(self, hostname: str, instance: Dict[str, Any], username: str = None,
+                        password: str = None, environment: str = None) -> Dict[str, Any]:
+        """
+        Probe one instance, turning any failure into an error result
+        
+        Args:
+            hostname: Hostname the instance runs on
+            instance: Instance dictionary
+            username: Username for authentication
+            password: Password for authentication
+            environment: Environment used to select the probe transport
+            
+        Returns:
+            Instance status dictionary
+        """
+        instance_id = instance.get("id")
+        instance_name = instance.get("name")
+        port = instance.get("port")
+        
+        try:
+            decision = self.circuit_breaker.before_probe(hostname, port) if self.circuit_breaker else "probe"
+            
+            if decision == "skip":
+                probe = self.circuit_breaker.cached_probe(hostname, port)
+            else:
+                with self._host_semaphore(hostname):
+                    probe = None
+                    if decision == "trial":
+                        # Cheap server-state read first; only a live instance gets the full probe
+                        status = self.cli_service.check_instance_status(hostname, port, username, password, environment)
+                        if status.get("status") != "online":
+                            probe = {"status": status.get("status"), "message": status.get("message", "")}
+                    
+                    if probe is None:
+                        # Status, datasources and deployments in one probe
+                        probe = self.cli_service.probe_instance(hostname, port, username, password, environment)
+                
+                if self.circuit_breaker:
+                    self.circuit_breaker.record(hostname, port, probe)
+            
+            return self._instance_result(instance, hostname, probe)
+            
+        except Exception as e:
+            logger.exception(f"Error checking instance {instance_name} on host {hostname}: {str(e)}")
+            return {
+                "id": instance_id,
+                "name": instance_name,
+                "port": port,
+                "status": "error",
+                "statusMessage": str(e),
+                "datasources": [],
+                "warFiles": []
+            }
+    
+    def _instance_result(self, instance: Dict[str, Any], hostname: str, probe: Dict[str, Any]) -> Dict[str, Any]:
+        """Build an instance status dictionary from a probe result"""
+        result = {
+            "id": instance.get("id"),
+            "name": instance.get("name"),
+            "port": instance.get("port"),
+            "status": probe.get("status"),
+            "statusMessage": probe.get("message", ""),
+            "datasources": probe.get("datasources", []),
+            "warFiles": probe.get("warFiles", [])
+        }
+        
+        if self.circuit_breaker:
+            result["circuitBreaker"] = self.circuit_breaker.describe(hostname, instance.get("port"))
+        
+        return result
+    
+    def _schedule(self, hosts: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+        """
+        Order (host index, instance index) pairs round-robin across hosts,
+        so workers spread over hosts instead of queueing on one host's limit
+        """
+        per_host = [
+            [(host_index, instance_index) for instance_index in range(len(host.get("instances", [])))]
+            for host_index, host in enumerate(hosts)
+        ]
+        return [task for batch in zip_longest(*per_host) for task in batch if task is not None]
     
-    def check_host(self, host: Dict[str, Any], username: str = None, password: str = None) -> Dict[str, Any]:
+    def check_host(self, host: Dict[str, Any], username: str = None, password: str = None,
+                   environment: str = None) -> Dict[str, Any]:
         """
         Check the status of a host and all its instances
         
@@ -27,95 +149,332 @@ class MonitoringService:
             host: Host dictionary with instance information
             username: Username for authentication
             password: Password for authentication
+            environment: Environment used to select the probe transport
             
         Returns:
             Dictionary with status information for the host and its instances
         """
-        hostname = host.get("hostname")
-        instances = host.get("instances", [])
+        return self.check_all_hosts([host], username, password, environment)[0]
+    
+    def _placeholders(self, hosts: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Build the result skeleton for a sweep
         
-        host_result = {
-            "id": host.get("id"),
-            "hostname": hostname,
-            "instances": []
-        }
+        Returns:
+            Host results with a None slot per instance, and the hosts to probe
+            (hosts that could not be read get an error result and no instances)
+        """
+        results = []
+        valid_hosts = []
         
-        for instance in instances:
-            instance_id = instance.get("id")
-            instance_name = instance.get("name")
-            port = instance.get("port")
-            
-            # Check instance status
+        for host in hosts:
             try:
-                status = self.cli_service.check_instance_status(hostname, port, username, password)
-                
-                # If instance is online, check datasources and deployments
-                if status.get("status") == "online":
-                    datasources = self.cli_service.check_datasources(hostname, port, username, password)
-                    deployments = self.cli_service.check_deployments(hostname, port, username, password)
-                else:
-                    datasources = []
-                    deployments = []
-                
-                instance_result = {
-                    "id": instance_id,
-                    "name": instance_name,
-                    "port": port,
-                    "status": status.get("status"),
-                    "statusMessage": status.get("message", ""),
-                    "datasources": datasources,
-                    "warFiles": deployments
-                }
-                
-                host_result["instances"].append(instance_result)
-                
+                results.append({
+                    "id": host.get("id"),
+                    "hostname": host.get("hostname"),
+                    "instances": [None] * len(host.get("instances", []))
+                })
+                valid_hosts.append(host)
             except Exception as e:
-                logger.exception(f"Error checking instance {instance_name} on host {hostname}: {str(e)}")
-                instance_result = {
-                    "id": instance_id,
-                    "name": instance_name,
-                    "port": port,
+                logger.exception(f"Error checking host {host.get('hostname')}: {str(e)}")
+                # Add error result
+                results.append({
+                    "id": host.get("id"),
+                    "hostname": host.get("hostname"),
                     "status": "error",
                     "statusMessage": str(e),
-                    "datasources": [],
-                    "warFiles": []
-                }
-                host_result["instances"].append(instance_result)
+                    "instances": []
+                })
+                valid_hosts.append({"instances": []})
         
-        return host_result
+        return results, valid_hosts
     
-    def check_all_hosts(self, hosts: List[Dict[str, Any]], username: str = None, password: str = None) -> List[Dict[str, Any]]:
+    def pending_results(self, hosts: List[Dict[str, Any]],
+                        results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
-        Check the status of multiple hosts
+        Copy sweep results, marking every instance without a result yet as "pending"
+        
+        Args:
+            hosts: List of host dictionaries the sweep was started with
+            results: Results filled in so far, or None if nothing has finished
+            
+        Returns:
+            List of host status dictionaries, in the same order as hosts
+        """
+        if results is None:
+            results, hosts = self._placeholders(hosts)
+        
+        partial = []
+        for host, host_result in zip(hosts, results):
+            instances = []
+            for instance, instance_result in zip(host.get("instances", []), host_result["instances"]):
+                if instance_result is None:
+                    instance_result = {
+                        "id": instance.get("id"),
+                        "name": instance.get("name"),
+                        "port": instance.get("port"),
+                        "status": "pending",
+                        "statusMessage": "Probe still running, the result will be in the next refresh",
+                        "datasources": [],
+                        "warFiles": []
+                    }
+                instances.append(instance_result)
+            
+            host_copy = dict(host_result)
+            host_copy["instances"] = instances
+            partial.append(host_copy)
+        
+        return partial
+    
+    def check_all_hosts(self, hosts: List[Dict[str, Any]], username: str = None, password: str = None,
+                        environment: str = None, deadline: Optional[float] = None,
+                        on_complete: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> List[Dict[str, Any]]:
+        """
+        Check the status of multiple hosts, probing instances concurrently
+        
+        With a deadline, the sweep returns what finished in time and marks the
+        other instances "pending". Their probes keep running in the background
+        and on_complete receives the full results when the last one finishes.
         
         Args:
             hosts: List of host dictionaries
             username: Username for authentication
             password: Password for authentication
+            environment: Environment used to select the probe transport
+            deadline: Optional time budget for the sweep in seconds
+            on_complete: Optional callback receiving the full results once every
+                probe has finished (before returning, if that was within the deadline)
             
         Returns:
-            List of host status dictionaries
+            List of host status dictionaries, in the same order as hosts
         """
-        results = []
+        results, valid_hosts = self._placeholders(hosts)
         
-        for host in hosts:
+        finished = threading.Event()
+        progress_lock = threading.Lock()
+        progress = {"remaining": 0, "returned": False}
+        
+        def complete() -> None:
+            with progress_lock:
+                finished.set()
+                late = progress["returned"]
+            if late and on_complete:
+                on_complete(results)
+        
+        if self.engine == "asyncio":
+            def run() -> None:
+                try:
+                    asyncio.run(self.check_all_hosts_async(valid_hosts, username, password, environment, results))
+                except Exception as e:
+                    logger.exception(f"Asyncio sweep failed: {str(e)}")
+                finally:
+                    complete()
+            
+            threading.Thread(target=run, name="sweep-asyncio", daemon=True).start()
+        else:
+            tasks = self._schedule(valid_hosts)
+            progress["remaining"] = len(tasks)
+            if not tasks:
+                complete()
+            
+            def collect(future, host_index: int, instance_index: int) -> None:
+                # Results are placed by position, so the output order never depends on timing
+                results[host_index]["instances"][instance_index] = future.result()
+                with progress_lock:
+                    progress["remaining"] -= 1
+                    last = progress["remaining"] == 0
+                if last:
+                    complete()
+            
+            for host_index, instance_index in tasks:
+                host = valid_hosts[host_index]
+                future = self.executor.submit(
+                    self._probe_instance,
+                    host.get("hostname"),
+                    host["instances"][instance_index],
+                    username,
+                    password,
+                    environment
+                )
+                future.add_done_callback(
+                    lambda future, host_index=host_index, instance_index=instance_index:
+                        collect(future, host_index, instance_index)
+                )
+        
+        finished.wait(deadline)
+        with progress_lock:
+            if not finished.is_set():
+                progress["returned"] = True
+        
+        if progress["returned"]:
+            logger.info(f"Sweep deadline of {deadline}s reached, returning partial results")
+            return self.pending_results(valid_hosts, results)
+        
+        if on_complete:
+            on_complete(results)
+        return results
+    
+    def iter_instance_results(self, hosts: List[Dict[str, Any]], username: str = None,
+                              password: str = None,
+                              environment: str = None) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        """
+        Probe every instance concurrently and yield each result as soon as it completes
+        
+        Args:
+            hosts: List of host dictionaries
+            username: Username for authentication
+            password: Password for authentication
+            environment: Environment used to select the probe transport
+            
+        Yields:
+            (host index, instance index, instance status dictionary) in completion order
+        """
+        futures = {}
+        for host_index, instance_index in self._schedule(hosts):
+            host = hosts[host_index]
+            future = self.executor.submit(
+                self._probe_instance,
+                host.get("hostname"),
+                host["instances"][instance_index],
+                username,
+                password,
+                environment
+            )
+            futures[future] = (host_index, instance_index)
+        
+        try:
+            for future in as_completed(futures):
+                host_index, instance_index = futures[future]
+                yield host_index, instance_index, future.result()
+        finally:
+            # Client went away: drop probes that have not started yet
+            for future in futures:
+                future.cancel()
+    
+    async def _probe_instance_async(self, hostname: str, instance: Dict[str, Any],
+                                    limit: asyncio.Semaphore, host_limit: asyncio.Semaphore,
+                                    username: str = None, password: str = None,
+                                    environment: str = None) -> Dict[str, Any]:
+        """
+        Probe one instance on the event loop, turning any failure into an error result
+        
+        Args:
+            hostname: Hostname the instance runs on
+            instance: Instance dictionary
+            limit: Semaphore bounding probes across the whole sweep
+            host_limit: Semaphore bounding probes against this host
+            username: Username for authentication
+            password: Password for authentication
+            environment: Environment used to select the probe transport
+            
+        Returns:
+            Instance status dictionary
+        """
+        instance_id = instance.get("id")
+        instance_name = instance.get("name")
+        port = instance.get("port")
+        
+        try:
+            decision = self.circuit_breaker.before_probe(hostname, port) if self.circuit_breaker else "probe"
+            
+            if decision == "skip":
+                probe = self.circuit_breaker.cached_probe(hostname, port)
+            else:
+                async with limit, host_limit:
+                    probe = None
+                    if decision == "trial":
+                        # Cheap server-state read first; only a live instance gets the full probe
+                        status = await self.cli_service.check_instance_status_async(
+                            hostname, port, username, password, environment
+                        )
+                        if status.get("status") != "online":
+                            probe = {"status": status.get("status"), "message": status.get("message", "")}
+                    
+                    if probe is None:
+                        probe = await self.cli_service.probe_instance_async(
+                            hostname, port, username, password, environment
+                        )
+                
+                if self.circuit_breaker:
+                    self.circuit_breaker.record(hostname, port, probe)
+            
+            return self._instance_result(instance, hostname, probe)
+            
+        except Exception as e:
+            logger.exception(f"Error checking instance {instance_name} on host {hostname}: {str(e)}")
+            return {
+                "id": instance_id,
+                "name": instance_name,
+                "port": port,
+                "status": "error",
+                "statusMessage": str(e),
+                "datasources": [],
+                "warFiles": []
+            }
+    
+    async def check_all_hosts_async(self, hosts: List[Dict[str, Any]], username: str = None,
+                                    password: str = None, environment: str = None,
+                                    results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Check the status of multiple hosts from a single event loop
+        
+        Args:
+            hosts: List of host dictionaries
+            username: Username for authentication
+            password: Password for authentication
+            environment: Environment used to select the probe transport
+            results: Optional skeleton from _placeholders, filled in as each
+                instance finishes so other threads can read partial results
+            
+        Returns:
+            List of host status dictionaries, in the same order as hosts
+        """
+        limit = asyncio.Semaphore(self.max_async_probes)
+        host_limits: Dict[str, asyncio.Semaphore] = {}
+        
+        async def probe(host_index: int, instance_index: int, hostname: str, instance: Dict[str, Any],
+                        host_limit: asyncio.Semaphore) -> Dict[str, Any]:
+            result = await self._probe_instance_async(
+                hostname, instance, limit, host_limit, username, password, environment
+            )
+            if results is not None:
+                results[host_index]["instances"][instance_index] = result
+            return result
+        
+        async def check(host_index: int, host: Dict[str, Any]) -> Dict[str, Any]:
             try:
-                host_result = self.check_host(host, username, password)
-                results.append(host_result)
+                hostname = host.get("hostname")
+                host_limit = host_limits.setdefault(hostname, asyncio.Semaphore(self.max_probes_per_host))
+                instances = await asyncio.gather(*[
+                    probe(host_index, instance_index, hostname, instance, host_limit)
+                    for instance_index, instance in enumerate(host.get("instances", []))
+                ])
+                return {
+                    "id": host.get("id"),
+                    "hostname": hostname,
+                    "instances": list(instances)
+                }
             except Exception as e:
                 logger.exception(f"Error checking host {host.get('hostname')}: {str(e)}")
-                # Add error result
-                results.append({
+                error = {
                     "id": host.get("id"),
                     "hostname": host.get("hostname"),
                     "status": "error",
                     "statusMessage": str(e),
                     "instances": []
-                })
+                }
+                if results is not None:
+                    results[host_index] = error
+                return error
         
-        return results
+        try:
+            return list(await asyncio.gather(*[check(host_index, host) for host_index, host in enumerate(hosts)]))
+        finally:
+            # Keep-alive streams belong to this sweep's event loop, which closes after it
+            await self.cli_service.http_client.close_idle_async()
     
-    def check_instance(self, host: Dict[str, Any], instance: Dict[str, Any], username: str = None, password: str = None) -> Dict[str, Any]:
+    def check_instance(self, host: Dict[str, Any], instance: Dict[str, Any], username: str = None, password: str = None,
+                       environment: str = None) -> Dict[str, Any]:
         """
         Check the status of a specific instance
         
@@ -124,6 +483,7 @@ class MonitoringService:
             instance: Instance dictionary
             username: Username for authentication
             password: Password for authentication
+            environment: Environment used to select the probe transport
             
         Returns:
             Dictionary with detailed status information for the instance
@@ -134,16 +494,9 @@ class MonitoringService:
         port = instance.get("port")
         
         try:
-            # Check instance status
-            status = self.cli_service.check_instance_status(hostname, port, username, password)
-            
-            # If instance is online, check datasources and deployments
-            if status.get("status") == "online":
-                datasources = self.cli_service.check_datasources(hostname, port, username, password)
-                deployments = self.cli_service.check_deployments(hostname, port, username, password)
-            else:
-                datasources = []
-                deployments = []
+            # Status, datasources and deployments in one probe
+            with self._host_semaphore(hostname):
+                probe = self.cli_service.probe_instance(hostname, port, username, password, environment)
             
             result = {
                 "host": {
@@ -155,10 +508,10 @@ class MonitoringService:
                     "name": instance_name,
                     "port": port
                 },
-                "status": status.get("status"),
-                "statusMessage": status.get("message", ""),
-                "datasources": datasources,
-                "warFiles": deployments
+                "status": probe.get("status"),
+                "statusMessage": probe.get("message", ""),
+                "datasources": probe.get("datasources", []),
+                "warFiles": probe.get("warFiles", [])
             }
             
             return result
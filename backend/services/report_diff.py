@@ -0,0 +1,89 @@
+# services/report_diff.py
+import logging
+from typing import Dict, List, Any, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+def _states(items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Map datasource or deployment names to their status"""
+    return {item.get("name"): item.get("status") for item in items or []}
+
+def _instance_state(host: Dict[str, Any], instance: Dict[str, Any]) -> Tuple:
+    """The parts of an instance the diff compares, plus what it reports about it"""
+    return (
+        instance.get("status"),
+        _states(instance.get("datasources")),
+        _states(instance.get("warFiles")),
+        {"id": host.get("id"), "hostname": host.get("hostname")},
+        {"id": instance.get("id"), "name": instance.get("name"), "port": instance.get("port")}
+    )
+
+def _state_changes(before: Dict[str, Any], after: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"name": name, "from": before.get(name), "to": after.get(name)}
+        for name in list(before) + [name for name in after if name not in before]
+        if before.get(name) != after.get(name)
+    ]
+
+def diff_results(indexed: Iterable[Dict[str, Any]], streamed: Iterable[Dict[str, Any]],
+                 indexed_is_old: bool) -> Dict[str, Any]:
+    """
+    Compare two reports' results by host and instance ID
+
+    The first report is indexed (pass the smaller one); the second is only
+    iterated, so it can be streamed. Runs in time linear in both reports.
+
+    Args:
+        indexed: Host results of the report to index
+        streamed: Host results of the other report
+        indexed_is_old: True if `indexed` is the "from" side of the diff
+
+    Returns:
+        Dictionary with "changes" (instances whose status, datasource states
+        or WAR file states differ, or that exist in only one report) and
+        "summary" counts
+    """
+    index = {}
+    for host in indexed:
+        for instance in host.get("instances", []):
+            index[(host.get("id"), instance.get("id"))] = _instance_state(host, instance)
+
+    changes = []
+    summary = {"changed": 0, "added": 0, "removed": 0, "unchanged": 0}
+
+    for host in streamed:
+        for instance in host.get("instances", []):
+            key = (host.get("id"), instance.get("id"))
+            state = _instance_state(host, instance)
+            other = index.pop(key, None)
+
+            if other is None:
+                change = "added" if indexed_is_old else "removed"
+                summary[change] += 1
+                changes.append({"change": change, "host": state[3], "instance": state[4], "status": state[0]})
+                continue
+
+            old, new = (other, state) if indexed_is_old else (state, other)
+            datasources = _state_changes(old[1], new[1])
+            war_files = _state_changes(old[2], new[2])
+            if old[0] == new[0] and not datasources and not war_files:
+                summary["unchanged"] += 1
+                continue
+
+            summary["changed"] += 1
+            changes.append({
+                "change": "changed",
+                "host": new[3],
+                "instance": new[4],
+                "status": {"from": old[0], "to": new[0]},
+                "datasources": datasources,
+                "warFiles": war_files
+            })
+
+    # Whatever is left in the index exists only in the indexed report
+    for state in index.values():
+        change = "removed" if indexed_is_old else "added"
+        summary[change] += 1
+        changes.append({"change": change, "host": state[3], "instance": state[4], "status": state[0]})
+
+    return {"changes": changes, "summary": summary}
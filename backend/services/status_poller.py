@@ -0,0 +1,576 @@
+# services/status_poller.py
+import os
+import json
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Callable
+from services.monitoring import MonitoringService
+
+try:
+    import fcntl
+except ImportError:  # Windows: every process polls and keeps its own snapshots
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Held by the one process (gunicorn worker) that runs the background sweeps
+LEADER_LOCK_FILE = "poller.lock"
+
+# Ends the events of a streamed sweep
+SWEEP_DONE = object()
+
+def instance_events(results: List[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool]]:
+    """
+    Turn finished sweep results into the events StatusPoller.iter_refresh yields
+    
+    Args:
+        results: Host status dictionaries
+    
+    Yields:
+        (host, instance, host complete), and (host, None, True) for a host without instances
+    """
+    for host in results:
+        instances = host.get("instances", [])
+        if not instances:
+            yield host, None, True
+        for index, instance in enumerate(instances):
+            yield host, instance, index == len(instances) - 1
+
+class StatusPoller:
+    """
+    Background scheduler that sweeps each environment on an interval and
+    keeps the latest results, so API requests are answered from the cache
+    instead of probing the fleet themselves.
+    
+    With a state directory, processes sharing it (gunicorn workers) elect
+    one of them with a file lock to run the background sweeps, and every
+    stored sweep is published there as a JSON file that the other
+    processes load when it changes. The probe load is then one sweep per
+    interval however many workers serve requests.
+    """
+
+    def __init__(self, monitoring_service: MonitoringService, storage,
+                 interval: float = 60.0,
+                 username: Optional[str] = None,
+                 password: Optional[str] = None,
+                 environments: Optional[List[str]] = None,
+                 history=None,
+                 state_dir: Optional[str] = None,
+                 delta_history: float = 3600.0):
+        """
+        Initialize the poller
+
+        Args:
+            monitoring_service: MonitoringService used for the sweeps
+            storage: Storage providing get_all_hosts(environment)
+            interval: Seconds between the end of one sweep and the start of the next
+            username: JBoss username for background sweeps
+            password: JBoss password for background sweeps
+            environments: Environments to sweep
+            history: Optional StatusHistory that records the sweeps stored
+                by the elected process
+            state_dir: Optional directory shared with the other processes
+                for leader election and published snapshots
+            delta_history: Seconds of change history kept for delta requests;
+                clients with an older version get the full results
+        """
+        self.monitoring_service = monitoring_service
+        self.storage = storage
+        self.interval = interval
+        self.username = username
+        self.password = password
+        self.environments = environments or ["production", "non-production"]
+        self.history = history
+
+        self.snapshots: Dict[str, Dict[str, Any]] = {}
+
+        # Change tracking for delta responses, per environment:
+        # (host id, instance id or None for the host itself) -> fingerprint / version it last changed
+        self.fingerprints: Dict[str, Dict[Tuple[Any, Any], str]] = {}
+        self.changed_versions: Dict[str, Dict[Tuple[Any, Any], int]] = {}
+        self.removed_versions: Dict[str, Dict[Tuple[Any, Any], int]] = {}
+        self.history_start: Dict[str, int] = {}
+        self.delta_history = delta_history
+
+        self.lock = threading.Lock()
+        self.refresh_locks = {environment: threading.Lock() for environment in self.environments}
+        self.stop_event = threading.Event()
+        self.thread = None
+        
+        self.state_dir = state_dir
+        # Environment -> file signature of the published snapshot loaded last
+        self.state_signatures: Dict[str, Tuple[int, int, int]] = {}
+        self.leader_file = None
+        if state_dir and not os.path.exists(state_dir):
+            os.makedirs(state_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(environment: str) -> str:
+        return "production" if environment.lower() == "production" else "non-production"
+
+    def start(self) -> None:
+        """Start the background sweep thread"""
+        if self.thread is not None:
+            return
+
+        self.thread = threading.Thread(target=self._run, name="status-poller", daemon=True)
+        self.thread.start()
+        logger.info(f"Status poller started, sweeping every {self.interval}s")
+
+    def stop(self) -> None:
+        """Stop the background sweep thread and give up leadership"""
+        self.stop_event.set()
+        if self.leader_file is not None:
+            self.leader_file.close()
+            self.leader_file = None
+    
+    def _lead(self) -> bool:
+        """
+        Try to become the process that runs the background sweeps
+        
+        The lock is held until the process exits, so a follower takes over
+        at its next attempt after the leader dies.
+        
+        Returns:
+            True if this process is the leader
+        """
+        if self.state_dir is None or fcntl is None or self.leader_file is not None:
+            return True
+        
+        leader_file = open(os.path.join(self.state_dir, LEADER_LOCK_FILE), "a")
+        try:
+            fcntl.flock(leader_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            leader_file.close()
+            return False
+        
+        self.leader_file = leader_file
+        logger.info(f"Status poller elected in process {os.getpid()}")
+        return True
+    
+    def _run(self) -> None:
+        while not self.stop_event.is_set():
+            # Followers keep trying, to take over from a leader that exited
+            if self._lead():
+                for environment in self.environments:
+                    if self.stop_event.is_set():
+                        break
+                    try:
+                        self.refresh(environment)
+                    except Exception as e:
+                        logger.exception(f"Background sweep of {environment} failed: {str(e)}")
+            self.stop_event.wait(self.interval)
+    
+    def _state_path(self, key: str) -> str:
+        return os.path.join(self.state_dir, f"{key}.json")
+    
+    @contextmanager
+    def _state_lock(self, key: str) -> Iterator[None]:
+        """Serialize publishing an environment's snapshot across processes"""
+        if self.state_dir is None or fcntl is None:
+            yield
+            return
+        with open(self._state_path(key) + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            yield
+    
+    def _load_state(self, key: str) -> None:
+        """Pick up a snapshot another process published since the last call (caller holds the lock)"""
+        if self.state_dir is None:
+            return
+        try:
+            f = open(self._state_path(key))
+        except FileNotFoundError:
+            return
+        
+        with f:
+            stat_result = os.fstat(f.fileno())
+            signature = (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+            if self.state_signatures.get(key) == signature:
+                return
+            try:
+                state = json.load(f)
+            except ValueError as e:
+                logger.error(f"Ignoring unreadable status snapshot {self._state_path(key)}: {str(e)}")
+                return
+        
+        self._restore_state(key, state)
+        self.state_signatures[key] = signature
+    
+    def _restore_state(self, key: str, state: Dict[str, Any]) -> None:
+        snapshot = state["snapshot"]
+        self.snapshots[key] = snapshot
+        self.fingerprints[key] = self._fingerprints(snapshot["results"])
+        # The change log travels with the snapshot, so any process answers deltas the same way
+        self.changed_versions[key] = {(host_id, instance_id): version for host_id, instance_id, version in state["changed"]}
+        self.removed_versions[key] = {(host_id, instance_id): version for host_id, instance_id, version in state["removed"]}
+        self.history_start[key] = state["history_start"]
+    
+    def _save_state(self, key: str) -> None:
+        """Publish an environment's snapshot (caller holds the lock and the state lock)"""
+        if self.state_dir is None:
+            return
+        path = self._state_path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        state = {
+            "snapshot": self.snapshots[key],
+            "changed": [[*item, version] for item, version in self.changed_versions.get(key, {}).items()],
+            "removed": [[*item, version] for item, version in self.removed_versions.get(key, {}).items()],
+            "history_start": self.history_start.get(key, self.snapshots[key]["version"])
+        }
+        with open(temp_path, "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+        os.replace(temp_path, path)
+        stat_result = os.stat(path)
+        self.state_signatures[key] = (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+
+    def refresh(self, environment: str, username: Optional[str] = None,
+                password: Optional[str] = None,
+                deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Sweep an environment now and store the results
+        
+        Concurrent refreshes of the same environment are coalesced: a caller
+        that waited for a sweep started after its own request reuses it.
+        
+        With a deadline, a sweep that has not finished in time returns a
+        partial snapshot (unfinished instances "pending", version None) that is
+        not stored; the sweep carries on and stores the full results when done.
+        
+        Args:
+            environment: "production" or "non-production"
+            username: JBoss username, defaults to the poller's
+            password: JBoss password, defaults to the poller's
+            deadline: Optional time budget in seconds
+            
+        Returns:
+            The new snapshot, or a partial snapshot if the deadline was reached
+        """
+        key = self._key(environment)
+        requested_at = time.time()
+        refresh_lock = self.refresh_locks.setdefault(key, threading.Lock())
+        
+        if not refresh_lock.acquire(timeout=-1 if deadline is None else deadline):
+            # Another sweep is still running; serve what we have
+            return self.get_snapshot(key) or self._partial_snapshot(
+                key, self.monitoring_service.pending_results(self.storage.get_all_hosts(key)), requested_at
+            )
+        
+        handed_off = False
+        try:
+            with self.lock:
+                self._load_state(key)
+                current = self.snapshots.get(key)
+            if current and current["started_at"] >= requested_at:
+                return self._with_age(current)
+            
+            started_at = time.time()
+            hosts = self.storage.get_all_hosts(key)
+            
+            def finish(results: List[Dict[str, Any]]) -> None:
+                # Runs on the caller's thread or, after a deadline, on the thread finishing the last probe
+                try:
+                    logger.info(f"Swept {len(hosts)} {key} hosts in {time.time() - started_at:.1f}s")
+                    self.store(key, results, started_at)
+                finally:
+                    refresh_lock.release()
+            
+            remaining = None if deadline is None else max(0.0, deadline - (time.time() - requested_at))
+            results = self.monitoring_service.check_all_hosts(
+                hosts,
+                username or self.username,
+                password or self.password,
+                key,
+                deadline=remaining,
+                on_complete=finish
+            )
+            handed_off = True
+        finally:
+            if not handed_off:
+                refresh_lock.release()
+        
+        if any(instance.get("status") == "pending" for host in results for instance in host.get("instances", [])):
+            return self._partial_snapshot(key, results, started_at)
+        return self.get_snapshot(key)
+    
+    def iter_refresh(self, environment: str, username: Optional[str] = None,
+                     password: Optional[str] = None,
+                     on_complete: Optional[Callable[[Dict[str, Any]], None]] = None
+                     ) -> Iterator[Tuple[Dict[str, Any], Optional[Dict[str, Any]], bool]]:
+        """
+        Sweep an environment now, yielding each instance as soon as its probe completes
+        
+        Coalesced with refresh(): a caller that waited for a sweep started
+        after its own request gets that sweep's results instead. The sweep
+        runs on its own thread and holds the refresh lock only until it is
+        stored, so a client reading slowly (or not at all) does not hold up
+        background sweeps or other refreshes; a sweep whose client went away
+        still finishes and is stored.
+        
+        Args:
+            environment: "production" or "non-production"
+            username: JBoss username, defaults to the poller's
+            password: JBoss password, defaults to the poller's
+            on_complete: Called with the stored snapshot after the last instance
+        
+        Yields:
+            (host, instance, host complete) in completion order, where host is
+            the host's entry in the results (its "instances" fill in as probes
+            finish) and host complete is True for the host's last instance. A
+            host without instances is yielded once, as (host, None, True).
+        """
+        key = self._key(environment)
+        requested_at = time.time()
+        refresh_lock = self.refresh_locks.setdefault(key, threading.Lock())
+        events = queue.Queue()
+        
+        def sweep() -> None:
+            try:
+                with refresh_lock:
+                    with self.lock:
+                        self._load_state(key)
+                        current = self.snapshots.get(key)
+                    if current and current["started_at"] >= requested_at:
+                        for event in instance_events(current["results"]):
+                            events.put(event)
+                        events.put((SWEEP_DONE, self._with_age(current)))
+                        return
+                    
+                    started_at = time.time()
+                    hosts = self.storage.get_all_hosts(key)
+                    results = [
+                        {"id": host.get("id"), "hostname": host.get("hostname"),
+                         "instances": [None] * len(host.get("instances", []))}
+                        for host in hosts
+                    ]
+                    remaining = [len(host["instances"]) for host in results]
+                    
+                    for host in results:
+                        if not host["instances"]:
+                            events.put((host, None, True))
+                    
+                    for host_index, instance_index, instance_result in self.monitoring_service.iter_instance_results(
+                            hosts, username or self.username, password or self.password, key):
+                        results[host_index]["instances"][instance_index] = instance_result
+                        remaining[host_index] -= 1
+                        events.put((results[host_index], instance_result, not remaining[host_index]))
+                    
+                    logger.info(f"Swept {len(hosts)} {key} hosts in {time.time() - started_at:.1f}s")
+                    snapshot = self.store(key, results, started_at)
+                    if snapshot["started_at"] != started_at:
+                        # A newer sweep was stored first; its version does not describe the results yielded
+                        snapshot["version"] = None
+                events.put((SWEEP_DONE, snapshot))
+            except Exception as e:
+                logger.exception(f"Streamed sweep of {key} failed: {str(e)}")
+                events.put((SWEEP_DONE, e))
+        
+        threading.Thread(target=sweep, name=f"status-refresh-{key}", daemon=True).start()
+        
+        while True:
+            event = events.get()
+            if event[0] is SWEEP_DONE:
+                break
+            yield event
+        
+        if isinstance(event[1], Exception):
+            raise event[1]
+        if on_complete is not None:
+            on_complete(event[1])
+    
+    @staticmethod
+    def _partial_snapshot(key: str, results: List[Dict[str, Any]], started_at: float) -> Dict[str, Any]:
+        """Wrap the results of an unfinished sweep; partial snapshots are never stored"""
+        return {
+            "environment": key,
+            "results": results,
+            "timestamp": datetime.now().isoformat(),
+            "started_at": started_at,
+            "completed_at": None,
+            "version": None,
+            "age_seconds": 0.0,
+            "partial": True,
+            "pending": sum(
+                1 for host in results for instance in host.get("instances", [])
+                if instance.get("status") == "pending"
+            )
+        }
+    
+    def store(self, environment: str, results: List[Dict[str, Any]], started_at: float) -> Dict[str, Any]:
+        """
+        Store the results of a sweep run elsewhere (e.g. a streamed sweep) as the latest snapshot
+
+        Args:
+            environment: "production" or "non-production"
+            results: Host status dictionaries
+            started_at: Epoch seconds the sweep started
+
+        Returns:
+            The stored snapshot
+        """
+        key = self._key(environment)
+        snapshot = {
+            "environment": key,
+            "results": results,
+            "timestamp": datetime.now().isoformat(),
+            "started_at": started_at,
+            "completed_at": time.time()
+        }
+
+        with self.lock, self._state_lock(key):
+            self._load_state(key)
+            current = self.snapshots.get(key)
+            if current is not None and current["started_at"] > started_at:
+                # A newer sweep finished first
+                return self._with_age(current)
+            snapshot["version"] = self._track_changes(key, results, current)
+            self.snapshots[key] = snapshot
+            self._save_state(key)
+
+        # One sample per sweep: workers that are not the elected poller leave
+        # their on-demand sweeps out of the history (with the poller disabled,
+        # the first process to store a sweep is elected)
+        if self.history is not None and self._lead():
+            self.history.record(key, results, started_at)
+
+        return self._with_age(snapshot)
+
+    @staticmethod
+    def _fingerprints(results: List[Dict[str, Any]]) -> Dict[Tuple[Any, Any], str]:
+        """Fingerprint every host and instance by the fields the dashboard shows"""
+        fingerprints = {}
+        for host in results:
+            host_id = host.get("id")
+            fingerprints[(host_id, None)] = json.dumps(
+                [host.get("hostname"), host.get("status"), host.get("statusMessage")]
+            )
+            for instance in host.get("instances", []):
+                fingerprints[(host_id, instance.get("id"))] = json.dumps([
+                    instance.get("name"),
+                    instance.get("port"),
+                    instance.get("status"),
+                    [(ds.get("name"), ds.get("status")) for ds in instance.get("datasources", [])],
+                    [(war.get("name"), war.get("status")) for war in instance.get("warFiles", [])]
+                ])
+        return fingerprints
+
+    def _track_changes(self, key: str, results: List[Dict[str, Any]],
+                       previous: Optional[Dict[str, Any]]) -> int:
+        """
+        Record which hosts and instances changed in a sweep (caller holds the lock)
+
+        Returns:
+            The snapshot version: unchanged if nothing changed, otherwise a new,
+            larger version (milliseconds since the epoch, so it also increases
+            across restarts)
+        """
+        old = self.fingerprints.get(key, {})
+        new = self._fingerprints(results)
+
+        changed = [item for item, fingerprint in new.items() if old.get(item) != fingerprint]
+        removed = [item for item in old if item not in new]
+
+        if previous is not None and not changed and not removed:
+            return previous["version"]
+
+        version = int(time.time() * 1000)
+        if previous is not None:
+            version = max(version, previous["version"] + 1)
+
+        changed_versions = self.changed_versions.setdefault(key, {})
+        removed_versions = self.removed_versions.setdefault(key, {})
+        for item in changed:
+            changed_versions[item] = version
+            removed_versions.pop(item, None)
+        for item in removed:
+            changed_versions.pop(item, None)
+            removed_versions[item] = version
+
+        self.fingerprints[key] = new
+        self.history_start.setdefault(key, version)
+        
+        # Forget changes no delta can ask for any more; versions are epoch milliseconds
+        cutoff = version - int(self.delta_history * 1000)
+        if cutoff > self.history_start[key]:
+            self.history_start[key] = cutoff
+            for versions in (changed_versions, removed_versions):
+                for item in [item for item, item_version in versions.items() if item_version <= cutoff]:
+                    del versions[item]
+        return version
+
+    def get_changes(self, environment: str, since: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the hosts and instances that changed after a version
+
+        Args:
+            environment: "production" or "non-production"
+            since: Version the client already has
+
+        Returns:
+            Dictionary with version, changed hosts (each with only its changed
+            instances) and removed host/instance IDs, or None if since is not
+            within the recorded history and the client needs the full results
+        """
+        key = self._key(environment)
+
+        with self.lock:
+            self._load_state(key)
+            snapshot = self.snapshots.get(key)
+            if snapshot is None or since < self.history_start.get(key, 0) or since > snapshot["version"]:
+                return None
+
+            changed_versions = dict(self.changed_versions.get(key, {}))
+            removed = [
+                {"host_id": host_id, "instance_id": instance_id}
+                for (host_id, instance_id), version in self.removed_versions.get(key, {}).items()
+                if version > since
+            ]
+
+        changes = []
+        for host in snapshot["results"]:
+            host_id = host.get("id")
+            instances = [
+                instance for instance in host.get("instances", [])
+                if changed_versions.get((host_id, instance.get("id")), 0) > since
+            ]
+            if instances or changed_versions.get((host_id, None), 0) > since:
+                host_change = {k: v for k, v in host.items() if k != "instances"}
+                host_change["instances"] = instances
+                changes.append(host_change)
+
+        return {
+            "version": snapshot["version"],
+            "since": since,
+            "changes": changes,
+            "removed": removed
+        }
+
+    @staticmethod
+    def _with_age(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        result = dict(snapshot)
+        result["age_seconds"] = round(time.time() - snapshot["completed_at"], 1)
+        return result
+
+    def get_snapshot(self, environment: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the latest cached snapshot for an environment
+
+        Args:
+            environment: "production" or "non-production"
+
+        Returns:
+            Snapshot with results, timestamp and age_seconds, or None if the
+            environment has not been swept yet
+        """
+        key = self._key(environment)
+        with self.lock:
+            self._load_state(key)
+            snapshot = self.snapshots.get(key)
+
+        if snapshot is None:
+            return None
+        return self._with_age(snapshot)
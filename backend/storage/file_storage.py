@@ -1,31 +1,410 @@
 # storage/file_storage.py
 import os
+import bisect
+import csv
+import gzip
+import io
+import itertools
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable
 import threading
 from datetime import datetime
+from storage.report_retention import retention_policy, plan_retention, report_age
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock applies
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+# Appended to a registry file's path to name its journal
+JOURNAL_SUFFIX = ".journal"
+
+# Appended to a registry file's path to name the file locked across worker processes
+LOCK_SUFFIX = ".lock"
+
+# Report metadata index in the reports directory, one JSON object per line
+REPORT_INDEX_FILE = "index.jsonl"
+
+# Reports are saved as gzip-compressed compact JSON; older versions saved indented .json
+REPORT_SUFFIX = ".json.gz"
+LEGACY_REPORT_SUFFIX = ".json"
+REPORT_COMPRESSLEVEL = 6
+
+# Reports past their environment's first retention tier are rolled up into one
+# archive per environment and day: gzip-compressed lines of {"id": ..., "report": ...}
+REPORT_ARCHIVE_DIR = "archive"
+REPORT_ARCHIVE_SUFFIX = ".jsonl.gz"
+REPORT_COMPACTION_LOCK = "compaction.lock"
+
+# Characters decoded at a time when streaming a report
+REPORT_READ_CHUNK = 65536
+
+def expand_hostname_entry(host_data: Dict[str, Any]) -> None:
+    """
+    Split a "hostname port instance_name" hostname into the hostname and an instance
+    
+    Args:
+        host_data: Host dictionary, updated in place
+    """
+    # Check if hostname includes port and instance (space-separated)
+    hostname = host_data.get("hostname", "")
+    logger.info(f"Adding host with data: {host_data}, hostname: {hostname}")
+    
+    if isinstance(hostname, str) and ' ' in hostname:
+        parts = hostname.strip().split()
+        if len(parts) >= 3:
+            # Format is "hostname port instance_name"
+            hostname = parts[0]
+            try:
+                port = int(parts[1])
+                instance_name = ' '.join(parts[2:])
+                
+                # Update host data
+                host_data["hostname"] = hostname
+                if "instances" not in host_data:
+                    host_data["instances"] = []
+                
+                # Add instance
+                host_data["instances"].append({
+                    "name": instance_name,
+                    "port": port
+                })
+            except ValueError:
+                logger.error(f"Invalid port number in hostname: {hostname}")
+
+def parse_bulk_entry(entry: str) -> Optional[Tuple[str, int, str]]:
+    """
+    Parse a bulk entry in the format "hostname port instance_name"
+    
+    Args:
+        entry: The bulk entry line
+        
+    Returns:
+        Tuple of (hostname, port, instance_name), or None if the entry is invalid
+    """
+    logger.debug(f"Processing bulk entry: {entry}")
+    parts = entry.strip().split()
+    if len(parts) < 3:
+        logger.warning(f"Skipping invalid entry (not enough parts): {entry}")
+        return None
+    
+    hostname = parts[0]
+    try:
+        port = int(parts[1])
+    except ValueError:
+        logger.warning(f"Invalid port number in entry: {entry}")
+        return None
+    
+    return hostname, port, ' '.join(parts[2:])
+
+def iter_import_outcomes(lines: Iterable[str], environment: str,
+                         bulk_add: Callable[[List[str], str], Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]],
+                         chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """
+    Feed import lines to a storage's bulk add in chunks and report every line
+    
+    Blank lines and "#" comments are skipped. CSV lines ("host,port,name")
+    are turned into the space separated bulk format. Only one chunk is held
+    in memory at a time.
+    
+    Args:
+        lines: Lines of the uploaded file
+        environment: "production" or "non-production"
+        bulk_add: The storage's _bulk_add
+        chunk_size: Entries written per commit
+        
+    Yields:
+        {"line", "entry", "result"} plus host_id / instance_id where known
+    """
+    chunk = []
+    
+    def commit():
+        _, outcomes = bulk_add([entry for _, entry in chunk], environment)
+        for (line_number, entry), outcome in zip(chunk, outcomes):
+            report = {"line": line_number, "entry": entry}
+            report.update(outcome)
+            yield report
+        chunk.clear()
+    
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "," in line:
+            line = " ".join(field.strip() for field in next(csv.reader([line])))
+        
+        chunk.append((line_number, line))
+        if len(chunk) >= chunk_size:
+            yield from commit()
+    
+    if chunk:
+        yield from commit()
+
+def report_file_id(filename: str) -> Optional[str]:
+    """Get the report ID from a report file name, or None if the file is not a report"""
+    for suffix in (REPORT_SUFFIX, LEGACY_REPORT_SUFFIX):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+def read_report_file(path: str) -> Dict[str, Any]:
+    """
+    Read a report file, compressed or legacy
+    
+    Args:
+        path: Path of a .json.gz or .json report
+    
+    Returns:
+        Report data
+    """
+    if path.endswith(REPORT_SUFFIX):
+        with gzip.open(path, "rb") as f:
+            return json.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+def write_report_file(path: str, report_data: Dict[str, Any]) -> int:
+    """
+    Atomically write a report as gzip-compressed compact JSON
+    
+    Args:
+        path: Path of the .json.gz report
+        report_data: Report data
+    
+    Returns:
+        Bytes written
+    """
+    data = gzip.compress(json.dumps(report_data, separators=(",", ":")).encode("utf-8"), REPORT_COMPRESSLEVEL)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(data)
+
+def iter_report_results(chunks: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the hosts of a report's "results" array while decoding the report chunk by chunk
+    
+    Only one host is decoded at a time, so memory is bounded by the chunk
+    and host size instead of the report size.
+    
+    Args:
+        chunks: The report's JSON text in pieces
+    
+    Yields:
+        Host status dictionaries
+    
+    Raises:
+        ValueError: If the report is not a JSON object or is truncated
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    eof = False
+    
+    def more():
+        nonlocal buffer, position, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+    
+    def peek():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not more():
+                raise ValueError("Unexpected end of report")
+    
+    def decode():
+        nonlocal position
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+                # A number or literal at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    position = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+    
+    if peek() != "{":
+        raise ValueError("Report is not a JSON object")
+    position += 1
+    
+    while True:
+        token = peek()
+        if token == "}":
+            return
+        if token == ",":
+            position += 1
+            continue
+        
+        key = decode()
+        if peek() != ":":
+            raise ValueError("Malformed report")
+        position += 1
+        
+        if key != "results" or peek() != "[":
+            decode()
+            continue
+        
+        position += 1
+        while True:
+            token = peek()
+            if token == "]":
+                position += 1
+                break
+            if token == ",":
+                position += 1
+                continue
+            yield decode()
+
+def instance_failed(instance: Dict[str, Any]) -> bool:
+    """True if an instance is not online or has a datasource or deployment that is not up"""
+    return (instance.get("status") != "online"
+            or any(ds.get("status") != "connected" for ds in instance.get("datasources") or [])
+            or any(war.get("status") != "deployed" for war in instance.get("warFiles") or []))
+
+def filter_report_results(results: Iterable[Dict[str, Any]], statuses: Optional[Iterable[str]] = None,
+                          hostname_prefix: Optional[str] = None,
+                          failed_only: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Narrow a report's host results down to the matching hosts and instances
+    
+    Args:
+        results: Host status dictionaries, possibly streamed
+        statuses: Instance statuses to keep (all if None)
+        hostname_prefix: Keep only hosts whose hostname starts with this
+        failed_only: Keep only instances that are not fully up (see instance_failed)
+    
+    Yields:
+        Matching hosts, with only their matching instances if an instance
+        filter is given; hosts left without instances are skipped
+    """
+    statuses = set(statuses) if statuses else None
+    for host in results:
+        if hostname_prefix and not (host.get("hostname") or "").startswith(hostname_prefix):
+            continue
+        if statuses is None and not failed_only:
+            yield host
+            continue
+        instances = [
+            instance for instance in host.get("instances", [])
+            if (statuses is None or instance.get("status") in statuses)
+            and (not failed_only or instance_failed(instance))
+        ]
+        if instances:
+            yield dict(host, instances=instances)
+
+def page_report_results(results: Iterator[Dict[str, Any]], offset: int = 0, limit: Optional[int] = None,
+                        **filters: Any) -> Dict[str, Any]:
+    """
+    Get one page of a report's (filtered) host results
+    
+    Reading stops as soon as the page is full, so with streamed results the
+    rest of the report is never decoded.
+    
+    Args:
+        results: Host status dictionaries, possibly streamed
+        offset: Matching hosts to skip
+        limit: Maximum number of hosts to return (all remaining if None)
+        **filters: statuses, hostname_prefix and failed_only, see filter_report_results
+    
+    Returns:
+        Dictionary with results (the page), offset, limit and hasMore
+    """
+    try:
+        # One host past the page tells whether there is another page
+        stop = offset + limit + 1 if limit is not None else None
+        page = list(itertools.islice(filter_report_results(results, **filters), offset, stop))
+    finally:
+        # Close the report file now instead of when the generator is collected
+        if hasattr(results, "close"):
+            results.close()
+    
+    has_more = limit is not None and len(page) > limit
+    return {"results": page[:limit] if has_more else page, "offset": offset, "limit": limit, "hasMore": has_more}
+
+def read_registry(file_path: str) -> Dict[str, Any]:
+    """
+    Read a host registry file with its journal replayed on top
+    
+    Args:
+        file_path: Path of the registry snapshot
+    
+    Returns:
+        Dictionary with the "hosts" list and the "next_host_id" and
+        "next_instance_id" still free
+    """
+    entry = FileStorage._load(file_path)
+    return {key: entry[key] for key in ("hosts", "next_host_id", "next_instance_id")}
+
 class FileStorage:
     """
     Simple file-based storage system for managing hosts and instances.
     Uses JSON files to store configuration data.
+    
+    Each environment's registry is a JSON snapshot plus an append-only
+    journal next to it. A mutation appends the new state of the hosts it
+    touched (or a host deletion) to the journal and fsyncs it, so a write
+    costs O(change) instead of rewriting the registry. The journal is
+    compacted into the snapshot in the background with an atomic rename,
+    and replayed on top of the snapshot whenever the registry is loaded.
+    
+    Several processes (gunicorn workers) may share a storage directory.
+    Each registry has a lock file, locked shared to load it and exclusive
+    to change it, and every mutation revalidates its cached copy under the
+    exclusive lock, so one worker never writes on top of a stale view.
     """
     
-    def __init__(self, storage_dir: str = "data"):
+    def __init__(self, storage_dir: str = "data", journal_compact_threshold: Optional[int] = None):
         """
         Initialize the file storage
         
         Args:
             storage_dir: Directory to store the data files
+            journal_compact_threshold: Journal records that trigger a compaction
         """
         self.storage_dir = storage_dir
         self.prod_file = os.path.join(storage_dir, "production_hosts.json")
         self.nonprod_file = os.path.join(storage_dir, "nonproduction_hosts.json")
         self.reports_dir = os.path.join(storage_dir, "reports")
-        self.lock = threading.Lock()
+        self.report_index_path = os.path.join(self.reports_dir, REPORT_INDEX_FILE)
+        self.archive_dir = os.path.join(self.reports_dir, REPORT_ARCHIVE_DIR)
+        self.report_compaction_lock = threading.Lock()
+        # Reentrant because a cache reload takes it from inside the mutating methods
+        self.lock = threading.RLock()
+        # File path -> True/False while this process holds its exclusive/shared file lock
+        self.file_locks: Dict[str, bool] = {}
+        
+        # Parsed, indexed registry per data file, keyed by file path. An entry is
+        # reused while the (mtime, size, inode) signatures of the snapshot and
+        # its journal are unchanged.
+        self.cache: Dict[str, Dict[str, Any]] = {}
+        
+        # Parsed report metadata index, extended from the last offset read while
+        # the index file only grows
+        self.report_index: Optional[Dict[str, Any]] = None
+        
+        self.journal_compact_threshold = journal_compact_threshold or int(
+            os.environ.get("STORAGE_JOURNAL_COMPACT_THRESHOLD", "1000")
+        )
+        self.compact_event = threading.Event()
         
         # Create storage directory if it doesn't exist
         if not os.path.exists(storage_dir):
@@ -35,38 +414,444 @@ class FileStorage:
         if not os.path.exists(self.reports_dir):
             os.makedirs(self.reports_dir)
         
-        # Initialize files if they don't exist
+        # Initialize files if they don't exist (another worker may be doing the same)
         for file_path in [self.prod_file, self.nonprod_file]:
-            if not os.path.exists(file_path):
-                with open(file_path, "w") as f:
+            try:
+                with open(file_path, "x") as f:
                     json.dump([], f)
+            except FileExistsError:
+                pass
+        
+        self.compactor = threading.Thread(target=self._compact_loop, name="storage-compactor", daemon=True)
+        self.compactor.start()
     
     def _get_file_path(self, environment: str) -> str:
         """Get the appropriate file path based on environment"""
         return self.prod_file if environment.lower() == "production" else self.nonprod_file
     
+    def _locked(self, environment: str, exclusive: bool = True):
+        """Lock an environment's registry (see _file_lock)"""
+        return self._file_lock(self._get_file_path(environment), exclusive)
+    
+    @contextmanager
+    def _file_lock(self, file_path: str, exclusive: bool = True) -> Iterator[None]:
+        """
+        Hold the in-process lock and a data file's cross-process file lock
+        
+        Nested calls reuse the file lock already held, so a shared lock must
+        not be followed by an exclusive one further down the same call.
+        
+        Args:
+            file_path: Path of the registry or index file
+            exclusive: Exclusive (writer) lock if True, shared (reader) lock otherwise
+        """
+        with self.lock:
+            if fcntl is None or file_path in self.file_locks:
+                yield
+                return
+            
+            fd = os.open(file_path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self.file_locks[file_path] = exclusive
+                yield
+            finally:
+                self.file_locks.pop(file_path, None)
+                # Closing the descriptor releases the lock
+                os.close(fd)
+    
+    @staticmethod
+    def _signature(stat_result: os.stat_result) -> Tuple[int, int, int]:
+        return (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+    
+    @staticmethod
+    def _path_signature(path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            return FileStorage._signature(os.stat(path))
+        except FileNotFoundError:
+            return None
+    
+    @staticmethod
+    def _cache_entry(hosts: List[Dict[str, Any]], signature: Any,
+                     next_host_id: int = 1, next_instance_id: int = 1) -> Dict[str, Any]:
+        """
+        Index a registry by host ID, hostname and instance ID (first occurrence
+        wins, like a scan) and note the next free IDs, so allocating an ID does
+        not scan the registry
+        
+        The next IDs never go below the ones passed in, so IDs of deleted
+        hosts and instances are not handed out again.
+        """
+        hosts_by_id = {}
+        hosts_by_hostname = {}
+        host_positions = {}
+        instances_by_id = {}
+        max_host_id = 0
+        max_instance_id = 0
+        for position, host in enumerate(hosts):
+            hosts_by_id.setdefault(host.get("id"), host)
+            hosts_by_hostname.setdefault(host.get("hostname"), host)
+            host_positions.setdefault(host.get("id"), position)
+            max_host_id = max(max_host_id, host.get("id", 0))
+            for instance in host.get("instances", []):
+                instances_by_id.setdefault(instance.get("id"), (host, instance))
+                max_instance_id = max(max_instance_id, instance.get("id", 0))
+        
+        return {
+            "signature": signature,
+            "hosts": hosts,
+            "hosts_by_id": hosts_by_id,
+            "hosts_by_hostname": hosts_by_hostname,
+            "host_positions": host_positions,
+            "instances_by_id": instances_by_id,
+            "next_host_id": max(next_host_id, max_host_id + 1),
+            "next_instance_id": max(next_instance_id, max_instance_id + 1),
+            "journal_records": 0
+        }
+    
+    @staticmethod
+    def _reindex(entry: Dict[str, Any], hosts: List[Dict[str, Any]]) -> None:
+        """Rebuild a cache entry's indexes for a new hosts list, keeping its counters"""
+        entry.update(
+            FileStorage._cache_entry(hosts, entry["signature"], entry["next_host_id"], entry["next_instance_id"]),
+            journal_records=entry["journal_records"]
+        )
+
+    @staticmethod
+    def _apply(entry: Dict[str, Any], record: Dict[str, Any]) -> None:
+        """
+        Apply a journal record to a cache entry
+        
+        A record is {"host": <full host>} (replace the host with that ID, or
+        append it) or {"delete_host": <id>}. Replaying a record twice gives the
+        same state, so a journal may safely be replayed over a snapshot that
+        already contains some of it. The hosts list is replaced, never modified
+        in place, so lists handed out to readers do not change under them.
+        """
+        if "delete_host" in record:
+            position = entry["host_positions"].get(record["delete_host"])
+            if position is not None:
+                FileStorage._reindex(entry, entry["hosts"][:position] + entry["hosts"][position + 1:])
+            return
+        
+        host = record["host"]
+        host_id = host.get("id")
+        hosts = list(entry["hosts"])
+        position = entry["host_positions"].get(host_id)
+        
+        if position is not None:
+            old = hosts[position]
+            hosts[position] = host
+            new_instance_ids = {instance.get("id") for instance in host.get("instances", [])}
+            if old.get("hostname") != host.get("hostname") or any(
+                    instance.get("id") not in new_instance_ids for instance in old.get("instances", [])):
+                # Something was removed or renamed: reindex to keep first-occurrence lookups exact
+                FileStorage._reindex(entry, hosts)
+                return
+            
+            entry["hosts_by_id"][host_id] = host
+            if entry["hosts_by_hostname"].get(host.get("hostname")) is old:
+                entry["hosts_by_hostname"][host.get("hostname")] = host
+            for instance in host.get("instances", []):
+                indexed = entry["instances_by_id"].get(instance.get("id"))
+                if indexed is not None and indexed[0] is old:
+                    entry["instances_by_id"][instance.get("id")] = (host, instance)
+        else:
+            # New IDs are always the highest, so this is an append; keeping ID order
+            # makes replaying a delete and re-add over a newer snapshot land in place
+            position = len(hosts)
+            while position and hosts[position - 1].get("id", 0) > host_id:
+                position -= 1
+            if position < len(hosts):
+                hosts.insert(position, host)
+                FileStorage._reindex(entry, hosts)
+                return
+
+            entry["host_positions"][host_id] = position
+            hosts.append(host)
+            entry["hosts_by_id"][host_id] = host
+            entry["hosts_by_hostname"].setdefault(host.get("hostname"), host)
+        
+        for instance in host.get("instances", []):
+            entry["instances_by_id"].setdefault(instance.get("id"), (host, instance))
+            entry["next_instance_id"] = max(entry["next_instance_id"], instance.get("id", 0) + 1)
+        entry["next_host_id"] = max(entry["next_host_id"], host_id + 1)
+        entry["hosts"] = hosts
+    
+    @staticmethod
+    def _load(file_path: str) -> Dict[str, Any]:
+        """
+        Read a snapshot and replay its journal into a cache entry
+        
+        The journal is read before the snapshot. Compaction replaces the
+        snapshot before trimming the journal, so whatever interleaving happens
+        the journal read covers everything the snapshot is missing.
+        
+        A snapshot is {"next_host_id", "next_instance_id", "hosts"}; a plain
+        list of hosts (the original format) is still read. Replaying records
+        only ever raises the next IDs, so with the counters kept in the
+        snapshot an ID is never reused, even after its host was deleted and
+        the journal compacted.
+        """
+        journal_path = file_path + JOURNAL_SUFFIX
+        records = []
+        journal_signature = None
+        try:
+            with open(journal_path, "r") as f:
+                journal_signature = FileStorage._signature(os.fstat(f.fileno()))
+                for line_number, line in enumerate(f, 1):
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Normally a torn final append that was never acknowledged
+                        logger.warning(f"Skipping unreadable journal record {journal_path}:{line_number}")
+        except FileNotFoundError:
+            pass
+        
+        logger.info(f"Reading data from {file_path}")
+        with open(file_path, "r") as f:
+            snapshot_signature = FileStorage._signature(os.fstat(f.fileno()))
+            snapshot = json.load(f)
+        
+        if isinstance(snapshot, list):
+            entry = FileStorage._cache_entry(snapshot, None)
+        else:
+            entry = FileStorage._cache_entry(
+                snapshot.get("hosts", []), None, snapshot.get("next_host_id", 1), snapshot.get("next_instance_id", 1)
+            )
+        for record in records:
+            FileStorage._apply(entry, record)
+        
+        if records:
+            logger.info(f"Replayed {len(records)} journal records onto {file_path}")
+        entry["signature"] = (snapshot_signature, journal_signature)
+        entry["journal_records"] = len(records)
+        return entry
+    
+    def _cached(self, environment: str, for_write: bool = False) -> Dict[str, Any]:
+        """
+        Get the cached registry, reloading it only if the snapshot or journal changed on disk
+        
+        Other workers' changes show up as a changed signature. Writers call
+        this under the exclusive lock, so what they see is current.
+        
+        Args:
+            environment: "production" or "non-production"
+            for_write: Raise if the registry cannot be read, instead of
+                reading it as empty (a write on top of an empty view would
+                hand out IDs that are already in use)
+        
+        Raises:
+            OSError, ValueError: If for_write and the registry cannot be read
+        """
+        file_path = self._get_file_path(environment)
+        signature = (self._path_signature(file_path), self._path_signature(file_path + JOURNAL_SUFFIX))
+        
+        entry = self.cache.get(file_path)
+        if entry is not None and entry["signature"] == signature:
+            return entry
+        
+        with self._locked(environment, exclusive=False):
+            entry = self.cache.get(file_path)
+            signature = (self._path_signature(file_path), self._path_signature(file_path + JOURNAL_SUFFIX))
+            if entry is not None and entry["signature"] == signature:
+                return entry
+            
+            try:
+                entry = self._load(file_path)
+            except Exception as e:
+                logger.error(f"Error reading data file {file_path}: {str(e)}")
+                if for_write:
+                    raise
+                return self._cache_entry([], None)
+            
+            self.cache[file_path] = entry
+            if entry["journal_records"] >= self.journal_compact_threshold:
+                self.compact_event.set()
+            return entry
+    
     def _read_data(self, environment: str) -> List[Dict[str, Any]]:
-        """Read data from the appropriate JSON file"""
+        """
+        Read an environment's hosts, from the cache while the files are unchanged
+        
+        The list is shared with the cache and must not be modified;
+        changes go through _append as journal records.
+        """
+        return self._cached(environment)["hosts"]
+    
+    @staticmethod
+    def _fsync_dir(path: str) -> None:
+        """Make a rename or file creation in a directory durable"""
+        try:
+            fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    def _append(self, environment: str, entry: Dict[str, Any], records: List[Dict[str, Any]]) -> bool:
+        """
+        Durably append records to an environment's journal and apply them to its cache entry
+        
+        Args:
+            environment: "production" or "non-production"
+            entry: The cache entry the records were computed from (caller holds the exclusive lock)
+            records: Journal records
+        
+        Returns:
+            True once the records are written
+        
+        Raises:
+            OSError: If the journal could not be written; nothing was applied
+        """
         file_path = self._get_file_path(environment)
+        journal_path = file_path + JOURNAL_SUFFIX
+        payload = "".join(json.dumps(record) + "\n" for record in records)
+        created = not os.path.exists(journal_path)
+        
         try:
-            logger.info(f"Reading data from {file_path}")
-            with open(file_path, "r") as f:
-                return json.load(f)
+            with open(journal_path, "a") as f:
+                start = f.tell()
+                try:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+                except Exception:
+                    # Do not leave a partial record for the next append to run into
+                    f.truncate(start)
+                    raise
+                journal_signature = self._signature(os.fstat(f.fileno()))
         except Exception as e:
-            logger.error(f"Error reading data file {file_path}: {str(e)}")
-            return []
+            logger.error(f"Error writing to journal {journal_path}: {str(e)}")
+            raise
+        
+        if created:
+            self._fsync_dir(journal_path)
+        
+        for record in records:
+            self._apply(entry, record)
+        entry["signature"] = (entry["signature"][0], journal_signature)
+        entry["journal_records"] += len(records)
+        self.cache[file_path] = entry
+        
+        logger.info(f"Journaled {len(records)} changes to {journal_path}")
+        if entry["journal_records"] >= self.journal_compact_threshold:
+            self.compact_event.set()
+        return True
     
-    def _write_data(self, environment: str, data: List[Dict[str, Any]]) -> bool:
-        """Write data to the appropriate JSON file"""
+    def _write_data(self, file_path: str, data: List[Dict[str, Any]],
+                    next_host_id: int, next_instance_id: int) -> str:
+        """
+        Write a snapshot to a temporary file next to file_path and fsync it
+        
+        Args:
+            file_path: Path of the registry snapshot
+            data: Hosts
+            next_host_id: Next free host ID, kept so deleted IDs are not reused
+            next_instance_id: Next free instance ID
+        
+        Returns:
+            Path of the temporary file, for the caller to rename into place
+        """
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        snapshot = {"next_host_id": next_host_id, "next_instance_id": next_instance_id, "hosts": data}
+        with open(temp_path, "w") as f:
+            logger.info(f"Writing {len(data)} hosts to {temp_path}")
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        return temp_path
+    
+    def compact(self, environment: str) -> bool:
+        """
+        Fold an environment's journal into its snapshot
+        
+        The snapshot is written without holding the lock, so mutations keep
+        going; records they append meanwhile stay in the trimmed journal.
+        If another worker compacted in the meantime its snapshot is newer,
+        and this one is discarded.
+        
+        Args:
+            environment: "production" or "non-production"
+        
+        Returns:
+            True if a compaction ran
+        """
         file_path = self._get_file_path(environment)
+        journal_path = file_path + JOURNAL_SUFFIX
+        
+        with self._locked(environment, exclusive=False):
+            entry = self._cached(environment)
+            if not entry["journal_records"] or entry["signature"][1] is None:
+                return False
+            hosts = entry["hosts"]
+            next_host_id, next_instance_id = entry["next_host_id"], entry["next_instance_id"]
+            snapshot_signature, journal_signature = entry["signature"]
+        
         try:
-            with open(file_path, "w") as f:
-                logger.info(f"Writing {len(data)} hosts to {file_path}")
-                json.dump(data, f, indent=2)
-            return True
+            temp_path = self._write_data(file_path, hosts, next_host_id, next_instance_id)
         except Exception as e:
-            logger.error(f"Error writing to data file {file_path}: {str(e)}")
+            logger.error(f"Error compacting {file_path}: {str(e)}")
             return False
+        
+        with self._locked(environment):
+            # Only the same journal file, grown by appends since, may be trimmed
+            current_journal = self._path_signature(journal_path)
+            if (self._path_signature(file_path) != snapshot_signature or current_journal is None
+                    or current_journal[2] != journal_signature[2] or current_journal[1] < journal_signature[1]):
+                logger.info(f"Skipping compaction of {file_path}: another process compacted it first")
+                os.remove(temp_path)
+                return False
+            
+            entry = self.cache.get(file_path)
+            coherent = entry is not None and entry["signature"][1] == current_journal
+            
+            os.replace(temp_path, file_path)
+            self._fsync_dir(file_path)
+            
+            with open(journal_path, "rb") as f:
+                f.seek(journal_signature[1])
+                remainder = f.read()
+            
+            if remainder:
+                temp_path = f"{journal_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(remainder)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, journal_path)
+            else:
+                os.remove(journal_path)
+            self._fsync_dir(journal_path)
+            
+            if coherent:
+                # The cached state already includes both the snapshot and the remainder
+                entry["signature"] = (self._path_signature(file_path), self._path_signature(journal_path))
+                entry["journal_records"] = remainder.count(b"\n")
+            else:
+                # Other workers appended records this process has not loaded yet
+                self.cache.pop(file_path, None)
+        
+        logger.info(f"Compacted {journal_path} into {file_path}")
+        return True
+    
+    def _compact_loop(self) -> None:
+        """Compact journals that grew past the threshold"""
+        while True:
+            self.compact_event.wait()
+            self.compact_event.clear()
+            for file_path, environment in ((self.prod_file, "production"), (self.nonprod_file, "non-production")):
+                entry = self.cache.get(file_path)
+                if entry is None or entry["journal_records"] < self.journal_compact_threshold:
+                    continue
+                try:
+                    self.compact(environment)
+                except Exception as e:
+                    logger.exception(f"Background compaction of {file_path} failed: {str(e)}")
     
     def get_all_hosts(self, environment: str) -> List[Dict[str, Any]]:
         """
@@ -74,7 +859,7 @@ class FileStorage:
         
         Args:
             environment: "production" or "non-production"
-            
+        
         Returns:
             List of host dictionaries
         """
@@ -86,72 +871,31 @@ class FileStorage:
         
         Args:
             host_data: Dictionary containing host information
-            
+        
         Returns:
             The added host with generated ID
         """
         environment = host_data.get("environment", "non-production")
+        expand_hostname_entry(host_data)
         
-        # Check if hostname includes port and instance (space-separated)
-        hostname = host_data.get("hostname", "")
-        logger.info(f"Adding host with data: {host_data}, hostname: {hostname}")
-        
-        if isinstance(hostname, str) and ' ' in hostname:
-            parts = hostname.strip().split()
-            if len(parts) >= 3:
-                # Format is "hostname port instance_name"
-                hostname = parts[0]
-                try:
-                    port = int(parts[1])
-                    instance_name = ' '.join(parts[2:])
-                    
-                    # Update host data
-                    host_data["hostname"] = hostname
-                    if "instances" not in host_data:
-                        host_data["instances"] = []
-                    
-                    # Add instance
-                    host_data["instances"].append({
-                        "name": instance_name,
-                        "port": port
-                    })
-                except ValueError:
-                    logger.error(f"Invalid port number in hostname: {hostname}")
-        
-        with self.lock:
-            hosts = self._read_data(environment)
-            
-            # Generate a new ID
-            host_id = 1
-            if hosts:
-                host_id = max(host.get("id", 0) for host in hosts) + 1
+        with self._locked(environment):
+            cached = self._cached(environment, for_write=True)
+            next_instance_id = cached["next_instance_id"]
             
             # Create new host with ID
             new_host = {
-                "id": host_id,
+                "id": cached["next_host_id"],
                 "hostname": host_data.get("hostname", ""),
                 "instances": host_data.get("instances", [])
             }
             
             # Generate IDs for instances if needed
-            for i, instance in enumerate(new_host["instances"]):
+            for instance in new_host["instances"]:
                 if "id" not in instance:
-                    instance_id = 1
-                    if hosts:
-                        # Find highest instance ID across all hosts
-                        instance_id = 1
-                        for h in hosts:
-                            for inst in h.get("instances", []):
-                                if inst.get("id", 0) >= instance_id:
-                                    instance_id = inst.get("id", 0) + 1
-                    
-                    instance["id"] = instance_id
+                    instance["id"] = next_instance_id
+                    next_instance_id += 1
             
-            # Add host to the list
-            hosts.append(new_host)
-            
-            # Write updated data
-            self._write_data(environment, hosts)
+            self._append(environment, cached, [{"host": new_host}])
             
             return new_host
     
@@ -163,40 +907,30 @@ class FileStorage:
             host_id: ID of the host
             instance_data: Dictionary containing instance information
             environment: "production" or "non-production"
-            
+        
         Returns:
             The added instance with generated ID, or None if host not found
         """
-        with self.lock:
-            hosts = self._read_data(environment)
+        with self._locked(environment):
+            cached = self._cached(environment, for_write=True)
             
             # Find the host
-            host_index = next((i for i, h in enumerate(hosts) if h.get("id") == host_id), None)
-            if host_index is None:
+            host = cached["hosts_by_id"].get(host_id)
+            if host is None:
                 return None
             
-            # Generate a new instance ID
-            instance_id = 1
-            for h in hosts:
-                for inst in h.get("instances", []):
-                    if inst.get("id", 0) >= instance_id:
-                        instance_id = inst.get("id", 0) + 1
-            
             # Create new instance with ID
             new_instance = {
-                "id": instance_id,
+                "id": cached["next_instance_id"],
                 "name": instance_data.get("name", ""),
                 "port": instance_data.get("port", 9990)
             }
             
-            # Add instance to the host
-            if "instances" not in hosts[host_index]:
-                hosts[host_index]["instances"] = []
+            # Add instance to a copy of the host
+            updated_host = dict(host)
+            updated_host["instances"] = list(host.get("instances", [])) + [new_instance]
             
-            hosts[host_index]["instances"].append(new_instance)
-            
-            # Write updated data
-            self._write_data(environment, hosts)
+            self._append(environment, cached, [{"host": updated_host}])
             
             return new_instance
     
@@ -207,20 +941,17 @@ class FileStorage:
         Args:
             host_id: ID of the host to delete
             environment: "production" or "non-production"
-            
+        
         Returns:
             True if successful, False otherwise
         """
-        with self.lock:
-            hosts = self._read_data(environment)
+        with self._locked(environment):
+            cached = self._cached(environment, for_write=True)
             
-            # Find and remove the host
-            for i, host in enumerate(hosts):
-                if host.get("id") == host_id:
-                    del hosts[i]
-                    return self._write_data(environment, hosts)
+            if host_id not in cached["hosts_by_id"]:
+                return False
             
-            return False
+            return self._append(environment, cached, [{"delete_host": host_id}])
     
     def delete_instance(self, instance_id: int, environment: str) -> bool:
         """
@@ -229,22 +960,21 @@ class FileStorage:
         Args:
             instance_id: ID of the instance to delete
             environment: "production" or "non-production"
-            
+        
         Returns:
             True if successful, False otherwise
         """
-        with self.lock:
-            hosts = self._read_data(environment)
+        with self._locked(environment):
+            cached = self._cached(environment, for_write=True)
             
-            # Find and remove the instance
-            for host in hosts:
-                instances = host.get("instances", [])
-                for i, instance in enumerate(instances):
-                    if instance.get("id") == instance_id:
-                        del instances[i]
-                        return self._write_data(environment, hosts)
+            host, instance = cached["instances_by_id"].get(instance_id, (None, None))
+            if host is None:
+                return False
             
-            return False
+            updated_host = dict(host)
+            updated_host["instances"] = [i for i in host.get("instances", []) if i is not instance]
+            
+            return self._append(environment, cached, [{"host": updated_host}])
     
     def get_host_by_id(self, host_id: int, environment: str) -> Optional[Dict[str, Any]]:
         """
@@ -257,13 +987,7 @@ class FileStorage:
         Returns:
             Host dictionary or None if not found
         """
-        hosts = self._read_data(environment)
-        
-        for host in hosts:
-            if host.get("id") == host_id:
-                return host
-        
-        return None
+        return self._cached(environment)["hosts_by_id"].get(host_id)
     
     def get_instance_by_id(self, instance_id: int, environment: str) -> Optional[Dict[str, Any]]:
         """
@@ -276,14 +1000,7 @@ class FileStorage:
         Returns:
             Tuple containing (host, instance) or (None, None) if not found
         """
-        hosts = self._read_data(environment)
-        
-        for host in hosts:
-            for instance in host.get("instances", []):
-                if instance.get("id") == instance_id:
-                    return (host, instance)
-        
-        return (None, None)
+        return self._cached(environment)["instances_by_id"].get(instance_id, (None, None))
     
     def bulk_add_hosts(self, bulk_data: List[str], environment: str) -> List[Dict[str, Any]]:
         """
@@ -296,87 +1013,103 @@ class FileStorage:
         Returns:
             List of added/updated hosts
         """
-        with self.lock:
-            hosts = self._read_data(environment)
+        return self._bulk_add(bulk_data, environment)[0]
+    
+    def _bulk_add(self, bulk_data: Iterable[str], environment: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Add bulk entries in one journal append
+        
+        Returns:
+            The added/updated hosts, and one outcome per entry: "added" (with
+            host_id and instance_id), "duplicate" (with host_id) or "invalid"
+        """
+        with self._locked(environment):
+            cached = self._cached(environment, for_write=True)
+            next_host_id = cached["next_host_id"]
+            next_instance_id = cached["next_instance_id"]
             updated_hosts = []
+            updated = set()
+            outcomes = []
+            
+            # hostname -> (working copy of the first host with that hostname, its (name, port) pairs).
+            # Only hosts the entries touch are copied.
+            by_hostname = {}
             
             for entry in bulk_data:
-                # Parse entry (hostname port instance_name)
-                logger.info(f"Processing bulk entry: {entry}")
-                parts = entry.strip().split()
-                if len(parts) < 3:
-                    logger.warning(f"Skipping invalid entry (not enough parts): {entry}")
-                    continue
-                
-                hostname = parts[0]
-                try:
-                    port = int(parts[1])
-                except ValueError:
-                    logger.warning(f"Invalid port number in entry: {entry}")
+                parsed = parse_bulk_entry(entry)
+                if parsed is None:
+                    outcomes.append({"result": "invalid"})
                     continue
-                    
-                instance_name = ' '.join(parts[2:])
+                hostname, port, instance_name = parsed
                 
-                # Find if host already exists
-                host = next((h for h in hosts if h.get("hostname") == hostname), None)
+                if hostname not in by_hostname and hostname in cached["hosts_by_hostname"]:
+                    existing = cached["hosts_by_hostname"][hostname]
+                    host = dict(existing)
+                    host["instances"] = list(existing.get("instances", []))
+                    by_hostname[hostname] = (
+                        host,
+                        {(i.get("name"), i.get("port")) for i in host["instances"]}
+                    )
                 
-                if host:
+                if hostname in by_hostname:
                     # Host exists, add instance if it doesn't exist
-                    instance_exists = any(
-                        i.get("name") == instance_name and i.get("port") == port 
-                        for i in host.get("instances", [])
-                    )
+                    host, instance_keys = by_hostname[hostname]
                     
-                    if not instance_exists:
-                        # Generate a new instance ID
-                        instance_id = 1
-                        for h in hosts:
-                            for inst in h.get("instances", []):
-                                if inst.get("id", 0) >= instance_id:
-                                    instance_id = inst.get("id", 0) + 1
-                        
+                    if (instance_name, port) not in instance_keys:
                         # Add new instance
-                        if "instances" not in host:
-                            host["instances"] = []
-                        
                         host["instances"].append({
-                            "id": instance_id,
+                            "id": next_instance_id,
                             "name": instance_name,
                             "port": port
                         })
+                        outcomes.append({"result": "added", "host_id": host.get("id"), "instance_id": next_instance_id})
+                        next_instance_id += 1
+                        instance_keys.add((instance_name, port))
                         
-                        if host not in updated_hosts:
+                        if id(host) not in updated:
+                            updated.add(id(host))
                             updated_hosts.append(host)
+                    else:
+                        outcomes.append({"result": "duplicate", "host_id": host.get("id")})
                 else:
                     # Create new host with instance
-                    host_id = 1
-                    if hosts:
-                        host_id = max(h.get("id", 0) for h in hosts) + 1
-                    
-                    instance_id = 1
-                    if hosts:
-                        for h in hosts:
-                            for inst in h.get("instances", []):
-                                if inst.get("id", 0) >= instance_id:
-                                    instance_id = inst.get("id", 0) + 1
-                    
                     new_host = {
-                        "id": host_id,
+                        "id": next_host_id,
                         "hostname": hostname,
                         "instances": [{
-                            "id": instance_id,
+                            "id": next_instance_id,
                             "name": instance_name,
                             "port": port
                         }]
                     }
+                    outcomes.append({"result": "added", "host_id": next_host_id, "instance_id": next_instance_id})
+                    next_host_id += 1
+                    next_instance_id += 1
                     
-                    hosts.append(new_host)
+                    updated.add(id(new_host))
                     updated_hosts.append(new_host)
+                    by_hostname[hostname] = (new_host, {(instance_name, port)})
             
-            # Write updated data
-            self._write_data(environment, hosts)
+            # Journal the final state of every updated host
+            if updated_hosts:
+                self._append(environment, cached, [{"host": host} for host in updated_hosts])
             
-            return updated_hosts
+            return updated_hosts, outcomes
+    
+    def import_hosts(self, lines: Iterable[str], environment: str,
+                     chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Import "hostname port instance_name" lines (plain text or CSV), committing in chunks
+        
+        Args:
+            lines: Lines of the uploaded file, read lazily
+            environment: "production" or "non-production"
+            chunk_size: Entries written per commit
+            
+        Yields:
+            One outcome per non-blank line, as each chunk is committed
+        """
+        return iter_import_outcomes(lines, environment, self._bulk_add, chunk_size)
     
     def save_report(self, report_data: Dict[str, Any], environment: str) -> Dict[str, Any]:
         """
@@ -406,43 +1139,133 @@ class FileStorage:
         report_data["metadata"] = metadata
         
         # Save report to file
-        report_path = os.path.join(self.reports_dir, f"{report_id}.json")
+        report_path = os.path.join(self.reports_dir, f"{report_id}{REPORT_SUFFIX}")
         try:
-            with open(report_path, "w") as f:
-                json.dump(report_data, f, indent=2)
+            write_report_file(report_path, report_data)
         except Exception as e:
             logger.error(f"Error saving report: {str(e)}")
             return None
         
+        self._index_report(metadata)
+        
         return metadata
     
-    def get_recent_reports(self, environment: str, limit: int = 5) -> List[Dict[str, Any]]:
+    def _index_report(self, metadata: Dict[str, Any]) -> None:
+        """Append a saved report's metadata to the index"""
+        with self._file_lock(self.report_index_path):
+            if not os.path.exists(self.report_index_path):
+                # The rebuild picks up the report that was just written
+                self.rebuild_report_index()
+                return
+            
+            try:
+                with open(self.report_index_path, "a") as f:
+                    f.write(json.dumps(metadata) + "\n")
+            except Exception as e:
+                logger.error(f"Error indexing report {metadata['id']}, dropping the index to rebuild it: {str(e)}")
+                os.remove(self.report_index_path)
+    
+    def rebuild_report_index(self) -> int:
         """
-        Get recent reports for an environment
+        Rebuild the report metadata index from the report files on disk
         
-        Args:
-            environment: "production" or "non-production"
-            limit: Maximum number of reports to return
-            
         Returns:
-            List of report metadata
+            Number of reports indexed
         """
-        reports = []
-        
-        # Find report files for the environment
-        for filename in os.listdir(self.reports_dir):
-            if filename.startswith(environment) and filename.endswith(".json"):
+        with self._file_lock(self.report_index_path):
+            lines = []
+            for filename in sorted(os.listdir(self.reports_dir)):
+                if report_file_id(filename) is None:
+                    continue
                 try:
-                    with open(os.path.join(self.reports_dir, filename), "r") as f:
-                        report = json.load(f)
-                        if "metadata" in report:
-                            reports.append(report["metadata"])
+                    report = read_report_file(os.path.join(self.reports_dir, filename))
+                    if "metadata" in report:
+                        lines.append(json.dumps(report["metadata"]) + "\n")
                 except Exception as e:
                     logger.error(f"Error reading report {filename}: {str(e)}")
+            
+            if os.path.isdir(self.archive_dir):
+                for filename in sorted(os.listdir(self.archive_dir)):
+                    if not filename.endswith(REPORT_ARCHIVE_SUFFIX):
+                        continue
+                    try:
+                        for report in self._read_archive(filename).values():
+                            if "metadata" in report:
+                                lines.append(json.dumps(dict(report["metadata"], archive=filename)) + "\n")
+                    except Exception as e:
+                        logger.error(f"Error reading report archive {filename}: {str(e)}")
+            
+            temp_path = f"{self.report_index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w") as f:
+                f.writelines(lines)
+            os.replace(temp_path, self.report_index_path)
+            self.report_index = None
+        
+        logger.info(f"Rebuilt report index with {len(lines)} reports")
+        return len(lines)
+    
+    def _read_report_index(self) -> Dict[str, Any]:
+        """
+        Get the parsed report index, reading only lines appended since the last call
+        
+        Caller holds self.lock.
+        """
+        signature = self._path_signature(self.report_index_path)
+        if signature is None:
+            self.rebuild_report_index()
+            signature = self._path_signature(self.report_index_path)
+        
+        index = self.report_index
+        if index is not None and index["signature"] == signature:
+            return index
+        if index is None or index["signature"][2] != signature[2] or signature[1] < index["offset"]:
+            # Replaced by a rebuild: start over
+            index = {"signature": None, "offset": 0, "reports": {}, "by_environment": {}}
+        
+        with self._file_lock(self.report_index_path, exclusive=False):
+            with open(self.report_index_path, "rb") as f:
+                f.seek(index["offset"])
+                data = f.read()
+                signature = self._signature(os.fstat(f.fileno()))
+        
+        # A line still being appended by another worker is read next time
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            try:
+                metadata = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable line in {self.report_index_path}")
+                continue
+            
+            report_id = metadata.get("id")
+            if report_id not in index["reports"]:
+                # Kept sorted by timestamp, oldest first; saves arrive in order, so this is an append
+                bisect.insort(index["by_environment"].setdefault(metadata.get("environment"), []),
+                              (metadata.get("timestamp", ""), report_id))
+            # A report saved twice in the same second overwrote the first file
+            index["reports"][report_id] = metadata
+        
+        # An incomplete last line stays past the offset; it is read once the file changes again
+        index["offset"] += len(complete)
+        index["signature"] = signature
+        self.report_index = index
+        return index
+    
+    def get_recent_reports(self, environment: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get recent reports for an environment, from the metadata index
+        
+        Args:
+            environment: "production" or "non-production"
+            limit: Maximum number of reports to return
         
-        # Sort by timestamp (newest first) and limit
-        reports.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        return reports[:limit]
+        Returns:
+            List of report metadata, newest first
+        """
+        with self.lock:
+            index = self._read_report_index()
+            keys = index["by_environment"].get(environment, [])
+            return [index["reports"][report_id] for _, report_id in reversed(keys[max(0, len(keys) - limit):])]
     
     def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -454,14 +1277,295 @@ class FileStorage:
         Returns:
             Report data or None if not found
         """
-        report_path = os.path.join(self.reports_dir, f"{report_id}.json")
-        
-        if not os.path.exists(report_path):
-            return None
+        report_path = self._report_path(report_id)
         
         try:
-            with open(report_path, "r") as f:
-                return json.load(f)
+            if report_path is None:
+                return self._archived_report(report_id)
+            return read_report_file(report_path)
         except Exception as e:
             logger.error(f"Error reading report {report_id}: {str(e)}")
             return None
+    
+    def _archived_report(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Read a report from the archive the index places it in"""
+        with self.lock:
+            metadata = self._read_report_index()["reports"].get(report_id)
+        if not metadata or "archive" not in metadata:
+            return None
+        
+        # Lines start with the ID, so other reports are skipped without parsing them
+        prefix = json.dumps({"id": report_id}, separators=(",", ":"))[:-1].encode("utf-8") + b","
+        with gzip.open(os.path.join(self.archive_dir, metadata["archive"]), "rb") as f:
+            for line in f:
+                if line.startswith(prefix):
+                    return json.loads(line)["report"]
+        return None
+    
+    def _read_archive(self, archive: str) -> Dict[str, Dict[str, Any]]:
+        """Read every report in an archive, keyed by report ID"""
+        with gzip.open(os.path.join(self.archive_dir, archive), "rb") as f:
+            return {entry["id"]: entry["report"] for entry in map(json.loads, f)}
+    
+    def _write_archive(self, archive: str, reports: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Atomically write an archive of (report ID, report) pairs"""
+        path = os.path.join(self.archive_dir, archive)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(temp_path, "wb", compresslevel=REPORT_COMPRESSLEVEL) as f:
+            for report_id, report in reports:
+                f.write(json.dumps({"id": report_id, "report": report}, separators=(",", ":")).encode("utf-8") + b"\n")
+        os.replace(temp_path, path)
+    
+    def compact_reports(self, now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+        """
+        Apply each environment's retention policy to the saved reports
+        
+        Reports the policy drops are deleted. Kept reports past the first
+        retention tier are rolled up into per-day archives. The work happens
+        without holding the storage lock; only the final index swap takes it.
+        Runs in one thread of one process at a time; other callers return None.
+        
+        Args:
+            now: Reference time for report ages (defaults to now)
+        
+        Returns:
+            Counts of archived and dropped reports and archives written and
+            removed, or None if another compaction is running
+        """
+        if not self.report_compaction_lock.acquire(blocking=False):
+            return None
+        try:
+            fd = os.open(os.path.join(self.reports_dir, REPORT_COMPACTION_LOCK), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        return None
+                return self._compact_reports(now or datetime.now())
+            finally:
+                os.close(fd)
+        finally:
+            self.report_compaction_lock.release()
+    
+    def _compact_reports(self, now: datetime) -> Dict[str, int]:
+        summary = {"archived": 0, "dropped": 0, "archives_written": 0, "archives_removed": 0}
+        
+        with self.lock:
+            reports = list(self._read_report_index()["reports"].values())
+        
+        by_environment = {}
+        for metadata in reports:
+            by_environment.setdefault(metadata.get("environment"), []).append(metadata)
+        
+        # Report ID -> new index entry, or None to drop it
+        changes = {}
+        removed_archives = []
+        archive_cache = {}
+        
+        def load(metadata):
+            if "archive" not in metadata:
+                path = self._report_path(metadata["id"])
+                return read_report_file(path) if path else None
+            if metadata["archive"] not in archive_cache:
+                archive_cache[metadata["archive"]] = self._read_archive(metadata["archive"])
+            return archive_cache[metadata["archive"]].get(metadata["id"])
+        
+        for environment, entries in by_environment.items():
+            policy = retention_policy(environment or "non-production")
+            plan = plan_retention(entries, policy, now)
+            archive_after = policy[0][0]
+            
+            wanted = {}
+            current = {}
+            for metadata in entries:
+                if "archive" in metadata:
+                    current.setdefault(metadata["archive"], set()).add(metadata["id"])
+                if not plan[metadata["id"]]:
+                    changes[metadata["id"]] = None
+                    summary["dropped"] += 1
+                    continue
+                age = report_age(metadata, now)
+                if archive_after is not None and age is not None and age >= archive_after:
+                    archive = f"{environment}_{metadata['timestamp'][:10]}{REPORT_ARCHIVE_SUFFIX}"
+                    wanted.setdefault(archive, []).append(metadata)
+            
+            for archive in sorted(set(wanted) | set(current)):
+                entries_wanted = sorted(wanted.get(archive, []), key=lambda m: m["timestamp"])
+                if {m["id"] for m in entries_wanted} == current.get(archive, set()):
+                    continue
+                if not entries_wanted:
+                    removed_archives.append(archive)
+                    continue
+                
+                contents = []
+                for metadata in entries_wanted:
+                    report = load(metadata)
+                    if report is None:
+                        logger.warning(f"Report {metadata['id']} is missing, leaving it out of {archive}")
+                        changes[metadata["id"]] = None
+                        continue
+                    contents.append((metadata["id"], report))
+                    if metadata.get("archive") != archive:
+                        changes[metadata["id"]] = dict(metadata, archive=archive)
+                        summary["archived"] += 1
+                
+                if not os.path.exists(self.archive_dir):
+                    os.makedirs(self.archive_dir)
+                self._write_archive(archive, contents)
+                summary["archives_written"] += 1
+        
+        if changes:
+            with self._file_lock(self.report_index_path):
+                index = self._read_report_index()
+                lines = []
+                for report_id, metadata in index["reports"].items():
+                    metadata = changes.get(report_id, metadata)
+                    if metadata is not None:
+                        lines.append(json.dumps(metadata) + "\n")
+                
+                temp_path = f"{self.report_index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, "w") as f:
+                    f.writelines(lines)
+                os.replace(temp_path, self.report_index_path)
+                self.report_index = None
+        
+        # The index no longer points at these, so they can go. Archived reports whose
+        # files are still there were left behind by an interrupted compaction.
+        leftovers = [m["id"] for m in reports if "archive" in m and m["id"] not in changes and self._report_path(m["id"])]
+        for report_id in list(changes) + leftovers:
+            for suffix in (REPORT_SUFFIX, LEGACY_REPORT_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.reports_dir, f"{report_id}{suffix}"))
+                except FileNotFoundError:
+                    pass
+        for archive in removed_archives:
+            try:
+                os.remove(os.path.join(self.archive_dir, archive))
+                summary["archives_removed"] += 1
+            except FileNotFoundError:
+                pass
+        
+        logger.info(f"Report compaction: {summary}")
+        return summary
+    
+    def _report_path(self, report_id: str) -> Optional[str]:
+        """Find a report's file, compressed or legacy"""
+        for suffix in (REPORT_SUFFIX, LEGACY_REPORT_SUFFIX):
+            report_path = os.path.join(self.reports_dir, f"{report_id}{suffix}")
+            if os.path.exists(report_path):
+                return report_path
+        return None
+    
+    def report_size(self, report_id: str) -> Optional[int]:
+        """
+        Get the uncompressed size of a report's JSON, whether it is stored
+        compressed or as a legacy .json file
+        
+        Args:
+            report_id: ID of the report
+        
+        Returns:
+            Size in bytes, or None if unknown (archived or missing)
+        """
+        report_path = self._report_path(report_id)
+        if report_path is None:
+            return None
+        try:
+            if report_path.endswith(REPORT_SUFFIX):
+                # A gzip file ends with the uncompressed size (mod 2**32)
+                with open(report_path, "rb") as f:
+                    f.seek(-4, os.SEEK_END)
+                    return int.from_bytes(f.read(4), "little")
+            return os.path.getsize(report_path)
+        except OSError:
+            return None
+    
+    def iter_report_results(self, report_id: str) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Stream a report's host results without loading the whole report
+        
+        Archived reports are read whole; they are older and thinned out.
+        
+        Args:
+            report_id: ID of the report
+        
+        Returns:
+            Iterator of host status dictionaries, or None if not found
+        """
+        report_path = self._report_path(report_id)
+        if report_path is None:
+            report = self.get_report(report_id)
+            return iter(report.get("results", [])) if report else None
+        
+        def stream():
+            if report_path.endswith(REPORT_SUFFIX):
+                f = io.TextIOWrapper(gzip.open(report_path, "rb"), encoding="utf-8")
+            else:
+                f = open(report_path, "r")
+            with f:
+                yield from iter_report_results(iter(lambda: f.read(REPORT_READ_CHUNK), ""))
+        
+        return stream()
+    
+    def get_report_page(self, report_id: str, offset: int = 0, limit: Optional[int] = None,
+                        **filters: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get a slice of a report's host results, streamed instead of loading the whole report
+        
+        Args:
+            report_id: ID of the report
+            offset: Matching hosts to skip
+            limit: Maximum number of hosts to return
+            **filters: statuses, hostname_prefix and failed_only, see filter_report_results
+        
+        Returns:
+            Dictionary with the report's metadata (from the index), the page
+            of results, offset, limit and hasMore, or None if not found
+        """
+        results = self.iter_report_results(report_id)
+        if results is None:
+            return None
+        
+        with self.lock:
+            metadata = self._read_report_index()["reports"].get(report_id)
+        page = page_report_results(results, offset, limit, **filters)
+        page["metadata"] = {key: value for key, value in (metadata or {"id": report_id}).items() if key != "archive"}
+        return page
+    
+    def migrate_reports(self) -> Dict[str, int]:
+        """
+        Convert legacy .json reports to compressed .json.gz reports
+        
+        Report IDs do not change, so the metadata index stays valid.
+        
+        Returns:
+            Counts of migrated and failed reports, and total bytes before and after
+        """
+        summary = {"migrated": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+        
+        for filename in sorted(os.listdir(self.reports_dir)):
+            if not filename.endswith(LEGACY_REPORT_SUFFIX):
+                continue
+            legacy_path = os.path.join(self.reports_dir, filename)
+            report_path = legacy_path[:-len(LEGACY_REPORT_SUFFIX)] + REPORT_SUFFIX
+            
+            try:
+                size = os.path.getsize(legacy_path)
+                if os.path.exists(report_path):
+                    # Converted before an interrupted run removed the original
+                    written = os.path.getsize(report_path)
+                else:
+                    written = write_report_file(report_path, read_report_file(legacy_path))
+                os.remove(legacy_path)
+            except Exception as e:
+                logger.error(f"Error migrating report {filename}: {str(e)}")
+                summary["failed"] += 1
+                continue
+            
+            summary["migrated"] += 1
+            summary["bytes_before"] += size
+            summary["bytes_after"] += written
+        
+        logger.info(f"Migrated {summary['migrated']} reports: {summary['bytes_before']} -> {summary['bytes_after']} bytes")
+        return summary
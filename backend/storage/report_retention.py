@@ -0,0 +1,142 @@
+# storage/report_retention.py
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated "age:resolution" tiers, youngest first. A report falls in the
+# first tier whose age it has not reached ("*" matches any age) and is kept
+# at that tier's resolution: "all" keeps every report, "hourly"/"daily" keep
+# the latest report of each hour/day, "none" drops them.
+DEFAULT_RETENTION = "7d:all,90d:hourly,*:daily"
+
+# Resolution -> length of the timestamp prefix ("%Y-%m-%d_%H-%M-%S") naming its bucket
+RESOLUTIONS = {"all": None, "hourly": 13, "daily": 10, "none": 0}
+
+AGE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
+
+def parse_retention(spec: str) -> List[Tuple[Optional[timedelta], str]]:
+    """
+    Parse a retention policy such as "7d:all,90d:hourly,*:daily"
+
+    Args:
+        spec: Comma-separated "age:resolution" tiers
+
+    Returns:
+        List of (maximum age or None for any age, resolution)
+
+    Raises:
+        ValueError: If a tier is malformed
+    """
+    tiers = []
+    for tier in spec.split(","):
+        age, _, resolution = tier.strip().partition(":")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown report retention resolution in '{tier}'")
+        if age.strip() == "*":
+            tiers.append((None, resolution))
+            continue
+        match = re.fullmatch(r"(\d+)([mhdw])", age.strip())
+        if not match:
+            raise ValueError(f"Invalid report retention age in '{tier}'")
+        tiers.append((timedelta(**{AGE_UNITS[match.group(2)]: int(match.group(1))}), resolution))
+    return tiers
+
+def retention_policy(environment: str) -> List[Tuple[Optional[timedelta], str]]:
+    """
+    Get an environment's retention policy
+
+    REPORT_RETENTION_PRODUCTION / REPORT_RETENTION_NON_PRODUCTION override
+    REPORT_RETENTION, which overrides DEFAULT_RETENTION.
+
+    Args:
+        environment: "production" or "non-production"
+
+    Returns:
+        Parsed policy tiers
+    """
+    variable = "REPORT_RETENTION_" + environment.upper().replace("-", "_")
+    return parse_retention(os.environ.get(variable) or os.environ.get("REPORT_RETENTION") or DEFAULT_RETENTION)
+
+def report_age(metadata: Dict[str, Any], now: datetime) -> Optional[timedelta]:
+    """Age of a report from its metadata timestamp, or None if it cannot be parsed"""
+    try:
+        return now - datetime.strptime(metadata.get("timestamp", ""), REPORT_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+def plan_retention(reports: List[Dict[str, Any]], policy: List[Tuple[Optional[timedelta], str]],
+                   now: datetime) -> Dict[str, bool]:
+    """
+    Decide which reports a policy keeps
+
+    Args:
+        reports: Report metadata of one environment
+        policy: Parsed policy tiers
+        now: Reference time for report ages
+
+    Returns:
+        Report ID -> True to keep, False to drop
+    """
+    plan = {}
+    # (tier, bucket) -> (timestamp, report ID) of the latest report seen in it
+    latest = {}
+
+    for metadata in reports:
+        report_id = metadata["id"]
+        age = report_age(metadata, now)
+        if age is None:
+            # Never drop what cannot be dated
+            plan[report_id] = True
+            continue
+
+        tier = next((i for i, (max_age, _) in enumerate(policy) if max_age is None or age < max_age), None)
+        resolution = policy[tier][1] if tier is not None else "none"
+        prefix = RESOLUTIONS[resolution]
+        if prefix is None:
+            plan[report_id] = True
+        elif prefix == 0:
+            plan[report_id] = False
+        else:
+            bucket = (tier, metadata["timestamp"][:prefix])
+            plan[report_id] = False
+            current = latest.get(bucket)
+            candidate = (metadata["timestamp"], report_id)
+            if current is None or candidate > current:
+                if current is not None:
+                    plan[current[1]] = False
+                latest[bucket] = candidate
+                plan[report_id] = True
+
+    return plan
+
+def start_report_compaction(storage, interval: float) -> threading.Thread:
+    """
+    Run storage.compact_reports() every `interval` seconds on a daemon thread
+
+    Args:
+        storage: FileStorage or SQLiteStorage
+        interval: Seconds between compactions
+
+    Returns:
+        The started thread
+    """
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                storage.compact_reports()
+            except Exception as e:
+                logger.exception(f"Report compaction failed: {str(e)}")
+
+    thread = threading.Thread(target=run, name="report-compactor", daemon=True)
+    thread.start()
+    logger.info(f"Report compaction scheduled every {interval} seconds")
+    return thread
@@ -0,0 +1,830 @@
+# storage/sqlite_storage.py
+import os
+import codecs
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from storage.file_storage import (
+    expand_hostname_entry, parse_bulk_entry, iter_import_outcomes, read_registry,
+    report_file_id, read_report_file, iter_report_results, page_report_results,
+    REPORT_COMPRESSLEVEL, REPORT_READ_CHUNK
+)
+from storage.report_retention import retention_policy, plan_retention
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS hosts (
+    environment TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    hostname TEXT NOT NULL,
+    PRIMARY KEY (environment, id)
+);
+CREATE INDEX IF NOT EXISTS hosts_by_hostname ON hosts (environment, hostname);
+
+CREATE TABLE IF NOT EXISTS instances (
+    environment TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    host_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    PRIMARY KEY (environment, id)
+);
+CREATE INDEX IF NOT EXISTS instances_by_host ON instances (environment, host_id, port, name);
+
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    environment TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    host_count INTEGER,
+    created_by TEXT,
+    data TEXT NOT NULL,
+    raw_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS reports_by_environment ON reports (environment, timestamp);
+"""
+
+class SQLiteStorage:
+    """
+    SQLite-backed storage with the same interface as FileStorage.
+    Hosts, instances and reports live in indexed tables, so lookups by ID
+    or hostname do not scan the registry, and every write is one transaction.
+    """
+
+    def __init__(self, db_path: str, storage_dir: Optional[str] = None):
+        """
+        Initialize the storage, creating the schema if needed
+
+        Args:
+            db_path: Path of the SQLite database file
+            storage_dir: Optional FileStorage directory to migrate from on first start
+        """
+        self.db_path = db_path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        # Seconds to wait for another process's write transaction to finish
+        self.busy_timeout = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "30"))
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+
+        connection = self._connection()
+        # WAL lets readers in other worker processes proceed while one process writes
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            connection.executescript(SCHEMA)
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(reports)")}
+            if "raw_size" not in columns:
+                # Databases created before reports recorded their uncompressed size
+                try:
+                    connection.execute("ALTER TABLE reports ADD COLUMN raw_size INTEGER")
+                except sqlite3.OperationalError:
+                    # Another worker added it first
+                    pass
+
+        if storage_dir:
+            self.migrate_from_json(storage_dir)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=self.busy_timeout)
+            connection.row_factory = sqlite3.Row
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def _begin_write(connection: sqlite3.Connection) -> None:
+        """
+        Start a write transaction holding the database's write lock up front, so
+        ID allocation (MAX + 1) cannot race with a writer in another process
+        """
+        connection.execute("BEGIN IMMEDIATE")
+
+    @staticmethod
+    def _env(environment: str) -> str:
+        """Normalize an environment the same way FileStorage picks its file"""
+        return "production" if environment.lower() == "production" else "non-production"
+
+    @staticmethod
+    def _stored_next_id(connection: sqlite3.Connection, table: str, environment: str) -> int:
+        row = connection.execute(
+            "SELECT value FROM meta WHERE key = ?", (f"next_id:{table}:{environment}",)
+        ).fetchone()
+        return int(row[0]) if row else 1
+    
+    @staticmethod
+    def _store_next_id(connection: sqlite3.Connection, table: str, environment: str, next_id: int) -> None:
+        connection.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (f"next_id:{table}:{environment}", str(next_id))
+        )
+    
+    @staticmethod
+    def _next_id(connection: sqlite3.Connection, table: str, environment: str) -> int:
+        """
+        Allocate an ID, past both the highest one in use and every one handed
+        out before (kept in meta), so IDs of deleted rows are not reused
+        """
+        row = connection.execute(
+            f"SELECT MAX(id) FROM {table} WHERE environment = ?", (environment,)
+        ).fetchone()
+        next_id = max((row[0] or 0) + 1, SQLiteStorage._stored_next_id(connection, table, environment))
+        SQLiteStorage._store_next_id(connection, table, environment, next_id + 1)
+        return next_id
+
+    def _insert_instance(self, connection: sqlite3.Connection, environment: str, host_id: int,
+                         instance: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert an instance, allocating a new ID if it has none or its ID is taken"""
+        instance_id = instance.get("id")
+        if instance_id is None or connection.execute(
+                "SELECT 1 FROM instances WHERE environment = ? AND id = ?", (environment, instance_id)
+        ).fetchone():
+            instance_id = self._next_id(connection, "instances", environment)
+
+        new_instance = {
+            "id": instance_id,
+            "name": instance.get("name", ""),
+            "port": instance.get("port", 9990)
+        }
+        connection.execute(
+            "INSERT INTO instances (environment, id, host_id, name, port) VALUES (?, ?, ?, ?, ?)",
+            (environment, instance_id, host_id, new_instance["name"], new_instance["port"])
+        )
+        return new_instance
+
+    def _load_host(self, connection: sqlite3.Connection, environment: str, host_row) -> Dict[str, Any]:
+        """Build a host dictionary with its instances"""
+        instances = connection.execute(
+            "SELECT id, name, port FROM instances WHERE environment = ? AND host_id = ? ORDER BY rowid",
+            (environment, host_row["id"])
+        ).fetchall()
+        return {
+            "id": host_row["id"],
+            "hostname": host_row["hostname"],
+            "instances": [dict(instance) for instance in instances]
+        }
+
+    def migrate_from_json(self, storage_dir: str) -> bool:
+        """
+        Import the JSON host files and reports of a FileStorage directory, once
+
+        Args:
+            storage_dir: Directory holding production_hosts.json,
+                nonproduction_hosts.json and reports/
+
+        Returns:
+            True if a migration ran, False if it had already been done
+        """
+        files = {
+            "production": os.path.join(storage_dir, "production_hosts.json"),
+            "non-production": os.path.join(storage_dir, "nonproduction_hosts.json")
+        }
+        reports_dir = os.path.join(storage_dir, "reports")
+
+        with self.lock:
+            connection = self._connection()
+            host_count = 0
+            report_count = 0
+            with connection:
+                self._begin_write(connection)
+                if connection.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_json'").fetchone():
+                    return False
+
+                for environment, file_path in files.items():
+                    if not os.path.exists(file_path):
+                        continue
+                    registry = read_registry(file_path)
+                    self._store_next_id(connection, "hosts", environment, registry["next_host_id"])
+                    self._store_next_id(connection, "instances", environment, registry["next_instance_id"])
+                    
+                    for host in registry["hosts"]:
+                        host_id = host.get("id")
+                        if host_id is None or connection.execute(
+                                "SELECT 1 FROM hosts WHERE environment = ? AND id = ?", (environment, host_id)
+                        ).fetchone():
+                            host_id = self._next_id(connection, "hosts", environment)
+                        connection.execute(
+                            "INSERT INTO hosts (environment, id, hostname) VALUES (?, ?, ?)",
+                            (environment, host_id, host.get("hostname", ""))
+                        )
+                        for instance in host.get("instances", []):
+                            self._insert_instance(connection, environment, host_id, instance)
+                        host_count += 1
+
+                if os.path.isdir(reports_dir):
+                    for filename in sorted(os.listdir(reports_dir)):
+                        if report_file_id(filename) is None:
+                            continue
+                        try:
+                            report = read_report_file(os.path.join(reports_dir, filename))
+                        except Exception as e:
+                            logger.error(f"Error reading report {filename}: {str(e)}")
+                            continue
+
+                        metadata = report.get("metadata")
+                        if not metadata:
+                            continue
+                        self._insert_report(connection, metadata, report)
+                        report_count += 1
+
+                connection.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (datetime.now().isoformat(),)
+                )
+
+        logger.info(f"Migrated {host_count} hosts and {report_count} reports from {storage_dir} to {self.db_path}")
+        return True
+
+    def get_all_hosts(self, environment: str) -> List[Dict[str, Any]]:
+        """
+        Get all hosts for a specific environment
+
+        Args:
+            environment: "production" or "non-production"
+
+        Returns:
+            List of host dictionaries
+        """
+        environment = self._env(environment)
+        connection = self._connection()
+
+        hosts = {}
+        for row in connection.execute(
+                "SELECT id, hostname FROM hosts WHERE environment = ? ORDER BY rowid", (environment,)):
+            hosts[row["id"]] = {"id": row["id"], "hostname": row["hostname"], "instances": []}
+
+        for row in connection.execute(
+                "SELECT id, host_id, name, port FROM instances WHERE environment = ? ORDER BY rowid", (environment,)):
+            host = hosts.get(row["host_id"])
+            if host is not None:
+                host["instances"].append({"id": row["id"], "name": row["name"], "port": row["port"]})
+
+        return list(hosts.values())
+
+    def add_host(self, host_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Add a new host
+
+        Args:
+            host_data: Dictionary containing host information
+
+        Returns:
+            The added host with generated ID
+        """
+        environment = self._env(host_data.get("environment", "non-production"))
+        expand_hostname_entry(host_data)
+
+        with self.lock:
+            connection = self._connection()
+            with connection:
+                self._begin_write(connection)
+                host_id = self._next_id(connection, "hosts", environment)
+                connection.execute(
+                    "INSERT INTO hosts (environment, id, hostname) VALUES (?, ?, ?)",
+                    (environment, host_id, host_data.get("hostname", ""))
+                )
+                instances = [
+                    self._insert_instance(connection, environment, host_id, instance)
+                    for instance in host_data.get("instances", [])
+                ]
+
+        return {
+            "id": host_id,
+            "hostname": host_data.get("hostname", ""),
+            "instances": instances
+        }
+
+    def add_instance(self, host_id: int, instance_data: Dict[str, Any], environment: str) -> Optional[Dict[str, Any]]:
+        """
+        Add a new instance to an existing host
+
+        Args:
+            host_id: ID of the host
+            instance_data: Dictionary containing instance information
+            environment: "production" or "non-production"
+
+        Returns:
+            The added instance with generated ID, or None if host not found
+        """
+        environment = self._env(environment)
+
+        with self.lock:
+            connection = self._connection()
+            with connection:
+                self._begin_write(connection)
+                if not connection.execute(
+                        "SELECT 1 FROM hosts WHERE environment = ? AND id = ?", (environment, host_id)).fetchone():
+                    return None
+
+                return self._insert_instance(connection, environment, host_id, {
+                    "name": instance_data.get("name", ""),
+                    "port": instance_data.get("port", 9990)
+                })
+
+    def delete_host(self, host_id: int, environment: str) -> bool:
+        """
+        Delete a host and its instances
+
+        Args:
+            host_id: ID of the host to delete
+            environment: "production" or "non-production"
+
+        Returns:
+            True if successful, False otherwise
+        """
+        environment = self._env(environment)
+
+        with self.lock:
+            connection = self._connection()
+            with connection:
+                self._begin_write(connection)
+                deleted = connection.execute(
+                    "DELETE FROM hosts WHERE environment = ? AND id = ?", (environment, host_id)
+                ).rowcount
+                if deleted:
+                    connection.execute(
+                        "DELETE FROM instances WHERE environment = ? AND host_id = ?", (environment, host_id)
+                    )
+
+        return deleted > 0
+
+    def delete_instance(self, instance_id: int, environment: str) -> bool:
+        """
+        Delete an instance
+
+        Args:
+            instance_id: ID of the instance to delete
+            environment: "production" or "non-production"
+
+        Returns:
+            True if successful, False otherwise
+        """
+        environment = self._env(environment)
+
+        with self.lock:
+            connection = self._connection()
+            with connection:
+                self._begin_write(connection)
+                deleted = connection.execute(
+                    "DELETE FROM instances WHERE environment = ? AND id = ?", (environment, instance_id)
+                ).rowcount
+
+        return deleted > 0
+
+    def get_host_by_id(self, host_id: int, environment: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a host by ID
+
+        Args:
+            host_id: ID of the host
+            environment: "production" or "non-production"
+
+        Returns:
+            Host dictionary or None if not found
+        """
+        environment = self._env(environment)
+        connection = self._connection()
+
+        row = connection.execute(
+            "SELECT id, hostname FROM hosts WHERE environment = ? AND id = ?", (environment, host_id)
+        ).fetchone()
+        if row is None:
+            return None
+
+        return self._load_host(connection, environment, row)
+
+    def get_instance_by_id(self, instance_id: int, environment: str) -> Optional[Dict[str, Any]]:
+        """
+        Get an instance by ID
+
+        Args:
+            instance_id: ID of the instance
+            environment: "production" or "non-production"
+
+        Returns:
+            Tuple containing (host, instance) or (None, None) if not found
+        """
+        environment = self._env(environment)
+        connection = self._connection()
+
+        row = connection.execute(
+            "SELECT id, host_id, name, port FROM instances WHERE environment = ? AND id = ?",
+            (environment, instance_id)
+        ).fetchone()
+        if row is None:
+            return (None, None)
+
+        host = self.get_host_by_id(row["host_id"], environment)
+        if host is None:
+            return (None, None)
+
+        instance = next((i for i in host["instances"] if i["id"] == instance_id), None)
+        return (host, instance)
+
+    def bulk_add_hosts(self, bulk_data: List[str], environment: str) -> List[Dict[str, Any]]:
+        """
+        Add multiple hosts and instances from bulk data
+
+        Args:
+            bulk_data: List of strings in format "hostname port instance_name"
+            environment: "production" or "non-production"
+
+        Returns:
+            List of added/updated hosts
+        """
+        return self._bulk_add(bulk_data, environment)[0]
+
+    def _bulk_add(self, bulk_data: Iterable[str], environment: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Add bulk entries in one transaction
+
+        Returns:
+            The added/updated hosts, and one outcome per entry: "added" (with
+            host_id and instance_id), "duplicate" (with host_id) or "invalid"
+        """
+        environment = self._env(environment)
+
+        with self.lock:
+            connection = self._connection()
+            updated_host_ids = []
+            outcomes = []
+
+            with connection:
+                self._begin_write(connection)
+                for entry in bulk_data:
+                    parsed = parse_bulk_entry(entry)
+                    if parsed is None:
+                        outcomes.append({"result": "invalid"})
+                        continue
+                    hostname, port, instance_name = parsed
+
+                    # Find if host already exists (first match, as FileStorage does)
+                    row = connection.execute(
+                        "SELECT id FROM hosts WHERE environment = ? AND hostname = ? ORDER BY rowid LIMIT 1",
+                        (environment, hostname)
+                    ).fetchone()
+
+                    if row is not None:
+                        host_id = row["id"]
+                        if connection.execute(
+                                "SELECT 1 FROM instances WHERE environment = ? AND host_id = ? AND port = ? AND name = ?",
+                                (environment, host_id, port, instance_name)).fetchone():
+                            outcomes.append({"result": "duplicate", "host_id": host_id})
+                            continue
+                    else:
+                        host_id = self._next_id(connection, "hosts", environment)
+                        connection.execute(
+                            "INSERT INTO hosts (environment, id, hostname) VALUES (?, ?, ?)",
+                            (environment, host_id, hostname)
+                        )
+
+                    instance = self._insert_instance(connection, environment, host_id, {"name": instance_name, "port": port})
+                    outcomes.append({"result": "added", "host_id": host_id, "instance_id": instance["id"]})
+                    if host_id not in updated_host_ids:
+                        updated_host_ids.append(host_id)
+
+            return [self.get_host_by_id(host_id, environment) for host_id in updated_host_ids], outcomes
+
+    def import_hosts(self, lines: Iterable[str], environment: str,
+                     chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Import "hostname port instance_name" lines (plain text or CSV), committing in chunks
+
+        Args:
+            lines: Lines of the uploaded file, read lazily
+            environment: "production" or "non-production"
+            chunk_size: Entries per transaction
+
+        Yields:
+            One outcome per non-blank line, as each chunk is committed
+        """
+        return iter_import_outcomes(lines, environment, self._bulk_add, chunk_size)
+
+    @staticmethod
+    def _insert_report(connection: sqlite3.Connection, metadata: Dict[str, Any], report_data: Dict[str, Any]) -> None:
+        data, raw_size = SQLiteStorage._encode_report(report_data)
+        connection.execute(
+            "INSERT OR REPLACE INTO reports (id, environment, timestamp, host_count, created_by, data, raw_size) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                metadata["id"],
+                metadata.get("environment", ""),
+                metadata.get("timestamp", ""),
+                metadata.get("host_count"),
+                metadata.get("created_by"),
+                data,
+                raw_size
+            )
+        )
+    
+    @staticmethod
+    def _encode_report(report_data: Dict[str, Any]) -> Tuple[bytes, int]:
+        """
+        Compact, zlib-compressed JSON; older databases hold plain JSON text
+        
+        Returns:
+            Tuple of the compressed data and the size of the JSON it holds
+        """
+        raw = json.dumps(report_data, separators=(",", ":")).encode("utf-8")
+        return zlib.compress(raw, REPORT_COMPRESSLEVEL), len(raw)
+    
+    def migrate_reports(self) -> Dict[str, int]:
+        """
+        Compress reports stored as plain JSON text by older versions
+        
+        Returns:
+            Counts of migrated and failed reports, and total bytes before and after
+        """
+        summary = {"migrated": 0, "failed": 0, "bytes_before": 0, "bytes_after": 0}
+        
+        with self.lock:
+            connection = self._connection()
+            ids = [row["id"] for row in connection.execute("SELECT id FROM reports WHERE typeof(data) = 'text'")]
+            for report_id in ids:
+                with connection:
+                    self._begin_write(connection)
+                    row = connection.execute(
+                        "SELECT data FROM reports WHERE id = ? AND typeof(data) = 'text'", (report_id,)
+                    ).fetchone()
+                    if row is None:
+                        continue
+                    try:
+                        data, raw_size = self._encode_report(json.loads(row["data"]))
+                    except Exception as e:
+                        logger.error(f"Error migrating report {report_id}: {str(e)}")
+                        summary["failed"] += 1
+                        continue
+                    connection.execute(
+                        "UPDATE reports SET data = ?, raw_size = ? WHERE id = ?", (data, raw_size, report_id)
+                    )
+                
+                summary["migrated"] += 1
+                summary["bytes_before"] += len(row["data"].encode("utf-8"))
+                summary["bytes_after"] += len(data)
+        
+        logger.info(f"Migrated {summary['migrated']} reports: {summary['bytes_before']} -> {summary['bytes_after']} bytes")
+        return summary
+
+    def save_report(self, report_data: Dict[str, Any], environment: str) -> Dict[str, Any]:
+        """
+        Save a monitoring report
+
+        Args:
+            report_data: Report data to save
+            environment: "production" or "non-production"
+
+        Returns:
+            Report metadata including ID and timestamp
+        """
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        report_id = f"{environment}_{timestamp}"
+
+        # Create report metadata
+        metadata = {
+            "id": report_id,
+            "timestamp": timestamp,
+            "environment": environment,
+            "host_count": len(report_data),
+            "created_by": report_data.get("created_by", "system")
+        }
+
+        # Add metadata to report
+        report_data["metadata"] = metadata
+
+        try:
+            with self.lock:
+                connection = self._connection()
+                with connection:
+                    self._begin_write(connection)
+                    self._insert_report(connection, metadata, report_data)
+        except Exception as e:
+            logger.error(f"Error saving report: {str(e)}")
+            return None
+
+        return metadata
+
+    def rebuild_report_index(self) -> int:
+        """
+        Reports are indexed by the database itself, so there is nothing to rebuild
+
+        Returns:
+            Number of reports stored
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def compact_reports(self, now: Optional[datetime] = None) -> Optional[Dict[str, int]]:
+        """
+        Apply each environment's retention policy to the saved reports
+        
+        Rows are already compressed and indexed, so there is nothing to roll
+        up; reports the policy drops are deleted.
+        
+        Args:
+            now: Reference time for report ages (defaults to now)
+        
+        Returns:
+            Counts in the same shape as FileStorage.compact_reports
+        """
+        now = now or datetime.now()
+        rows = self._connection().execute("SELECT id, environment, timestamp FROM reports").fetchall()
+        
+        by_environment = {}
+        for row in rows:
+            by_environment.setdefault(row["environment"], []).append(dict(row))
+        
+        dropped = []
+        for environment, entries in by_environment.items():
+            plan = plan_retention(entries, retention_policy(environment or "non-production"), now)
+            dropped.extend(report_id for report_id, keep in plan.items() if not keep)
+        
+        if dropped:
+            with self.lock:
+                connection = self._connection()
+                with connection:
+                    self._begin_write(connection)
+                    connection.executemany("DELETE FROM reports WHERE id = ?", ((report_id,) for report_id in dropped))
+        
+        summary = {"archived": 0, "dropped": len(dropped), "archives_written": 0, "archives_removed": 0}
+        logger.info(f"Report compaction: {summary}")
+        return summary
+    
+    def report_size(self, report_id: str) -> Optional[int]:
+        """
+        Get the uncompressed size of a report's JSON, comparable with FileStorage's
+        
+        Args:
+            report_id: ID of the report
+        
+        Returns:
+            Size in bytes, or None if not found
+        """
+        row = self._connection().execute(
+            "SELECT rowid, raw_size, typeof(data) = 'text' AS plain, "
+            "CASE WHEN typeof(data) = 'text' THEN length(CAST(data AS BLOB)) END AS stored "
+            "FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row["raw_size"] is not None:
+            return row["raw_size"]
+        if row["plain"]:
+            return row["stored"]
+        
+        # Compressed before sizes were recorded: count the decompressed bytes without keeping them
+        decompressor = zlib.decompressobj()
+        size = 0
+        for compressed in self._stored_chunks(report_id, row["rowid"]):
+            while compressed:
+                size += len(decompressor.decompress(compressed, REPORT_READ_CHUNK))
+                compressed = decompressor.unconsumed_tail
+        return size + len(decompressor.flush())
+    
+    def iter_report_results(self, report_id: str) -> Optional[Iterator[Dict[str, Any]]]:
+        """
+        Stream a report's host results, decompressing and decoding them piece by piece
+        
+        Args:
+            report_id: ID of the report
+        
+        Returns:
+            Iterator of host status dictionaries, or None if not found
+        """
+        row = self._connection().execute(
+            "SELECT rowid, typeof(data) = 'text' AS plain FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        rowid, plain = row["rowid"], row["plain"]
+        
+        def chunks():
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            if plain:
+                # Plain JSON text written by older versions
+                for data in self._stored_chunks(report_id, rowid):
+                    yield decoder.decode(data)
+                yield decoder.decode(b"", final=True)
+                return
+            decompressor = zlib.decompressobj()
+            for compressed in self._stored_chunks(report_id, rowid):
+                while compressed:
+                    # Cap the output too: repeated names compress very well
+                    yield decoder.decode(decompressor.decompress(compressed, REPORT_READ_CHUNK))
+                    compressed = decompressor.unconsumed_tail
+            yield decoder.decode(decompressor.flush(), final=True)
+        
+        return iter_report_results(chunks())
+    
+    def _stored_chunks(self, report_id: str, rowid: int) -> Iterator[bytes]:
+        """
+        Read a report's stored data piece by piece
+        
+        With incremental blob I/O (Python 3.11+) only one piece of the row is
+        in memory at a time; otherwise the row is fetched once and sliced.
+        
+        Args:
+            report_id: ID of the report
+            rowid: Row of the report, looked up by the caller
+        
+        Raises:
+            ValueError: If the report was replaced or deleted while being read
+        """
+        connection = self._connection()
+        if not hasattr(connection, "blobopen"):
+            row = connection.execute("SELECT CAST(data AS BLOB) FROM reports WHERE id = ?", (report_id,)).fetchone()
+            if row is None:
+                raise ValueError(f"Report {report_id} was deleted while being read")
+            for start in range(0, len(row[0]), REPORT_READ_CHUNK):
+                yield row[0][start:start + REPORT_READ_CHUNK]
+            return
+        
+        try:
+            with connection.blobopen("reports", "data", rowid, readonly=True) as blob:
+                # Any later change to the row invalidates the handle, so checking once is enough
+                row = connection.execute("SELECT id FROM reports WHERE rowid = ?", (rowid,)).fetchone()
+                if row is None or row[0] != report_id:
+                    raise ValueError(f"Report {report_id} was replaced while being read")
+                while True:
+                    data = blob.read(REPORT_READ_CHUNK)
+                    if not data:
+                        return
+                    yield data
+        except sqlite3.Error as e:
+            raise ValueError(f"Error reading report {report_id}: {str(e)}")
+    
+    def get_report_page(self, report_id: str, offset: int = 0, limit: Optional[int] = None,
+                        **filters: Any) -> Optional[Dict[str, Any]]:
+        """
+        Get a slice of a report's host results, streamed instead of loading the whole report
+        
+        Args:
+            report_id: ID of the report
+            offset: Matching hosts to skip
+            limit: Maximum number of hosts to return
+            **filters: statuses, hostname_prefix and failed_only, see filter_report_results
+        
+        Returns:
+            Dictionary with the report's metadata, the page of results,
+            offset, limit and hasMore, or None if not found
+        """
+        row = self._connection().execute(
+            "SELECT id, timestamp, environment, host_count, created_by FROM reports WHERE id = ?", (report_id,)
+        ).fetchone()
+        results = self.iter_report_results(report_id)
+        if row is None or results is None:
+            return None
+        
+        page = page_report_results(results, offset, limit, **filters)
+        page["metadata"] = dict(row)
+        return page
+    
+    def get_recent_reports(self, environment: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get recent reports for an environment
+
+        Args:
+            environment: "production" or "non-production"
+            limit: Maximum number of reports to return
+
+        Returns:
+            List of report metadata
+        """
+        rows = self._connection().execute(
+            "SELECT id, timestamp, environment, host_count, created_by FROM reports "
+            "WHERE environment = ? ORDER BY timestamp DESC LIMIT ?",
+            (environment, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a specific report by ID
+
+        Args:
+            report_id: ID of the report
+
+        Returns:
+            Report data or None if not found
+        """
+        row = self._connection().execute("SELECT data FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if row is None:
+            return None
+
+        try:
+            data = row["data"]
+            if isinstance(data, bytes):
+                data = zlib.decompress(data)
+            return json.loads(data)
+        except Exception as e:
+            logger.error(f"Error reading report {report_id}: {str(e)}")
+            return None
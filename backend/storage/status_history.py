@@ -0,0 +1,321 @@
+# storage/status_history.py
+import os
+import re
+import mmap
+import struct
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# One byte per sample; 0 is any status not listed here
+STATUS_CODES = {
+    "online": 1,
+    "offline": 2,
+    "error": 3,
+    "unreachable": 4,
+    "timeout": 5
+}
+STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+STATUS_NAMES[0] = "unknown"
+
+ONLINE = bytes([STATUS_CODES["online"]])
+
+# Ring file header: magic, capacity, samples ever written
+HEADER = struct.Struct("<4sIQ")
+MAGIC = b"JBTS"
+
+# Fixed-width columns following the header, each holding `capacity` values:
+# sample time (epoch seconds), status code, then connected/total datasources
+# and deployed/total deployments, in native byte order so queries can cast them directly
+COLUMNS = (("time", "I"), ("status", "B"), ("ds_ok", "H"), ("ds_total", "H"),
+           ("war_ok", "H"), ("war_total", "H"))
+COLUMN_SIZES = {name: struct.calcsize(fmt) for name, fmt in COLUMNS}
+
+# Per status code: the next byte that differs from it
+RUN_ENDS = {code: re.compile(b"[^" + re.escape(bytes([code])) + b"]") for code in range(256)}
+
+class StatusHistory:
+    """
+    Per-instance time series of sweep results.
+
+    Each JBoss instance (hostname and management port) has a fixed-size
+    ring file holding its last `capacity` samples in fixed-width columns:
+    sample time, status code, and datasource and deployment health counts.
+    A sample is appended with a handful of small writes. Queries map the
+    file and binary-search the time column for the range; availability is
+    a byte count over the status column and the state-change timeline is a
+    scan for the next differing byte, both done in C.
+    """
+
+    def __init__(self, history_dir: str, capacity: Optional[int] = None):
+        """
+        Initialize the history store
+
+        Args:
+            history_dir: Directory for the ring files
+            capacity: Samples kept per instance (131072 is three months of one-minute sweeps)
+        """
+        self.history_dir = history_dir
+        self.capacity = capacity or int(os.environ.get("STATUS_HISTORY_CAPACITY", "131072"))
+        self.lock = threading.Lock()
+
+        if not os.path.exists(history_dir):
+            os.makedirs(history_dir)
+
+    def _path(self, environment: str, hostname: str, port: int) -> str:
+        environment = "production" if environment.lower() == "production" else "non-production"
+        safe_hostname = re.sub(r"[^A-Za-z0-9._-]", "_", hostname or "")
+        return os.path.join(self.history_dir, environment, f"{safe_hostname}_{port}.ring")
+
+    @staticmethod
+    def _offsets(capacity: int) -> Dict[str, int]:
+        """Byte offset of each column in a ring file"""
+        offsets = {}
+        offset = HEADER.size
+        for name, _ in COLUMNS:
+            offsets[name] = offset
+            offset += COLUMN_SIZES[name] * capacity
+        offsets["end"] = offset
+        return offsets
+
+    def _open_for_append(self, path: str) -> Tuple[int, int, int]:
+        """Open (creating if needed) a ring file; returns (fd, capacity, samples written)"""
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+        header = os.pread(fd, HEADER.size, 0)
+        if len(header) < HEADER.size:
+            # New file: the columns stay sparse until samples are written
+            os.ftruncate(fd, self._offsets(self.capacity)["end"])
+            os.pwrite(fd, HEADER.pack(MAGIC, self.capacity, 0), 0)
+            return fd, self.capacity, 0
+
+        magic, capacity, written = HEADER.unpack(header)
+        if magic != MAGIC:
+            os.close(fd)
+            raise ValueError(f"{path} is not a status history file")
+        return fd, capacity, written
+
+    def record(self, environment: str, results: List[Dict[str, Any]], timestamp: float) -> int:
+        """
+        Append one sample per instance from a sweep's results
+
+        Samples older than an instance's latest sample (a slower sweep
+        finishing after a newer one) are dropped, keeping each series in
+        time order.
+
+        Args:
+            environment: "production" or "non-production"
+            results: Host status dictionaries from a sweep
+            timestamp: Epoch seconds the sweep started
+
+        Returns:
+            Number of samples recorded
+        """
+        sample_time = int(timestamp)
+        recorded = 0
+        directory = os.path.dirname(self._path(environment, "", 0))
+
+        with self.lock:
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+            for host in results:
+                for instance in host.get("instances", []):
+                    status = instance.get("status")
+                    if status == "pending":
+                        continue
+                    try:
+                        if self._append(self._path(environment, host.get("hostname"), instance.get("port")),
+                                        sample_time, instance):
+                            recorded += 1
+                    except Exception as e:
+                        logger.error(f"Error recording history for {host.get('hostname')}:{instance.get('port')}: {str(e)}")
+
+        return recorded
+
+    def _append(self, path: str, sample_time: int, instance: Dict[str, Any]) -> bool:
+        datasources = instance.get("datasources") or []
+        deployments = instance.get("warFiles") or []
+        values = {
+            "time": sample_time,
+            "status": STATUS_CODES.get(instance.get("status"), 0),
+            "ds_ok": min(65535, sum(1 for ds in datasources if ds.get("status") == "connected")),
+            "ds_total": min(65535, len(datasources)),
+            "war_ok": min(65535, sum(1 for war in deployments if war.get("status") == "deployed")),
+            "war_total": min(65535, len(deployments))
+        }
+
+        fd, capacity, written = self._open_for_append(path)
+        try:
+            offsets = self._offsets(capacity)
+            if written:
+                slot = (written - 1) % capacity
+                latest, = struct.unpack("=I", os.pread(fd, 4, offsets["time"] + slot * 4))
+                if sample_time < latest:
+                    return False
+
+            slot = written % capacity
+            for name, fmt in COLUMNS:
+                os.pwrite(fd, struct.pack("=" + fmt, values[name]), offsets[name] + slot * COLUMN_SIZES[name])
+            # The header goes last, so a reader never sees a slot before it is filled
+            os.pwrite(fd, HEADER.pack(MAGIC, capacity, written + 1), 0)
+            return True
+        finally:
+            os.close(fd)
+
+    def _read(self, environment: str, hostname: str, port: int,
+              since: float, until: float) -> Optional[Dict[str, Any]]:
+        """
+        Get the columns of the samples in [since, until], oldest first
+
+        Returns:
+            Dictionary of column name -> bytes or memoryview, or None if the
+            instance has no history
+        """
+        path = self._path(environment, hostname, port)
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+
+        with f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH)
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return self._slice(path, data, since, until)
+
+    @staticmethod
+    def _slice(path: str, data: mmap.mmap, since: float, until: float) -> Dict[str, Any]:
+        magic, capacity, written = HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a status history file")
+
+        offsets = StatusHistory._offsets(capacity)
+        count = min(written, capacity)
+        first = written - count
+
+        with memoryview(data) as view:
+            with view[offsets["time"]:offsets["time"] + 4 * capacity].cast("I") as times:
+                def lower_bound(value, strict):
+                    # First logical index whose time is >= value (> value if strict)
+                    low, high = first, written
+                    while low < high:
+                        middle = (low + high) // 2
+                        sample_time = times[middle % capacity]
+                        if sample_time < value or (strict and sample_time == value):
+                            low = middle + 1
+                        else:
+                            high = middle
+                    return low
+
+                start = lower_bound(int(since), strict=False)
+                end = lower_bound(int(until), strict=True)
+
+            columns = {}
+            head, tail = start % capacity, end % capacity
+            for name, fmt in COLUMNS:
+                size = COLUMN_SIZES[name]
+                column = view[offsets[name]:offsets[name] + size * capacity]
+                if start == end:
+                    raw = b""
+                elif head < tail or tail == 0:
+                    raw = column[head * size:(tail or capacity) * size].tobytes()
+                else:
+                    # The range wraps around the end of the ring
+                    raw = column[head * size:].tobytes() + column[:tail * size].tobytes()
+                column.release()
+                columns[name] = raw if fmt == "B" else memoryview(raw).cast(fmt)
+
+        return columns
+
+    def availability(self, environment: str, hostname: str, port: int,
+                     since: float, until: float) -> Optional[Dict[str, Any]]:
+        """
+        Summarize an instance's samples over a time range
+
+        Args:
+            environment: "production" or "non-production"
+            hostname: The instance's hostname
+            port: The instance's management port
+            since: Range start, epoch seconds
+            until: Range end, epoch seconds
+
+        Returns:
+            Dictionary with samples, availability (percent of samples online),
+            statusCounts, datasourceHealth and deploymentHealth (percent
+            connected/deployed, None without any), or None if the instance
+            has no history
+        """
+        columns = self._read(environment, hostname, port, since, until)
+        if columns is None:
+            return None
+
+        statuses = columns["status"]
+        samples = len(statuses)
+        status_counts = {}
+        for code, name in STATUS_NAMES.items():
+            count = statuses.count(bytes([code]))
+            if count:
+                status_counts[name] = count
+
+        def percent(part, whole):
+            return round(100.0 * part / whole, 3) if whole else None
+
+        return {
+            "samples": samples,
+            "availability": percent(statuses.count(ONLINE), samples),
+            "statusCounts": status_counts,
+            "datasourceHealth": percent(sum(columns["ds_ok"]), sum(columns["ds_total"])),
+            "deploymentHealth": percent(sum(columns["war_ok"]), sum(columns["war_total"])),
+            "firstSample": columns["time"][0] if samples else None,
+            "lastSample": columns["time"][-1] if samples else None
+        }
+
+    def timeline(self, environment: str, hostname: str, port: int,
+                 since: float, until: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get an instance's state changes over a time range
+
+        Args:
+            environment: "production" or "non-production"
+            hostname: The instance's hostname
+            port: The instance's management port
+            since: Range start, epoch seconds
+            until: Range end, epoch seconds
+
+        Returns:
+            List of runs of one status, oldest first, each with status, from
+            and to (first and last sample time) and samples, or None if the
+            instance has no history
+        """
+        columns = self._read(environment, hostname, port, since, until)
+        if columns is None:
+            return None
+
+        statuses = columns["status"]
+        times = columns["time"]
+        runs = []
+        position = 0
+        while position < len(statuses):
+            code = statuses[position]
+            match = RUN_ENDS[code].search(statuses, position)
+            end = match.start() if match else len(statuses)
+            runs.append({
+                "status": STATUS_NAMES.get(code, "unknown"),
+                "from": times[position],
+                "to": times[end - 1],
+                "samples": end - position
+            })
+            position = end
+        return runs
@@ -0,0 +1,165 @@
+# tests/test_file_storage.py
+import json
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from storage.file_storage import FileStorage
+
+logging.disable(logging.CRITICAL)
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.storage = FileStorage(self.directory)
+        self.journal_path = self.storage.prod_file + ".journal"
+
+    def reopen(self):
+        return FileStorage(self.directory)
+
+    def test_changes_are_journaled_and_replayed(self):
+        first = self.storage.add_host({"hostname": "a", "environment": "production",
+                                       "instances": [{"name": "one", "port": 9990}]})
+        second = self.storage.add_host({"hostname": "b", "environment": "production"})
+        self.storage.add_instance(second["id"], {"name": "two", "port": 9991}, "production")
+        self.storage.delete_host(first["id"], "production")
+
+        with open(self.storage.prod_file) as f:
+            self.assertEqual(json.load(f), [])
+        with open(self.journal_path) as f:
+            self.assertEqual(len(f.readlines()), 4)
+
+        hosts = self.reopen().get_all_hosts("production")
+        self.assertEqual([(host["id"], host["hostname"]) for host in hosts], [(2, "b")])
+        self.assertEqual(hosts[0]["instances"], [{"id": 2, "name": "two", "port": 9991}])
+
+    def test_torn_journal_record_is_skipped(self):
+        self.storage.add_host({"hostname": "a", "environment": "production"})
+        with open(self.journal_path, "a") as f:
+            f.write('{"host": {"id": 2, "hostn')
+
+        self.assertEqual([host["hostname"] for host in self.reopen().get_all_hosts("production")], ["a"])
+
+    def test_compaction_folds_the_journal_into_the_snapshot(self):
+        self.storage.add_host({"hostname": "a", "environment": "production"})
+        self.storage.add_host({"hostname": "b", "environment": "production"})
+
+        self.assertTrue(self.storage.compact("production"))
+        self.assertFalse(os.path.exists(self.journal_path))
+        self.assertFalse(self.storage.compact("production"))
+
+        with open(self.storage.prod_file) as f:
+            snapshot = json.load(f)
+        self.assertEqual([host["hostname"] for host in snapshot["hosts"]], ["a", "b"])
+        self.assertEqual([host["hostname"] for host in self.reopen().get_all_hosts("production")], ["a", "b"])
+
+    def test_ids_are_not_reused_after_delete_and_compaction(self):
+        host = self.storage.add_host({"hostname": "a", "environment": "production",
+                                      "instances": [{"name": "one", "port": 9990}]})
+        self.storage.delete_host(host["id"], "production")
+        self.storage.compact("production")
+
+        storage = self.reopen()
+        host = storage.add_host({"hostname": "b", "environment": "production",
+                                 "instances": [{"name": "two", "port": 9990}]})
+        self.assertEqual(host["id"], 2)
+        self.assertEqual(host["instances"][0]["id"], 2)
+
+    def test_legacy_list_snapshot_is_read(self):
+        with open(self.storage.nonprod_file, "w") as f:
+            json.dump([{"id": 7, "hostname": "old", "instances": [{"id": 3, "name": "one", "port": 9990}]}], f)
+
+        storage = self.reopen()
+        self.assertEqual(storage.get_host_by_id(7, "non-production")["hostname"], "old")
+        host = storage.add_host({"hostname": "new", "environment": "non-production",
+                                 "instances": [{"name": "two", "port": 9990}]})
+        self.assertEqual((host["id"], host["instances"][0]["id"]), (8, 4))
+
+    def test_other_processes_writes_are_seen(self):
+        self.assertEqual(self.storage.get_all_hosts("production"), [])
+        self.reopen().add_host({"hostname": "a", "environment": "production"})
+
+        self.assertEqual([host["hostname"] for host in self.storage.get_all_hosts("production")], ["a"])
+        self.assertEqual(self.storage.add_host({"hostname": "b", "environment": "production"})["id"], 2)
+
+
+class ReportIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.storage = FileStorage(self.directory)
+
+    def append_to_index(self, text):
+        with open(self.storage.report_index_path, "a") as f:
+            f.write(text)
+
+    def test_torn_last_line_is_read_once_completed(self):
+        saved = self.storage.save_report({"results": []}, "production")
+        self.append_to_index('{"id": "production_late", "environment": "production", "timestamp": "9999')
+
+        # Reads before and after the torn line's signature was cached must both work
+        for _ in range(2):
+            self.assertEqual([report["id"] for report in self.storage.get_recent_reports("production")],
+                             [saved["id"]])
+
+        self.append_to_index('-12-31_00-00-00"}\n')
+        self.assertEqual([report["id"] for report in self.storage.get_recent_reports("production")],
+                         ["production_late", saved["id"]])
+
+    def test_reports_are_listed_per_environment_newest_first(self):
+        saved = self.storage.save_report({"results": []}, "production")
+        self.append_to_index('{"id": "production_old", "environment": "production", "timestamp": "2000-01-01_00-00-00"}\n')
+        self.append_to_index('{"id": "non-production_x", "environment": "non-production", "timestamp": "2000-01-01_00-00-00"}\n')
+
+        self.assertEqual([report["id"] for report in self.storage.get_recent_reports("production")],
+                         [saved["id"], "production_old"])
+        self.assertEqual([report["id"] for report in self.storage.get_recent_reports("production", limit=1)],
+                         [saved["id"]])
+
+    def test_missing_index_is_rebuilt_from_the_report_files(self):
+        saved = self.storage.save_report({"results": []}, "production")
+        os.remove(self.storage.report_index_path)
+
+        storage = FileStorage(self.directory)
+        self.assertEqual([report["id"] for report in storage.get_recent_reports("production")], [saved["id"]])
+        self.assertTrue(os.path.exists(self.storage.report_index_path))
+
+
+class FailedWriteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.storage = FileStorage(self.directory)
+        self.host = self.storage.add_host({"hostname": "a", "environment": "production",
+                                           "instances": [{"name": "one", "port": 9990}]})
+
+    def test_failed_journal_write_raises_and_changes_nothing(self):
+        with mock.patch("storage.file_storage.os.fsync", side_effect=OSError("No space left on device")):
+            with self.assertRaises(OSError):
+                self.storage.add_host({"hostname": "b", "environment": "production"})
+            with self.assertRaises(OSError):
+                self.storage.add_instance(self.host["id"], {"name": "two", "port": 9991}, "production")
+
+        self.assertEqual(self.storage.add_host({"hostname": "c", "environment": "production"})["id"], 2)
+        self.assertEqual([host["hostname"] for host in self.storage.get_all_hosts("production")], ["a", "c"])
+
+    def test_unreadable_registry_fails_the_write_instead_of_reusing_ids(self):
+        self.storage.compact("production")
+        with open(self.storage.prod_file, "w") as f:
+            f.write("{not json")
+
+        with self.assertRaises(ValueError):
+            self.storage.add_host({"hostname": "b", "environment": "production"})
+        self.assertFalse(os.path.exists(self.storage.prod_file + ".journal"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+# tests/test_jboss_cli.py
+import os
+import stat
+import tempfile
+import unittest
+from unittest import mock
+
+from services.cli_session_pool import parse_dmr, timeout_message
+from services.jboss_cli import JBossCLIService
+
+# What jboss-cli.sh prints (without --output-json) for the composite probe of a running server
+PROBE_OUTPUT = """{
+    "outcome" => "success",
+    "result" => {
+        "step-1" => {
+            "outcome" => "success",
+            "result" => "running"
+        },
+        "step-2" => {
+            "outcome" => "success",
+            "result" => {
+                "data-source" => {"ExampleDS" => {
+                    "allocation-retry" => undefined,
+                    "background-validation-millis" => 0L,
+                    "connection-url" => "jdbc:h2:mem:test;DB_CLOSE_DELAY=-1;DB_CLOSE_ON_EXIT=FALSE",
+                    "driver-name" => "h2",
+                    "enabled" => true,
+                    "jndi-name" => "java:jboss/datasources/ExampleDS",
+                    "max-pool-size" => 20,
+                    "password" => expression "${env.DB_PASSWORD:sa}",
+                    "statistics-enabled" => false
+                }},
+                "jdbc-driver" => {"h2" => {
+                    "driver-module-name" => "com.h2database.h2",
+                    "driver-xa-datasource-class-name" => "org.h2.jdbcx.JdbcDataSource"
+                }},
+                "xa-data-source" => undefined
+            }
+        },
+        "step-3" => {
+            "outcome" => "success",
+            "result" => [{
+                "address" => [("deployment" => "app.war")],
+                "outcome" => "success",
+                "result" => {
+                    "content" => [{"hash" => bytes {
+                        0x7b, 0x1f, 0x2e, 0x4a
+                    }}],
+                    "enabled" => true,
+                    "name" => "app.war",
+                    "runtime-name" => "app.war",
+                    "status" => "OK"
+                }
+            }]
+        }
+    }
+}"""
+
+# Connection test of ExampleDS
+TEST_OUTPUT = """{
+    "outcome" => "success",
+    "result" => [true]
+}"""
+
+FAKE_CLI = """#!/bin/sh
+case "$*" in
+    *test-connection-in-pool*) cat "{test}" ;;
+    *) cat "{probe}" ;;
+esac
+"""
+
+
+class ParseDMRTest(unittest.TestCase):
+
+    def test_composite_result_splits_into_successful_steps(self):
+        result = parse_dmr(PROBE_OUTPUT)
+        steps = JBossCLIService._split_composite_result(True, result, 3)
+        self.assertEqual([success for success, _ in steps], [True, True, True])
+        self.assertEqual(steps[0][1]["result"], "running")
+
+    def test_values(self):
+        data = parse_dmr(PROBE_OUTPUT)["result"]["step-2"]["result"]["data-source"]["ExampleDS"]
+        self.assertIsNone(data["allocation-retry"])
+        self.assertEqual(data["background-validation-millis"], 0)
+        self.assertEqual(data["max-pool-size"], 20)
+        self.assertIs(data["enabled"], True)
+        self.assertEqual(data["password"], "${env.DB_PASSWORD:sa}")
+        self.assertEqual(parse_dmr('"a \\"quoted\\" \\\\ value"'), 'a "quoted" \\ value')
+        self.assertEqual(parse_dmr("[big decimal 1.5, -2L, 1e3]"), [1.5, -2, 1000.0])
+
+    def test_rejects_plain_text(self):
+        with self.assertRaises(ValueError):
+            parse_dmr("Failed to connect to the controller")
+
+
+class CompositeProbeOverCLITest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        probe_path = os.path.join(directory, "probe.txt")
+        test_path = os.path.join(directory, "test.txt")
+        with open(probe_path, "w") as f:
+            f.write(PROBE_OUTPUT)
+        with open(test_path, "w") as f:
+            f.write(TEST_OUTPUT)
+
+        cli_path = os.path.join(directory, "jboss-cli.sh")
+        with open(cli_path, "w") as f:
+            f.write(FAKE_CLI.replace("{probe}", probe_path).replace("{test}", test_path))
+        os.chmod(cli_path, os.stat(cli_path).st_mode | stat.S_IEXEC)
+
+        environment = {
+            "JBOSS_CLI_PATH": cli_path,
+            "JBOSS_TRANSPORT": "cli",
+            "JBOSS_CLI_SESSION_POOL": "false",
+            "JBOSS_REACHABILITY_CHECK": "false",
+            "JBOSS_COMPOSITE_PROBES": "true"
+        }
+        with mock.patch.dict(os.environ, environment):
+            self.service = JBossCLIService()
+
+    def test_running_instance_is_online(self):
+        probe = self.service.probe_instance("localhost", 9990)
+        self.assertEqual(probe["status"], "online")
+        self.assertEqual([(ds["name"], ds["status"]) for ds in probe["datasources"]], [("ExampleDS", "connected")])
+        self.assertEqual([(war["name"], war["status"]) for war in probe["warFiles"]], [("app.war", "deployed")])
+
+
+class CompositeProbeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.service = JBossCLIService()
+        self.composites = []
+        self.tests = []
+
+    def probe(self, composite_response, test_response=(True, {"outcome": "success", "result": [True]})):
+        def execute_composite(host, port, commands, *args):
+            self.composites.append(commands)
+            return JBossCLIService._split_composite_result(*composite_response, len(commands))
+
+        def execute_command(host, port, command, username, password, environment, timeout=None):
+            self.tests.append((command, timeout))
+            return test_response
+
+        with mock.patch.object(self.service, "execute_composite", side_effect=execute_composite), \
+                mock.patch.object(self.service, "execute_command", side_effect=execute_command):
+            return self.service._probe_instance_composite("localhost", 9990)
+
+    def test_unreachable_instance_is_probed_once(self):
+        probe = self.probe((False, "Failed to connect to the controller"))
+        self.assertEqual(probe["status"], "offline")
+        self.assertEqual(len(self.composites), 1)
+        self.assertEqual(self.tests, [])
+
+    def test_datasources_are_tested_outside_the_composite_with_their_own_timeout(self):
+        probe = self.probe((True, parse_dmr(PROBE_OUTPUT)))
+        self.assertEqual(len(self.composites[0]), 3)
+        self.assertEqual(self.tests, [
+            ("/subsystem=datasources/data-source=ExampleDS:test-connection-in-pool",
+             self.service.datasource_test_timeout)
+        ])
+        self.assertEqual(probe["datasources"][0]["status"], "connected")
+
+    def test_hung_datasource_is_reported_as_timeout(self):
+        probe = self.probe((True, parse_dmr(PROBE_OUTPUT)), (False, timeout_message("localhost", 9990, 10.0)))
+        self.assertEqual(probe["status"], "online")
+        self.assertEqual(probe["datasources"][0]["status"], "timeout")
+        self.assertEqual(probe["warFiles"][0]["status"], "deployed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+# tests/test_status_poller.py
+import importlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from services.status_poller import StatusPoller
+
+logging.disable(logging.CRITICAL)
+
+
+def host(host_id, *instances, status="online"):
+    return {
+        "id": host_id,
+        "hostname": f"host{host_id}",
+        "status": status,
+        "instances": [
+            {"id": instance_id, "name": f"instance{instance_id}", "port": 9990, "status": instance_status,
+             "datasources": [], "warFiles": []}
+            for instance_id, instance_status in instances
+        ]
+    }
+
+
+class DeltaTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1700000000.0
+        patcher = mock.patch("services.status_poller.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.poller = StatusPoller(None, None, delta_history=60)
+
+    def store(self, *results):
+        self.now += 1
+        return self.poller.store("production", list(results), self.now)["version"]
+
+    def test_version_only_changes_with_the_results(self):
+        first = self.store(host(1, (1, "online")))
+        self.assertEqual(first, int(self.now * 1000))
+        self.assertEqual(self.store(host(1, (1, "online"))), first)
+        self.assertGreater(self.store(host(1, (1, "offline"))), first)
+
+    def test_changes_hold_only_what_changed_since_the_version(self):
+        first = self.store(host(1, (1, "online"), (2, "online")), host(2, (3, "online")))
+        second = self.store(host(1, (1, "offline"), (2, "online")), host(2, (3, "online")))
+
+        delta = self.poller.get_changes("production", first)
+        self.assertEqual(delta["version"], second)
+        self.assertEqual([(change["id"], [instance["id"] for instance in change["instances"]])
+                          for change in delta["changes"]], [(1, [1])])
+        self.assertEqual(delta["removed"], [])
+
+        third = self.store(host(1, (1, "offline")))
+        delta = self.poller.get_changes("production", second)
+        self.assertEqual(delta["version"], third)
+        self.assertEqual(delta["changes"], [])
+        self.assertCountEqual(delta["removed"], [{"host_id": 1, "instance_id": 2},
+                                                 {"host_id": 2, "instance_id": None},
+                                                 {"host_id": 2, "instance_id": 3}])
+
+        # Everything changed since the first version, merged
+        delta = self.poller.get_changes("production", first)
+        self.assertEqual([change["id"] for change in delta["changes"]], [1])
+        self.assertEqual(len(delta["removed"]), 3)
+
+    def test_host_level_change_is_sent_without_unchanged_instances(self):
+        first = self.store(host(1, (1, "online")))
+        self.store(host(1, (1, "online"), status="error"))
+
+        changes = self.poller.get_changes("production", first)["changes"]
+        self.assertEqual([(change["status"], change["instances"]) for change in changes], [("error", [])])
+
+    def test_unknown_versions_need_the_full_results(self):
+        self.assertIsNone(self.poller.get_changes("production", 0))
+        first = self.store(host(1, (1, "online")))
+
+        self.assertIsNone(self.poller.get_changes("production", first - 1))
+        self.assertIsNone(self.poller.get_changes("production", first + 1))
+        self.assertEqual(self.poller.get_changes("production", first)["changes"], [])
+
+    def test_changes_older_than_the_history_window_are_pruned(self):
+        first = self.store(host(1, (1, "online")), host(2, (2, "online")))
+        self.store(host(1, (1, "online")))
+        self.now += 120
+        latest = self.store(host(1, (1, "offline")))
+
+        self.assertIsNone(self.poller.get_changes("production", first))
+        self.assertEqual(self.poller.removed_versions["production"], {})
+        self.assertEqual(self.poller.changed_versions["production"], {(1, 1): latest})
+        self.assertEqual(self.poller.get_changes("production", latest - 60 * 1000)["changes"][0]["id"], 1)
+
+    def test_older_sweep_does_not_replace_a_newer_one(self):
+        latest = self.store(host(1, (1, "offline")))
+        stored = self.poller.store("production", [host(1, (1, "online"))], self.now - 10)
+        self.assertEqual(stored["version"], latest)
+        self.assertEqual(self.poller.get_snapshot("production")["results"][0]["instances"][0]["status"], "offline")
+
+
+class PublishedStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_other_process_answers_from_the_published_state(self):
+        leader = StatusPoller(None, None, state_dir=self.directory)
+        follower = StatusPoller(None, None, state_dir=self.directory)
+
+        first = leader.store("production", [host(1, (1, "online"), (2, "online"))], time.time())["version"]
+        self.assertEqual(follower.get_snapshot("production")["version"], first)
+
+        second = leader.store("production", [host(1, (1, "offline"))], time.time())["version"]
+        delta = follower.get_changes("production", first)
+        self.assertEqual(delta["version"], second)
+        self.assertEqual([instance["id"] for instance in delta["changes"][0]["instances"]], [1])
+        self.assertEqual(delta["removed"], [{"host_id": 1, "instance_id": 2}])
+
+
+class StatusEndpointTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        environment = {"STORAGE_DIR": cls.directory, "STATUS_POLLER_ENABLED": "false",
+                       "REPORT_COMPACTION_INTERVAL": "0"}
+        with mock.patch.dict(os.environ, environment):
+            cls.app = importlib.import_module("app")
+        cls.client = cls.app.app.test_client()
+        response = cls.client.post("/api/login", json={"username": "nonprod_admin", "password": "nonprod_password",
+                                                      "environment": "non-production"})
+        cls.headers = {"Authorization": f"Bearer {response.get_json()['access_token']}"}
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def get_status(self, **headers):
+        response = self.client.get("/api/monitoring/status", headers=dict(self.headers, **headers))
+        self.addCleanup(response.close)
+        return response
+
+    def test_etag_gives_304_then_a_delta(self):
+        poller = self.app.status_poller
+        first = poller.store("non-production", [host(1, (1, "online"))], time.time())["version"]
+
+        response = self.get_status()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["ETag"], f'"{first}"')
+
+        response = self.get_status(**{"If-None-Match": f'W/"{first}"'})
+        self.assertEqual(response.status_code, 304)
+
+        second = poller.store("non-production", [host(1, (1, "offline"))], time.time())["version"]
+        response = self.get_status(**{"If-None-Match": f'"{first}"'})
+        self.assertEqual(response.headers["ETag"], f'"{second}"')
+        delta = response.get_json()["delta"]
+        self.assertEqual((delta["since"], delta["version"]), (first, second))
+        self.assertEqual(delta["changes"][0]["instances"][0]["status"], "offline")
+
+        # A version this process never issued gets the full results
+        response = self.get_status(**{"If-None-Match": '"12345"'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("delta", response.get_data(as_text=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -209,7 +209,26 @@ const Dashboard = () => {
       
       if (response.data.hosts) {
         console.log(`Found ${response.data.hosts.length} hosts:`, response.data.hosts);
-        setHosts(response.data.hosts);
+        
+        // Overlay the latest status; only changes are downloaded after the first poll
+        let statusResults = [];
+        try {
+          statusResults = await api.pollMonitoringStatus(jbossCredentials);
+        } catch (statusErr) {
+          console.error('Error fetching monitoring status:', statusErr);
+        }
+        
+        setHosts(response.data.hosts.map(host => {
+          const hostStatus = statusResults.find(h => h.id === host.id);
+          if (!hostStatus) return host;
+          return {
+            ...host,
+            instances: (host.instances || []).map(instance => ({
+              ...instance,
+              ...(hostStatus.instances.find(i => i.id === instance.id) || {})
+            }))
+          };
+        }));
       } else {
         console.log("No hosts found in response");
         setHosts([]);
@@ -4,9 +4,50 @@ import axios from 'axios';
 // This should match the URL where the backend API is accessible from the browser
 const API_BASE_URL = process.env.REACT_APP_API_BASE_URL || 'http://localhost:5000/api';
 
+// Time budget for a live status sweep before unfinished instances are returned as pending
+const STATUS_DEADLINE_MS = 3000;
+
+// Merge a status delta (changed hosts/instances and removed IDs) into full results
+const applyStatusDelta = (results, delta) => {
+  const hosts = results.map(host => ({ ...host, instances: [...(host.instances || [])] }));
+  
+  delta.changes.forEach(change => {
+    let host = hosts.find(h => h.id === change.id);
+    if (!host) {
+      host = { ...change, instances: [] };
+      hosts.push(host);
+    } else {
+      Object.assign(host, { ...change, instances: host.instances });
+    }
+    
+    change.instances.forEach(instance => {
+      const index = host.instances.findIndex(i => i.id === instance.id);
+      if (index >= 0) {
+        host.instances[index] = instance;
+      } else {
+        host.instances.push(instance);
+      }
+    });
+  });
+  
+  delta.removed.forEach(({ host_id, instance_id }) => {
+    const hostIndex = hosts.findIndex(h => h.id === host_id);
+    if (hostIndex < 0) return;
+    if (instance_id === null) {
+      hosts.splice(hostIndex, 1);
+    } else {
+      hosts[hostIndex].instances = hosts[hostIndex].instances.filter(i => i.id !== instance_id);
+    }
+  });
+  
+  return hosts;
+};
+
 class ApiService {
   constructor() {
     console.log("API URL:", API_BASE_URL);
+    // Last status snapshot, used for delta polling
+    this.statusSnapshot = null;
     this.api = axios.create({
       baseURL: API_BASE_URL,
       headers: {
@@ -188,6 +229,85 @@ class ApiService {
     }
   }
   
+  // Poll monitoring status, downloading only what changed since the last poll
+  async pollMonitoringStatus(jbossCredentials = null) {
+    try {
+      const params = new URLSearchParams();
+      
+      if (this.statusSnapshot) {
+        params.append('since', this.statusSnapshot.version);
+      }
+      
+      // Bound the wait when the backend has to sweep live; slow instances come back as "pending"
+      params.append('deadline_ms', STATUS_DEADLINE_MS);
+      
+      if (jbossCredentials) {
+        params.append('username', jbossCredentials.username);
+        params.append('password', jbossCredentials.password);
+      }
+      
+      const response = await this.api.get(`/monitoring/status?${params.toString()}`, {
+        validateStatus: (status) => status === 200 || status === 304
+      });
+      
+      if (response.status === 304) {
+        return this.statusSnapshot.results;
+      }
+      
+      if (response.data.snapshot.partial) {
+        // Partial results are unversioned, so the next poll fetches the full snapshot
+        this.statusSnapshot = null;
+        return response.data.results;
+      }
+      
+      if (response.data.delta) {
+        this.statusSnapshot = {
+          version: response.data.delta.version,
+          results: applyStatusDelta(this.statusSnapshot.results, response.data.delta)
+        };
+      } else {
+        this.statusSnapshot = {
+          version: response.data.snapshot.version,
+          results: response.data.results
+        };
+      }
+      
+      return this.statusSnapshot.results;
+    } catch (error) {
+      throw error;
+    }
+  }
+  
+  // Stream per-instance results as Server-Sent Events; returns the EventSource so callers can close it
+  streamMonitoringStatus(onInstance, onSummary, jbossCredentials = null) {
+    const params = new URLSearchParams();
+    params.append('jwt', localStorage.getItem('authToken') || '');
+    
+    if (jbossCredentials) {
+      params.append('username', jbossCredentials.username);
+      params.append('password', jbossCredentials.password);
+    }
+    
+    const source = new EventSource(`${API_BASE_URL}/monitoring/status/stream?${params.toString()}`);
+    
+    source.addEventListener('instance', (event) => {
+      const data = JSON.parse(event.data);
+      onInstance(data.host, data.instance);
+    });
+    
+    source.addEventListener('summary', (event) => {
+      source.close();
+      if (onSummary) onSummary(JSON.parse(event.data));
+    });
+    
+    source.onerror = (error) => {
+      console.error("Status stream error:", error);
+      source.close();
+    };
+    
+    return source;
+  }
+  
   async getInstanceStatus(instanceId, jbossCredentials = null) {
     try {
       let url = `/monitoring/instance/${instanceId}`;